@@ -0,0 +1,238 @@
+"""
+batching.py — cross-request micro-batching for the Whisper encoder.
+
+With INFERENCE_BACKEND=threads, every inference thread shares one model. Each
+30-second mel window a thread needs encoded is handed to an ``EncoderBatcher``,
+which waits up to ENCODER_BATCH_WAIT_MS for windows from other threads (other
+jobs, or other chunks of one long-form job) and runs them through the encoder
+as a single batch of up to ENCODER_BATCH_MAX. The batched matmuls amortise
+setup cost that batch-size-1 forwards pay per window.
+
+Decoding stays per job but runs concurrently: ``BatchedWhisperModel`` hands
+each thread back its own audio features and gives each decode its own
+kv-cache. Stock Whisper registers kv-cache hooks on the shared decoder modules
+for every decode, so two decodes at once would write into each other's
+caches. Here one set of hooks is installed once per model and writes to the
+calling thread's cache (``ThreadLocalKVCache``), which makes the decoder
+reentrant without a lock.
+"""
+
+import contextlib
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BATCH_MAX = max(1, int(os.environ.get("ENCODER_BATCH_MAX", "8")))
+ENCODER_BATCH_WAIT_MS = float(os.environ.get("ENCODER_BATCH_WAIT_MS", "5"))
+
+
+class EncoderBatcher:
+    """Collects mel windows from many threads and encodes them together."""
+
+    def __init__(self, encoder, max_batch: int = ENCODER_BATCH_MAX,
+                 wait_ms: float = ENCODER_BATCH_WAIT_MS):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.wait_seconds = wait_ms / 1000.0
+        self._queue: "queue.Queue[Optional[Tuple[Any, Future]]]" = queue.Queue()
+        self.batches = 0
+        self.windows = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(target=self._loop, name="encoder-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, mel):
+        """Encode a (batch, n_mels, frames) mel tensor; blocks until its windows are done."""
+        import torch
+
+        futures = []
+        for window in mel:
+            future: Future = Future()
+            self._queue.put((window, future))
+            futures.append(future)
+        return torch.stack([future.result() for future in futures])
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.wait_seconds
+            stopping = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stopping:
+                return
+
+    def _run(self, batch: List[Tuple[Any, Future]]):
+        import torch
+
+        # Whisper always pads windows to the same frame count; group just in case
+        groups: Dict[Tuple, List[Tuple[Any, Future]]] = {}
+        for window, future in batch:
+            groups.setdefault((tuple(window.shape), window.dtype), []).append((window, future))
+        for items in groups.values():
+            try:
+                with torch.no_grad():
+                    features = self.encoder(torch.stack([window for window, _ in items]))
+            except BaseException as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, future), row in zip(items, features):
+                future.set_result(row)
+        self.batches += 1
+        self.windows += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+    def close(self):
+        self._queue.put(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "mean_batch": round(self.windows / self.batches, 2) if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "max_batch": self.max_batch,
+            "wait_ms": self.wait_seconds * 1000,
+        }
+
+
+class _CacheHandle:
+    """Stands in for the RemovableHandles Whisper expects; removing it ends the thread's cache."""
+
+    def __init__(self, owner: "ThreadLocalKVCache"):
+        self._owner = owner
+
+    def remove(self):
+        self._owner.local.cache = None
+
+
+class ThreadLocalKVCache:
+    """
+    Whisper's ``save_to_cache`` hook, installed once on a shared decoder, with
+    the cache looked up per thread. A thread without an active cache (plain
+    forward passes, language detection) gets the module output unchanged.
+    """
+
+    def __init__(self, model):
+        from whisper.model import MultiHeadAttention
+
+        self.n_text_ctx = model.dims.n_text_ctx
+        self.local = threading.local()
+
+        def install(layer):
+            if isinstance(layer, MultiHeadAttention):
+                layer.key.register_forward_hook(self._save)
+                layer.value.register_forward_hook(self._save)
+
+        model.decoder.apply(install)
+
+    def _save(self, module, _, output):
+        import torch
+
+        cache = getattr(self.local, "cache", None)
+        if cache is None:
+            return None
+        if module not in cache or output.shape[1] > self.n_text_ctx:
+            # save as-is, for the first token or cross attention
+            cache[module] = output
+        else:
+            cache[module] = torch.cat([cache[module], output], dim=1).detach()
+        return cache[module]
+
+    def install(self, cache: Optional[dict] = None):
+        """``Whisper.install_kv_cache_hooks`` for the calling thread."""
+        self.local.cache = {**cache} if cache is not None else {}
+        return self.local.cache, [_CacheHandle(self)]
+
+
+class BatchedWhisperModel:
+    """
+    Thread-safe view of a Whisper model: encoder work goes through an
+    ``EncoderBatcher`` and every decode keeps its own kv-cache, so concurrent
+    decodes run in parallel. ``serial_decode`` restores one-decode-at-a-time
+    (the old behaviour; benchmark_engines.py --serial-decode). Everything else
+    is delegated to the wrapped model.
+    """
+
+    def __init__(self, model, batcher: EncoderBatcher, serial_decode: bool = False):
+        self.model = model
+        self.batcher = batcher
+        self.encoder = batcher.encode
+        self.kv_cache = ThreadLocalKVCache(model)
+        self._decode_lock = threading.Lock() if serial_decode else contextlib.nullcontext()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def __call__(self, mel, tokens):
+        return self.model.decoder(tokens, self._features(mel))
+
+    def install_kv_cache_hooks(self, cache: Optional[dict] = None):
+        return self.kv_cache.install(cache)
+
+    def _features(self, mel):
+        """Audio features for ``mel``, encoded via the batcher unless already encoded."""
+        if mel.shape[-2:] == (self.dims.n_audio_ctx, self.dims.n_audio_state):
+            return mel
+        if mel.ndim == 2:
+            return self.batcher.encode(mel.unsqueeze(0))[0]
+        return self.batcher.encode(mel)
+
+    def embed_audio(self, mel):
+        return self._features(mel)
+
+    def decode(self, mel, options=None):
+        from whisper.decoding import DecodingOptions, decode as decode_function
+
+        features = self._features(mel)
+        with self._decode_lock:
+            return decode_function(self, features, options or DecodingOptions())
+
+    def detect_language(self, mel, tokenizer=None):
+        from whisper.decoding import detect_language as detect_function
+
+        features = self._features(mel)
+        with self._decode_lock:
+            return detect_function(self, features, tokenizer)
+
+    def transcribe(self, audio, **options):
+        from whisper.transcribe import transcribe as transcribe_function
+
+        return transcribe_function(self, audio, **options)
+
+    def batch_stats(self) -> Dict[str, Any]:
+        return self.batcher.stats()
+
+    def close(self):
+        self.batcher.close()
+
+
+def enable_encoder_batching(engine, serial_decode: bool = False):
+    """Registry ``on_load`` hook: route a Whisper engine's encoder through a batcher."""
+    from engines import WhisperEngine
+
+    if isinstance(engine, WhisperEngine) and not isinstance(engine.model, BatchedWhisperModel):
+        engine.model = BatchedWhisperModel(engine.model, EncoderBatcher(engine.model.encoder), serial_decode)
+        logger.info(f"Encoder batching on: up to {ENCODER_BATCH_MAX} windows, {ENCODER_BATCH_WAIT_MS} ms wait")
+    return engine
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+benchmark_engines.py — side-by-side inference engine comparison.
+
+Runs every engine on the same audio and reports real-time factor, load time,
+peak RSS and WER, then names the fastest engine within the accuracy bar.
+
+    python benchmark_engines.py                          # base vs base:int8 on test_audio.wav
+    python benchmark_engines.py --models small,small:int8 --fixtures fixtures/
+    python benchmark_engines.py --max-wer 0.12 --lang en
+    python benchmark_engines.py --models base --concurrency 4   # encoder batching throughput
+    python benchmark_engines.py --models base --concurrency 4 --serial-decode   # ...with decodes one at a time
+
+Each engine runs in a fresh process so peak RSS is its own. WER is measured
+against ``<clip>.txt`` next to each clip when present, otherwise against the
+first engine's transcript (so it reads as drift from the fp32 baseline).
+With ``--concurrency N`` each clip is transcribed N times at once through the
+shared-model thread backend (``batching.py``) and RTF is wall time over the
+total audio, i.e. inverse throughput. ``--serial-decode`` locks the decoder
+to one decode at a time, as before per-thread kv-caches, for a before/after
+comparison.
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_AUDIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_audio.wav")
+
+
+def normalize_words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance over the reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _run_engine(model: str, clips: List[str], language: Optional[str], repeats: int,
+                concurrency: int, serial_decode: bool, out):
+    """Child process: load one engine, transcribe every clip, report timings and peak RSS."""
+    import torch
+    from concurrent.futures import ThreadPoolExecutor
+    from functools import partial
+    from batching import enable_encoder_batching
+    from media import SAMPLE_RATE, load_audio
+    from model_registry import ModelSpec, ModelRegistry
+
+    torch.set_num_threads(os.cpu_count() or 1)
+    registry = ModelRegistry(budget_bytes=1 << 62,
+                             on_load=partial(enable_encoder_batching, serial_decode=serial_decode)
+                             if concurrency > 1 else None)
+    started = time.time()
+    engine = registry.get(ModelSpec.parse(model))
+    load_seconds = time.time() - started
+
+    audio_seconds = compute_seconds = 0.0
+    texts: Dict[str, str] = {}
+    for clip in clips:
+        audio = load_audio(clip)
+        engine.transcribe(audio[:SAMPLE_RATE], language=language or "en")  # kernel warm-up
+        for _ in range(repeats):
+            started = time.time()
+            if concurrency > 1:
+                with ThreadPoolExecutor(concurrency) as threads:
+                    result = list(threads.map(lambda a: engine.transcribe(a, language=language),
+                                              [audio] * concurrency))[0]
+            else:
+                result = engine.transcribe(audio, language=language)
+            compute_seconds += time.time() - started
+            audio_seconds += concurrency * len(audio) / SAMPLE_RATE
+        texts[clip] = result["text"]
+
+    out.put({
+        "model": ModelSpec.parse(model).key,
+        "load_seconds": load_seconds,
+        "rtf": compute_seconds / audio_seconds if audio_seconds else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KB on Linux
+        "resident_mb": registry.resident_bytes() / 1e6,
+        "texts": texts,
+        **engine.stats(),
+    })
+
+
+def benchmark(model: str, clips: List[str], language: Optional[str], repeats: int,
+              concurrency: int = 1, serial_decode: bool = False) -> Dict:
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_run_engine,
+                       args=(model, clips, language, repeats, concurrency, serial_decode, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default="base,base:int8",
+                        help="comma-separated model specs; the first is the WER baseline")
+    parser.add_argument("--audio", default=DEFAULT_AUDIO, help="clip to benchmark")
+    parser.add_argument("--fixtures", help="directory of extra .wav/.mp3/.m4a clips (+ optional .txt references)")
+    parser.add_argument("--lang", default=None, help="force a decode language (default: detect)")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="simultaneous transcriptions per clip (thread backend with encoder batching)")
+    parser.add_argument("--serial-decode", action="store_true",
+                        help="with --concurrency: run one decode at a time (baseline for concurrent decoding)")
+    parser.add_argument("--max-wer", type=float, default=0.10, help="accuracy bar for the recommendation")
+    args = parser.parse_args()
+
+    clips = [args.audio]
+    if args.fixtures:
+        for pattern in ("*.wav", "*.mp3", "*.m4a"):
+            clips.extend(sorted(glob.glob(os.path.join(args.fixtures, pattern))))
+    references = {}
+    for clip in clips:
+        txt = os.path.splitext(clip)[0] + ".txt"
+        if os.path.exists(txt):
+            with open(txt, "r", encoding="utf-8") as f:
+                references[clip] = f.read()
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    results = []
+    for model in models:
+        print(f"⏱  {model} on {len(clips)} clip(s)...", flush=True)
+        results.append(benchmark(model, clips, args.lang, args.repeats, args.concurrency, args.serial_decode))
+
+    baseline = results[0]["texts"]
+    for result in results:
+        wers = [word_error_rate(references.get(clip, baseline[clip]), text)
+                for clip, text in result["texts"].items()]
+        result["wer"] = sum(wers) / len(wers)
+
+    print()
+    print(f"{'engine':<24} {'RTF':>7} {'load s':>7} {'peak RSS MB':>12} {'weights MB':>11} {'WER':>7}")
+    for r in results:
+        print(f"{r['model']:<24} {r['rtf']:>7.3f} {r['load_seconds']:>7.1f} "
+              f"{r['peak_rss_mb']:>12.0f} {r['resident_mb']:>11.0f} {r['wer']:>7.3f}")
+    for r in results:
+        if r.get("encoder_batching"):
+            print(f"{r['model']}: encoder batches {r['encoder_batching']}")
+    if len(references) < len(clips):
+        print(f"\n(WER vs {results[0]['model']} for clips without a .txt reference)")
+
+    eligible = [r for r in results if r["wer"] <= args.max_wer]
+    if not eligible:
+        print(f"\n❌ No engine meets WER <= {args.max_wer}")
+        return 1
+    best = min(eligible, key=lambda r: r["rtf"])
+    print(f"\n✅ Fastest engine within WER <= {args.max_wer}: {best['model']} (RTF {best['rtf']:.3f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
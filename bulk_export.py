@@ -0,0 +1,89 @@
+"""
+bulk_export.py — the job record every export is built from, and /export/bulk.
+
+``export_record`` is a job as exported: one NDJSON line, the per-job JSON file
+and the input to ``renditions.render``. The bulk iterators read matching jobs
+off a server-side cursor BULK_EXPORT_BATCH_ROWS at a time and render each one
+before the next is read, so memory stays flat however many jobs match the
+filter.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+
+import exporters
+from database import SessionLocal, TranscriptionJob
+
+BULK_EXPORT_BATCH_ROWS = int(os.environ.get("BULK_EXPORT_BATCH_ROWS", "200"))
+BULK_EXPORT_FILE_TYPES = ("csv", "srt", "json")
+
+
+def export_record(job: TranscriptionJob) -> dict:
+    """A job as written to the bulk export (per-job JSON file or one NDJSON line)."""
+    return {
+        "job_id": job.id,
+        "url": job.normalized_url or job.url,
+        "original_url": job.original_url or job.url,
+        "platform_guess": job.platform_guess,
+        "state": job.state or job.status,
+        "language": job.detected_mt or job.language,
+        "detected_language": job.detected_language,
+        "mt_enhanced": job.mt_enhanced,
+        "duration": job.duration,
+        "segment_count": job.segment_count,
+        "full_text": job.full_text,
+        "segments": json.loads(job.segments) if job.segments else [],
+        "corrected_text": job.corrected_text,
+        "corrected_segments": json.loads(job.corrected_segments) if job.corrected_segments else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "corrected_at": job.corrected_at.isoformat() if job.corrected_at else None,
+    }
+
+
+def iter_bulk_jobs(created_from: Optional[datetime], created_to: Optional[datetime], state: Optional[str],
+                   lang: Optional[str], platform: Optional[str]) -> Iterator[TranscriptionJob]:
+    """Matching jobs, oldest first, streamed in batches on a session owned by the generator."""
+    db = SessionLocal()
+    try:
+        query = db.query(TranscriptionJob)
+        if created_from:
+            query = query.filter(TranscriptionJob.created_at >= created_from)
+        if created_to:
+            query = query.filter(TranscriptionJob.created_at < created_to)
+        if state:
+            query = query.filter(func.coalesce(TranscriptionJob.state, TranscriptionJob.status) == state)
+        if lang:
+            query = query.filter(func.coalesce(TranscriptionJob.detected_mt, TranscriptionJob.language) == lang)
+        if platform:
+            query = query.filter(TranscriptionJob.platform_guess == platform)
+        query = query.order_by(TranscriptionJob.created_at, TranscriptionJob.id)
+        for job in query.yield_per(BULK_EXPORT_BATCH_ROWS):
+            yield job
+            db.expunge(job)
+    finally:
+        db.close()
+
+
+def iter_bulk_ndjson(jobs) -> Iterator[bytes]:
+    for job in jobs:
+        yield (json.dumps(export_record(job), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def iter_bulk_files(jobs, file_types: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """(archive name, bytes) for each requested file of each job."""
+    for job in jobs:
+        record = export_record(job)
+        segments, corrected = record["segments"], record["corrected_segments"]
+        for file_type in file_types:
+            if file_type == "csv":
+                data = exporters.csv_bytes(segments, corrected)
+            elif file_type == "srt":
+                data = exporters.srt_text(segments, corrected).encode("utf-8")
+            else:
+                data = json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8")
+            yield f"{job.id}/transcript.{file_type}", data
@@ -0,0 +1,82 @@
+"""Small in-process caching helpers shared by the transcript and translation caches."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe LRU bounded by total size in bytes (and optionally entry count).
+
+    ``sizeof`` returns the accounted size of a value; entries larger than the
+    whole budget are not stored. An optional ``ttl_seconds`` expires entries
+    on read. Hit, miss and eviction counters are kept for /stats.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int],
+                 max_items: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl_seconds is not None \
+                    and time.time() - entry[2] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size, time.time())
+            self._bytes += size
+            while self._data and (
+                self._bytes > self.max_bytes
+                or (self.max_items is not None and len(self._data) > self.max_items)
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
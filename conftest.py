@@ -0,0 +1,31 @@
+"""
+Shared pytest setup.
+
+database.py binds its engine at import time, so DATABASE_URL is pointed at a
+throwaway SQLite file before any test module imports it. The ``db`` fixture
+empties every table and hands out a fresh session.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='dawt-tests-')}/test.db"
+
+# Scripts, not test modules: test_startup.py exits the interpreter, test.py calls a live server.
+collect_ignore = ["test_startup.py", "test.py"]
+
+
+@pytest.fixture
+def db():
+    from database import Base, SessionLocal, engine
+
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -9,10 +9,13 @@ from sqlalchemy import (
     Column,
     DateTime,
     Float,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     create_engine,
+    inspect,
     text,
 )
 from sqlalchemy.orm import declarative_base, sessionmaker
@@ -79,6 +82,22 @@ class TranscriptionJob(Base):
     failure_message = Column(Text, nullable=True)
     transcription_id = Column(String, nullable=True)
 
+    # ── Durable job-queue lease columns (see job_queue.py) ───────────────────
+    # A worker owns a job while lease_expires_at is in the future; it extends
+    # the lease with heartbeats. Expired leases are re-claimed by any worker.
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    # ── Single-flight key: "<extractor>:<media id>" or the normalized URL ────
+    media_key = Column(String, nullable=True, index=True)
+
+    # ── Media inspection summary (see media.py): duration, codec, stage timings ─
+    media_info = Column(Text, nullable=True)  # JSON string
+
+    # ── Model the job asked for, as a model_registry key ("whisper:small:none") ─
+    whisper_model = Column(String, nullable=True)
+
 
 class InstagramCookie(Base):
     __tablename__ = "instagram_cookies"
@@ -92,6 +111,85 @@ class InstagramCookie(Base):
     notes = Column(Text, nullable=True)
 
 
+class TranscriptCacheEntry(Base):
+    """Persistent tier of the content-addressed transcript cache (transcript_cache.py)."""
+    __tablename__ = "transcript_cache"
+
+    key = Column(String, primary_key=True)       # sha256 of PCM + decode settings
+    model_name = Column(String, nullable=False)
+    language = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)       # JSON: text, language, segments, cleaned_transcript
+    size_bytes = Column(Integer, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class TranslationCacheEntry(Base):
+    """Persistent tier of the segment translation memo (translation_cache.py)."""
+    __tablename__ = "translation_cache"
+
+    key = Column(String, primary_key=True)       # sha256 of normalized text + languages + model version
+    source_lang = Column(String, nullable=False)
+    target_lang = Column(String, nullable=False)
+    model_version = Column(String, nullable=False)
+    translation = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_hit_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RenditionBlob(Base):
+    """Rendered export bytes, stored once per distinct content (renditions.py)."""
+    __tablename__ = "rendition_blobs"
+
+    sha256 = Column(String, primary_key=True)    # of content; doubles as the strong ETag
+    content = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class JobRendition(Base):
+    """Which blob is the current (job, format) export."""
+    __tablename__ = "job_renditions"
+
+    job_id = Column(String, primary_key=True)
+    fmt = Column(String, primary_key=True)       # csv, xlsx, srt, vtt, json
+    blob_sha256 = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TrainingPair(Base):
+    """One corrected segment, written at /correct time (training_pairs.py)."""
+    __tablename__ = "training_pairs"
+    # Ids are the export watermark, so SQLite must never reuse one after a re-correction deletes it
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # export watermark (since=)
+    job_id = Column(String, nullable=False, index=True)
+    segment_index = Column(Integer, nullable=False)
+    original = Column(Text, nullable=True)
+    corrected = Column(Text, nullable=True)
+    language = Column(String, nullable=True)
+    timestamp_start = Column(Float, nullable=True)
+    timestamp_end = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TranscriptSegment(Base):
+    """One row per segment of a completed job (transcript_segments.py); mirrors the JSON blob."""
+    __tablename__ = "transcript_segments"
+    __table_args__ = (Index("ix_transcript_segments_job_start", "job_id", "start"),)
+
+    job_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    start = Column(Float, nullable=False)
+    end = Column(Float, nullable=False)
+    text = Column(Text, nullable=True)
+    text_enhanced = Column(Text, nullable=True)
+    corrected_text = Column(Text, nullable=True)
+
+
 # ============================================================
 # SCHEMA MIGRATION
 # ============================================================
@@ -111,6 +209,18 @@ _MIGRATION_COLUMNS = [
     ("failure_code",     "failure_code TEXT"),
     ("failure_message",  "failure_message TEXT"),
     ("transcription_id", "transcription_id TEXT"),
+    ("lease_owner",      "lease_owner TEXT"),
+    ("lease_expires_at", "lease_expires_at DATETIME"),
+    ("heartbeat_at",     "heartbeat_at DATETIME"),
+    ("media_key",        "media_key TEXT"),
+    ("media_info",       "media_info TEXT"),
+    ("whisper_model",    "whisper_model TEXT"),
+]
+
+# Indexes for migrated columns. create_all() only builds indexes for new
+# tables, so pre-existing transcription_jobs tables get them here.
+_MIGRATION_INDEXES = [
+    ("ix_transcription_jobs_media_key", "transcription_jobs (media_key)"),
 ]
 
 
@@ -120,20 +230,25 @@ def migrate_schema(bind=None) -> list[str]:
 
     Safe to call on every startup and on an already-migrated database.
     Returns the list of column names actually added (empty when already up
-    to date).  Works for SQLite only; skips gracefully for other engines.
+    to date).  SQLite is inspected with PRAGMA; other engines (Postgres) go
+    through the SQLAlchemy inspector and get TIMESTAMP instead of DATETIME.
     """
     target = bind or engine
-    if not str(target.url).startswith("sqlite"):
-        return []
+    is_sqlite = str(target.url).startswith("sqlite")
 
-    with target.connect() as conn:
-        result = conn.execute(text("PRAGMA table_info(transcription_jobs)"))
-        existing = {row[1] for row in result}
+    if is_sqlite:
+        with target.connect() as conn:
+            result = conn.execute(text("PRAGMA table_info(transcription_jobs)"))
+            existing = {row[1] for row in result}
+    else:
+        existing = {col["name"] for col in inspect(target).get_columns("transcription_jobs")}
 
     added: list[str] = []
     with target.connect() as conn:
         for col_name, col_def in _MIGRATION_COLUMNS:
             if col_name not in existing:
+                if not is_sqlite:
+                    col_def = col_def.replace("DATETIME", "TIMESTAMP")
                 conn.execute(
                     text(f"ALTER TABLE transcription_jobs ADD COLUMN {col_def}")
                 )
@@ -141,6 +256,10 @@ def migrate_schema(bind=None) -> list[str]:
                 logger.info(f"[migrate_schema] Added column: {col_name}")
                 added.append(col_name)
 
+        for index_name, index_target in _MIGRATION_INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {index_target}"))
+            conn.commit()
+
     if not added:
         logger.debug("[migrate_schema] transcription_jobs schema already up to date")
     return added
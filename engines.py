@@ -0,0 +1,128 @@
+"""
+engines.py — inference engines behind the model registry.
+
+Every engine the registry hands out honours one contract:
+
+    engine.transcribe(audio, **options) -> {"text", "language",
+                                            "segments": [{"start", "end", "text"}]}
+    engine.detect_language(audio) -> {whisper language code: probability}
+    engine.nbytes() -> bytes of weights it keeps resident
+    engine.stats() / engine.close() -> engine-specific counters / release
+
+``audio`` is a file path or 16 kHz mono float32 PCM and ``options`` are the
+usual Whisper decode options (language, initial_prompt, ...). Callers never
+see the engine's native result objects.
+
+Built-in engines (selected via ``ModelSpec`` quantization):
+
+    whisper:<size>          openai-whisper, fp32 on CPU (the default)
+    whisper:<size>:int8     the same checkpoint with torch dynamic int8
+                            quantization of every Linear layer in the encoder
+                            and decoder; CPU only, roughly 2x faster on the
+                            attention/MLP matmuls and a quarter of their RAM
+
+``benchmark_engines.py`` compares them on real-time factor, peak RSS and WER.
+torch and whisper are imported lazily so the API process never pays for them.
+"""
+
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+WHISPER_QUANTIZATIONS = ("none", "int8")
+
+
+def _tensor_bytes(value) -> int:
+    import torch
+
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v) for v in value)
+    return 0
+
+
+class WhisperEngine:
+    """openai-whisper model behind the common engine contract."""
+
+    name = "whisper"
+
+    def __init__(self, model, quantization: str = "none"):
+        self.model = model
+        self.quantization = quantization
+
+    def transcribe(self, audio: Any, **options) -> Dict[str, Any]:
+        result = self.model.transcribe(audio, **self._decode_options(options))
+        return {
+            "text": result.get("text", ""),
+            "language": result.get("language"),
+            "segments": [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+                for seg in result.get("segments", [])
+            ],
+        }
+
+    def _decode_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        return options
+
+    def detect_language(self, audio: Any, top: int = 5) -> Dict[str, float]:
+        """Language-ID on the first 30 s of ``audio``: one encoder pass, one decoder step."""
+        if not self.model.is_multilingual:
+            return {"en": 1.0}
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+        _, probabilities = self.model.detect_language(mel.to(self.model.device))
+        ranked = sorted(probabilities.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {code: float(p) for code, p in ranked}
+
+    def nbytes(self) -> int:
+        # state_dict covers parameters, buffers and quantized packed weights alike
+        return sum(_tensor_bytes(v) for v in self.model.state_dict().values())
+
+    def stats(self) -> Dict[str, Any]:
+        batch_stats = getattr(self.model, "batch_stats", None)
+        return {"encoder_batching": batch_stats()} if batch_stats else {}
+
+    def close(self):
+        close = getattr(self.model, "close", None)
+        if close:
+            close()
+
+
+class Int8WhisperEngine(WhisperEngine):
+    """Whisper with dynamically int8-quantized Linear layers (CPU)."""
+
+    def __init__(self, model):
+        super().__init__(_quantize_linear_int8(model), quantization="int8")
+
+    def _decode_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        # Quantized kernels are CPU/fp32-activation only
+        return {**options, "fp16": False}
+
+
+def _quantize_linear_int8(model):
+    import torch
+    from whisper.model import Linear as WhisperLinear
+
+    # whisper.model.Linear only overrides forward() to cast weights to the input
+    # dtype, a no-op in fp32. quantize_dynamic matches exact module types, so
+    # hand it plain nn.Linear modules.
+    for module in model.modules():
+        if type(module) is WhisperLinear:
+            module.__class__ = torch.nn.Linear
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model.eval()
+
+
+def load_whisper(size: str, quantization: str = "none") -> WhisperEngine:
+    """Registry loader for the "whisper" engine."""
+    if quantization not in WHISPER_QUANTIZATIONS:
+        raise ValueError(f"whisper engine does not support quantization {quantization!r}")
+    import whisper
+
+    model = whisper.load_model(size, device="cpu" if quantization == "int8" else None)
+    if quantization == "int8":
+        return Int8WhisperEngine(model)
+    return WhisperEngine(model)
@@ -0,0 +1,161 @@
+"""
+exporters.py — transcript exports without pandas.
+
+Rows are produced one segment at a time from the stored segment JSON
+(corrections win over the original text; ``text_enhanced`` fills the MT
+column). CSV is written with ``csv.writer`` into a small buffer that is
+yielded every CSV_ROWS_PER_CHUNK rows; ``csv_bytes`` joins it for the
+rendition store (renditions.py). XLSX uses openpyxl's write-only workbook and
+appends each row as it is produced; write-only sheets need column widths
+before the first row, so they are measured on the first XLSX_WIDTH_SAMPLE_ROWS
+rows (held back until then) instead of the whole transcript.
+
+SRT, WebVTT and ZIP archives (``iter_zip``, a streaming writer used by the
+bulk export) live here as well.
+"""
+
+import csv
+import io
+import itertools
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+TRANSCRIPT_HEADER = ("Start Time", "End Time", "Duration", "Text", "MT Enhanced")
+CSV_ROWS_PER_CHUNK = 256
+XLSX_MAX_COLUMN_WIDTH = 50
+# Leading rows buffered to size the columns; text longer than the cap wraps in Excel.
+XLSX_WIDTH_SAMPLE_ROWS = 200
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def final_segments(segments: List[Dict[str, Any]],
+                   corrected_segments: Optional[List[Dict[str, Any]]] = None) -> Iterator[tuple]:
+    """``(start, end, text, text_enhanced)`` per segment, using the corrected text when there is one."""
+    for i, segment in enumerate(segments):
+        corrected = corrected_segments[i] if corrected_segments and i < len(corrected_segments) else None
+        text = (corrected or segment).get("text", segment.get("text", "")) or ""
+        yield (segment.get("start", 0), segment.get("end", 0), text.strip(),
+               (segment.get("text_enhanced") or "").strip())
+
+
+def transcript_rows(segments: List[Dict[str, Any]],
+                    corrected_segments: Optional[List[Dict[str, Any]]] = None) -> Iterator[tuple]:
+    """One spreadsheet row per segment."""
+    for start, end, text, enhanced in final_segments(segments, corrected_segments):
+        yield (f"{start:.2f}", f"{end:.2f}", f"{end - start:.2f}", text, enhanced)
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(seconds, 0) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def srt_text(segments: List[Dict[str, Any]],
+             corrected_segments: Optional[List[Dict[str, Any]]] = None) -> str:
+    cues = [
+        f"{n}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text}\n"
+        for n, (start, end, text, _) in enumerate(final_segments(segments, corrected_segments), start=1)
+    ]
+    return "\n".join(cues)
+
+
+def vtt_text(segments: List[Dict[str, Any]],
+             corrected_segments: Optional[List[Dict[str, Any]]] = None) -> str:
+    cues = [
+        f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text}\n"
+        for start, end, text, _ in final_segments(segments, corrected_segments)
+    ]
+    return "WEBVTT\n\n" + "\n".join(cues)
+
+
+def csv_bytes(segments: List[Dict[str, Any]],
+              corrected_segments: Optional[List[Dict[str, Any]]] = None) -> bytes:
+    return b"".join(iter_csv(transcript_rows(segments, corrected_segments)))
+
+
+def iter_csv(rows: Iterable[Sequence], header: Sequence[str] = TRANSCRIPT_HEADER,
+             rows_per_chunk: int = CSV_ROWS_PER_CHUNK) -> Iterator[bytes]:
+    """UTF-8 CSV with a BOM (so Excel detects the encoding), a few hundred rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(rows: Iterable[Sequence], dest, header: Sequence[str] = TRANSCRIPT_HEADER,
+               sheet_title: str = "Transcript", sample_rows: int = XLSX_WIDTH_SAMPLE_ROWS):
+    """Write a single-sheet workbook to the file object ``dest``, appending rows as they arrive.
+
+    Column widths come from the header and the first ``sample_rows`` rows, which
+    are buffered until the widths are set; the rest stream straight through.
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, sample_rows))
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    for col, name in enumerate(header, start=1):
+        width = max(len(str(row[col - 1])) for row in [header, *sample] if col <= len(row))
+        sheet.column_dimensions[get_column_letter(col)].width = min(width + 2, XLSX_MAX_COLUMN_WIDTH)
+    sheet.append(list(header))
+    for row in itertools.chain(sample, rows):
+        sheet.append(list(row))
+    workbook.save(dest)
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable sink for ``zipfile``; ``drain()`` hands back what was written."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def iter_zip(files: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Stream a ZIP of ``(name, data)`` pairs as they are produced. zipfile
+    writes data descriptors to a non-seekable sink, so only the member being
+    added (and the central directory) is ever held in memory.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
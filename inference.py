@@ -0,0 +1,480 @@
+"""
+inference.py — off-loop Whisper inference executor.
+
+Whisper decoding is CPU-bound and runs for seconds to minutes. Calling it from
+an ``async def`` handler blocks the uvicorn event loop, so /health, /status and
+every other request stall behind a single clip.
+
+This module owns a small process pool. Each worker keeps a
+``model_registry.ModelRegistry``: the default model is loaded in the pool
+initializer, other models on first use, all under the registry's RAM budget.
+Every result carries the worker's registry stats, which the pool keeps for
+/stats. ``warm_up`` hands the warm-start models to the initializer too, so
+each process (including one restarted after a crash) is warm before it takes
+a request; a barrier makes its tasks land on distinct workers, one each.
+With INFERENCE_BACKEND=threads the pool is a thread pool in the API process
+instead, sharing one registry whose Whisper models batch encoder windows
+across threads (see ``batching.py``); worth it at INFERENCE_WORKERS of 4-8.
+
+Arrays longer than INFERENCE_SPILL_SECONDS reach process workers as a
+``PcmFile`` (a temp .npy path) rather than a pickle, so an hour of audio isn't
+serialized through the pool's pipe and held twice while it is in flight.
+
+Submissions are bounded: at most ``workers + queue_size`` calls may be running
+or waiting at any time. Beyond that, ``submit`` raises ``InferenceQueueFull``
+so HTTP handlers can answer 429 with a Retry-After header instead of piling
+up unbounded work. A crashed or shut-down pool raises ``InferenceUnavailable``
+(503).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from model_registry import DEFAULT_MODEL, ModelRegistry, ModelSpec
+
+logger = logging.getLogger(__name__)
+
+WHISPER_MODEL_NAME = DEFAULT_MODEL
+INFERENCE_WORKERS = max(1, int(os.environ.get("INFERENCE_WORKERS", "1")))
+INFERENCE_QUEUE_SIZE = max(0, int(os.environ.get("INFERENCE_QUEUE_SIZE", "4")))
+INFERENCE_RETRY_AFTER_SECONDS = int(os.environ.get("INFERENCE_RETRY_AFTER_SECONDS", "15"))
+# "process" (default): isolated spawn workers. "threads": shared model with cross-request encoder batching.
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "process")
+# Opt-in: load WARM_START_MODELS in every worker and run one tiny inference right after startup.
+WARM_START = os.environ.get("WARM_START", "0") == "1"
+WARM_START_MODELS = [
+    m.strip() for m in os.environ.get("WARM_START_MODELS", DEFAULT_MODEL).split(",") if m.strip()
+]
+
+# Longer arrays go to process workers through a temp file instead of the pool's pickle pipe.
+INFERENCE_SPILL_SECONDS = float(os.environ.get("INFERENCE_SPILL_SECONDS", "60"))
+# How long a warm-up task waits for the other workers to check in before reporting alone.
+WARM_UP_BARRIER_SECONDS = float(os.environ.get("WARM_UP_BARRIER_SECONDS", "600"))
+
+SAMPLE_RATE = 16000  # Whisper's native input rate
+
+
+class InferenceBackpressure(Exception):
+    """Base class for submissions the executor refuses to accept right now."""
+
+    status_code = 503
+    error_code = "inference_unavailable"
+
+    def __init__(self, message: str, retry_after: int = INFERENCE_RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class InferenceQueueFull(InferenceBackpressure):
+    """Every worker is busy and the bounded submission queue is full."""
+
+    status_code = 429
+    error_code = "inference_busy"
+
+
+class InferenceUnavailable(InferenceBackpressure):
+    """The pool is shut down or its worker processes died."""
+
+    status_code = 503
+    error_code = "inference_unavailable"
+
+
+@dataclass(frozen=True)
+class PcmFile:
+    """16 kHz float32 PCM saved as .npy; what a process worker receives instead of the array."""
+
+    path: str
+
+    def load(self):
+        import numpy as np
+
+        return np.load(self.path, allow_pickle=False)
+
+
+# ============================================================
+# WORKER-PROCESS SIDE
+# ============================================================
+# These functions run inside pool workers. They must stay importable at module
+# top level (the pool uses the "spawn" start method) and must not touch the
+# database or FastAPI app.
+
+_worker_registry: Optional[ModelRegistry] = None
+_worker_default: Optional[ModelSpec] = None
+
+
+def _init_worker(model_name: str, workers: int, warm_models: Tuple[str, ...] = ()):
+    """Pool initializer: pin torch threads, load the default model and warm ``warm_models``."""
+    global _worker_registry, _worker_default
+    import torch
+
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    _worker_registry = ModelRegistry()
+    _worker_default = ModelSpec.parse(model_name)
+    _worker_registry.get(_worker_default)
+    _warm_models(warm_models)
+
+
+_thread_backend_lock = threading.Lock()
+
+
+def _init_thread_backend(model_name: str, warm_models: Tuple[str, ...] = ()):
+    """Thread-pool initializer: the first thread builds the shared, batching registry."""
+    global _worker_registry, _worker_default
+    with _thread_backend_lock:
+        if _worker_registry is not None:
+            return
+        import torch
+        from batching import enable_encoder_batching
+
+        torch.set_num_threads(os.cpu_count() or 1)
+        registry = ModelRegistry(on_load=enable_encoder_batching)
+        _worker_default = ModelSpec.parse(model_name)
+        registry.get(_worker_default)
+        _worker_registry = registry
+        _warm_models(warm_models)
+
+
+def _transcribe_in_worker(audio: Any, options: Dict[str, Any],
+                          model: Optional[str] = None) -> Dict[str, Any]:
+    """Run an engine on a file path or 16 kHz float32 array and return plain data."""
+    spec = ModelSpec.parse(model) if model else _worker_default
+    if isinstance(audio, PcmFile):
+        audio = audio.load()
+    result = _worker_registry.get(spec).transcribe(audio, **options)
+    return {**result, "model": spec.key, "worker": _worker_registry.stats()}
+
+
+def _detect_language_in_worker(audio: Any, model: Optional[str] = None) -> Dict[str, Any]:
+    """Language-ID only (no transcription) on 16 kHz float32 PCM."""
+    spec = ModelSpec.parse(model) if model else _worker_default
+    if isinstance(audio, PcmFile):
+        audio = audio.load()
+    return {"probabilities": _worker_registry.get(spec).detect_language(audio),
+            "worker": _worker_registry.stats()}
+
+
+def _warm_models(models) -> None:
+    """Load ``models`` and run each once on a second of silence (torch kernel warm-up)."""
+    import numpy as np
+
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    for model in models:
+        _worker_registry.get(ModelSpec.parse(model)).transcribe(silence, language="en", fp16=False)
+
+
+def _warm_up_in_worker(models: List[str], barrier) -> Dict[str, Any]:
+    """Warm ``models`` (a no-op if the initializer did), then hold this worker until all check in."""
+    _warm_models(models)
+    try:
+        barrier.wait(WARM_UP_BARRIER_SECONDS)
+    except threading.BrokenBarrierError:
+        logger.warning(f"[warm-up pid={os.getpid()}] Not every worker checked in within "
+                       f"{WARM_UP_BARRIER_SECONDS:.0f}s")
+    return {"worker": _worker_registry.stats()}
+
+
+# ============================================================
+# API-PROCESS SIDE
+# ============================================================
+
+def _without_worker_stats(result):
+    """Copy of a worker result minus the registry stats the pool already recorded."""
+    if isinstance(result, dict) and "worker" in result:
+        return {k: v for k, v in result.items() if k != "worker"}
+    return result
+
+
+class InferencePool:
+    """Bounded front-end for a ``ProcessPoolExecutor`` of Whisper workers."""
+
+    def __init__(self, workers: int = INFERENCE_WORKERS,
+                 queue_size: int = INFERENCE_QUEUE_SIZE,
+                 model_name: str = WHISPER_MODEL_NAME,
+                 retry_after: int = INFERENCE_RETRY_AFTER_SECONDS,
+                 backend: str = INFERENCE_BACKEND):
+        self.workers = workers
+        self.backend = backend
+        self.queue_size = queue_size
+        self.model_name = model_name
+        self.retry_after = retry_after
+        self.capacity = workers + queue_size
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._closed = False
+        self._worker_stats: Dict[int, Dict[str, Any]] = {}
+        self._warm_models: Tuple[str, ...] = ()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._closed:
+                raise InferenceUnavailable("Inference executor is shutting down.", self.retry_after)
+            if self._executor is None:
+                logger.info(
+                    f"Starting inference pool: {self.workers} worker(s) ({self.backend}), "
+                    f"queue {self.queue_size}, model {self.model_name}"
+                )
+                if self.backend == "threads":
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="inference",
+                        initializer=_init_thread_backend,
+                        initargs=(self.model_name, self._warm_models),
+                    )
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.model_name, self.workers, self._warm_models),
+                    )
+            return self._executor
+
+    def _reset_broken(self, executor: Executor):
+        """Drop a broken executor so the next submission starts a fresh pool."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn, *args, block: bool = False,
+               timeout: Optional[float] = None) -> Future:
+        """
+        Submit ``fn(*args)`` to a worker process.
+
+        With ``block=False`` (HTTP handlers) a full queue raises
+        ``InferenceQueueFull`` immediately. Background jobs pass ``block=True``
+        and wait for a free slot instead.
+        """
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise InferenceQueueFull(
+                "Transcription capacity is full. Try again shortly.", self.retry_after
+            )
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._reset_broken(executor)
+                raise InferenceUnavailable(
+                    "Transcription workers restarted. Try again shortly.", self.retry_after
+                )
+            except RuntimeError:
+                raise InferenceUnavailable("Inference executor is shutting down.", self.retry_after)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._release)
+        future.add_done_callback(lambda f: self._on_done(executor, f))
+        return future
+
+    def _on_done(self, executor: Executor, future: Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            logger.error("Inference worker died; pool will be restarted on next submission")
+            self._reset_broken(executor)
+            with self._lock:
+                self._worker_stats.clear()
+        elif error is None:
+            result = future.result()
+            if isinstance(result, dict) and isinstance(result.get("worker"), dict):
+                with self._lock:
+                    self._worker_stats[result["worker"]["pid"]] = result["worker"]
+
+    async def run(self, fn, *args):
+        """Submit without blocking and await the result from the event loop."""
+        future = self.submit(fn, *args)
+        try:
+            return _without_worker_stats(await asyncio.wrap_future(future))
+        except BrokenProcessPool:
+            raise InferenceUnavailable(
+                "Transcription worker crashed. Try again shortly.", self.retry_after
+            )
+
+    def run_blocking(self, fn, *args):
+        """Wait for a free slot and the result; for worker threads, never the event loop."""
+        future = self.submit(fn, *args, block=True)
+        try:
+            return _without_worker_stats(future.result())
+        except BrokenProcessPool:
+            raise InferenceUnavailable(
+                "Transcription worker crashed. Try again shortly.", self.retry_after
+            )
+
+    def warm_up(self, models: List[str]):
+        """Load ``models`` in every worker and run one tiny inference; blocks until done.
+
+        Workers started from here on (the first pool, or one replacing a crashed
+        pool) warm ``models`` in their initializer. The warm-up tasks then meet at a
+        barrier, so no worker can take two of them and each reports its own stats.
+        """
+        with self._lock:
+            self._warm_models = tuple(models)
+        manager = None
+        if self.backend == "threads":
+            barrier = threading.Barrier(self.workers)
+        else:
+            manager = multiprocessing.get_context("spawn").Manager()
+            barrier = manager.Barrier(self.workers)
+        try:
+            futures = [self.submit(_warm_up_in_worker, models, barrier, block=True) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+        except BrokenProcessPool:
+            raise InferenceUnavailable("Transcription worker crashed during warm-up.", self.retry_after)
+        finally:
+            if manager is not None:
+                manager.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "backend": self.backend,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "capacity": self.capacity,
+                "started": self._executor is not None,
+                "model_registries": list(self._worker_stats.values()),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = InferencePool()
+
+
+def _ship(audio: Any) -> Any:
+    """``audio`` as sent to a worker: a ``PcmFile`` when pickling it would copy a long array."""
+    if pool.backend == "threads" or not hasattr(audio, "dtype") \
+            or len(audio) < INFERENCE_SPILL_SECONDS * SAMPLE_RATE:
+        return audio
+    import numpy as np
+
+    fd, path = tempfile.mkstemp(prefix="pcm_", suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, audio, allow_pickle=False)
+    except BaseException:
+        os.remove(path)
+        raise
+    return PcmFile(path)
+
+
+def _discard(shipped: Any):
+    if isinstance(shipped, PcmFile):
+        try:
+            os.remove(shipped.path)
+        except OSError:
+            pass
+
+
+async def _run_shipped(fn, audio: Any, *args):
+    shipped = await asyncio.to_thread(_ship, audio)
+    try:
+        return await pool.run(fn, shipped, *args)
+    finally:
+        _discard(shipped)
+
+
+def _run_shipped_blocking(fn, audio: Any, *args):
+    shipped = _ship(audio)
+    try:
+        return pool.run_blocking(fn, shipped, *args)
+    finally:
+        _discard(shipped)
+
+
+async def transcribe_async(audio: Any, language: Optional[str] = None,
+                           model: Optional[str] = None, **options) -> Dict[str, Any]:
+    """Transcribe from an async handler; raises ``InferenceBackpressure`` when saturated."""
+    return await _run_shipped(_transcribe_in_worker, audio, {"language": language, **options}, model)
+
+
+def transcribe_blocking(audio: Any, language: Optional[str] = None,
+                        model: Optional[str] = None, **options) -> Dict[str, Any]:
+    """Transcribe from a background thread, waiting for capacity instead of failing."""
+    return _run_shipped_blocking(_transcribe_in_worker, audio, {"language": language, **options}, model)
+
+
+async def detect_language_async(audio: Any, model: Optional[str] = None) -> Dict[str, float]:
+    """Whisper language probabilities for ``audio`` from an async handler."""
+    return (await _run_shipped(_detect_language_in_worker, audio, model))["probabilities"]
+
+
+def detect_language_blocking(audio: Any, model: Optional[str] = None) -> Dict[str, float]:
+    """Whisper language probabilities for ``audio`` from a background thread."""
+    return _run_shipped_blocking(_detect_language_in_worker, audio, model)["probabilities"]
+
+
+def transcribe_longform_blocking(audio, language: Optional[str] = None,
+                                 chunk_seconds: Optional[float] = None,
+                                 model: Optional[str] = None, **options) -> Dict[str, Any]:
+    """
+    Split ``audio`` at silences and transcribe the chunks in parallel.
+
+    At most ``pool.workers`` chunks of one job are outstanding at a time, so a
+    long job keeps the pool busy without taking the queue slots HTTP callers
+    rely on. Wall-clock time drops roughly by the worker count.
+    """
+    import longform
+
+    spans = longform.split_on_silence(audio, chunk_seconds or longform.LONGFORM_CHUNK_SECONDS)
+    decode_options = {"language": language, **options}
+    logger.info(f"Long-form transcription: {len(spans)} chunk(s) across {pool.workers} worker(s)")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(spans)
+    pending: Dict[Future, Tuple[int, Any]] = {}
+    next_span = 0
+    try:
+        while next_span < len(spans) or pending:
+            while next_span < len(spans) and len(pending) < pool.workers:
+                start, end = spans[next_span]
+                shipped = _ship(audio[start:end])
+                try:
+                    future = pool.submit(_transcribe_in_worker, shipped, decode_options, model, block=True)
+                except BaseException:
+                    _discard(shipped)
+                    raise
+                pending[future] = (next_span, shipped)
+                next_span += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, shipped = pending.pop(future)
+                _discard(shipped)
+                results[index] = future.result()
+    except BrokenProcessPool:
+        raise InferenceUnavailable("Transcription worker crashed. Try again shortly.", pool.retry_after)
+    finally:
+        for future, (_, shipped) in pending.items():
+            future.cancel()
+            _discard(shipped)
+
+    offsets = [start / SAMPLE_RATE for start, _ in spans]
+    return longform.stitch_segments(results, offsets)
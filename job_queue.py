@@ -0,0 +1,377 @@
+"""
+job_queue.py — durable, lease-based queue on top of transcription_jobs.
+
+/submit only records a job in state ``accepted``; it no longer runs any work
+in the API process. Workers (embedded threads in the API process and/or
+``python worker.py`` on other machines) claim jobs by writing a lease, extend
+it with heartbeats while they work, and clear it when the job reaches a
+terminal state. If a worker dies, its lease expires and any other worker
+re-claims the job, incrementing ``retry_count``. A handler that returns or
+crashes without a terminal state counts the same way: its lease is kept and
+set to expire after JOB_RETRY_DELAY_SECONDS. Jobs that exhaust
+``JOB_MAX_RETRIES`` are failed with ``retries_exhausted``.
+
+Jobs move through phases, each drained by its own workers: "transcribe"
+(download, decode, Whisper) and "enhance" (mT5 over the stored segments).
+A handler passes a job on by leaving it in the next phase's state; releasing
+it there clears the lease without counting a retry, so the slow MT step never
+holds a transcription worker or its lease.
+
+Every commit on the handler's session renews the lease in the same
+transaction (``LeaseHeartbeat.guard``), so a worker whose lease was taken
+over gets ``LeaseLost`` instead of overwriting the new owner's progress.
+
+Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` on Postgres. SQLite has
+no row locks, so there the claim is a compare-and-set UPDATE guarded by the
+lease columns; SQLite serialises writers, which makes the CAS atomic.
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, event, or_, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, TranscriptionJob
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "120"))
+JOB_HEARTBEAT_SECONDS = int(os.environ.get("JOB_HEARTBEAT_SECONDS", "30"))
+JOB_MAX_RETRIES = int(os.environ.get("JOB_MAX_RETRIES", "3"))
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", "2"))
+JOB_RETRY_DELAY_SECONDS = int(os.environ.get("JOB_RETRY_DELAY_SECONDS", "5"))
+
+# States each phase's workers pick up. A job without a lease is fresh work;
+# one with a lease only becomes claimable again once it has expired (a retry).
+# An "enhancing" job already has its transcript and only needs MT.
+PHASE_STATES = {
+    "transcribe": ("accepted", "downloading", "transcribing"),
+    "enhance": ("enhancing",),
+}
+LEASED_STATES = PHASE_STATES["transcribe"] + PHASE_STATES["enhance"]
+TERMINAL_STATES = ("completed", "failed")
+
+# Signature of the job body: (job_id, url, lang, lease) -> None
+JobHandler = Callable[[str, str, str, "LeaseHeartbeat"], None]
+
+
+class LeaseLost(Exception):
+    """Another worker owns the job now; the handler must stop without writing."""
+
+
+_wakeup = threading.Event()
+
+
+def notify():
+    """Wake idle in-process workers so a fresh submission starts without polling delay."""
+    _wakeup.set()
+
+
+def make_worker_id(suffix: str = "") -> str:
+    base = f"{socket.gethostname()}:{os.getpid()}"
+    return f"{base}:{suffix}" if suffix else base
+
+
+def _claimable(now: datetime, states: Tuple[str, ...]):
+    return and_(
+        TranscriptionJob.state.in_(states),
+        or_(
+            TranscriptionJob.lease_expires_at.is_(None),
+            TranscriptionJob.lease_expires_at < now,
+        ),
+    )
+
+
+def _fail_exhausted(job: TranscriptionJob, now: datetime):
+    job.state = "failed"
+    job.status = "failed"
+    job.failure_code = "retries_exhausted"
+    job.failure_message = "Transcription was interrupted too many times. Please submit the link again."
+    job.error_message = job.failure_message
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.updated_at = now
+    job.completed_at = now
+
+
+def _take_lease(job: TranscriptionJob, worker_id: str, now: datetime) -> bool:
+    """Apply lease fields to a locked/CAS-won row. Returns False if retries are exhausted."""
+    if job.lease_owner is not None:
+        # The previous owner stopped heartbeating — this is a retry.
+        job.retry_count = (job.retry_count or 0) + 1
+        if job.retry_count > JOB_MAX_RETRIES:
+            logger.warning(f"[{job.id}] Lease expired {job.retry_count} times — giving up")
+            _fail_exhausted(job, now)
+            return False
+        logger.warning(
+            f"[{job.id}] Re-claiming expired lease from {job.lease_owner} "
+            f"(retry {job.retry_count}/{JOB_MAX_RETRIES})"
+        )
+    job.lease_owner = worker_id
+    job.lease_expires_at = now + timedelta(seconds=JOB_LEASE_SECONDS)
+    job.heartbeat_at = now
+    return True
+
+
+def _claim_postgres(db: Session, worker_id: str, states: Tuple[str, ...]) -> Optional[TranscriptionJob]:
+    while True:
+        now = datetime.utcnow()
+        job = (
+            db.query(TranscriptionJob)
+            .filter(_claimable(now, states))
+            .order_by(TranscriptionJob.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.rollback()
+            return None
+        claimed = _take_lease(job, worker_id, now)
+        db.commit()
+        if claimed:
+            return job
+
+
+def _claim_sqlite(db: Session, worker_id: str, states: Tuple[str, ...],
+                  batch: int = 5) -> Optional[TranscriptionJob]:
+    while True:
+        now = datetime.utcnow()
+        candidates = (
+            db.query(TranscriptionJob.id, TranscriptionJob.lease_owner)
+            .filter(_claimable(now, states))
+            .order_by(TranscriptionJob.created_at)
+            .limit(batch)
+            .all()
+        )
+        if not candidates:
+            return None
+
+        for job_id, previous_owner in candidates:
+            # Compare-and-set: only one worker's UPDATE can match the old lease.
+            won = db.execute(
+                update(TranscriptionJob)
+                .where(TranscriptionJob.id == job_id)
+                .where(_claimable(now, states))
+                .where(
+                    TranscriptionJob.lease_owner.is_(None) if previous_owner is None
+                    else TranscriptionJob.lease_owner == previous_owner
+                )
+                .values(
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    heartbeat_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount == 1
+            db.commit()
+            if not won:
+                continue
+
+            job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+            # The CAS already moved lease_owner to us; restore the previous owner
+            # so _take_lease can decide whether this is a retry.
+            job.lease_owner = previous_owner
+            claimed = _take_lease(job, worker_id, now)
+            db.commit()
+            if claimed:
+                return job
+        # Every candidate was taken by someone else or exhausted; look again.
+
+
+def claim_next_job(db: Session, worker_id: str, phase: str = "transcribe") -> Optional[Tuple[str, str, str]]:
+    """
+    Lease the oldest claimable job of ``phase`` for ``worker_id``.
+
+    Returns ``(job_id, url, lang)`` or None when the queue is empty.
+    """
+    states = PHASE_STATES[phase]
+    if db.bind.dialect.name == "postgresql":
+        job = _claim_postgres(db, worker_id, states)
+    else:
+        job = _claim_sqlite(db, worker_id, states)
+    if job is None:
+        return None
+    logger.info(f"[{job.id}] Claimed by {worker_id}")
+    return job.id, job.normalized_url or job.url, job.language
+
+
+def extend_lease(job_id: str, worker_id: str) -> bool:
+    """Push the lease forward. Returns False if another worker now owns the job."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        result = db.execute(
+            update(TranscriptionJob)
+            .where(TranscriptionJob.id == job_id)
+            .where(TranscriptionJob.lease_owner == worker_id)
+            .values(
+                lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                heartbeat_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
+
+
+def release_lease(job_id: str, worker_id: str, phase: str = "transcribe"):
+    """
+    Give the job back once the handler has returned. A job that left
+    ``phase`` (terminal, or handed to the next phase) loses its lease and the
+    next phase starts with a fresh retry budget. A job still in ``phase``
+    keeps our name on an expiring lease, so the next claim counts as a retry
+    and JOB_MAX_RETRIES applies.
+    """
+    db = SessionLocal()
+    try:
+        owned = and_(TranscriptionJob.id == job_id, TranscriptionJob.lease_owner == worker_id)
+        released = db.execute(
+            update(TranscriptionJob)
+            .where(owned)
+            .where(TranscriptionJob.state.notin_(PHASE_STATES[phase]))
+            .values(lease_owner=None, lease_expires_at=None, retry_count=case(
+                (TranscriptionJob.state.in_(TERMINAL_STATES), TranscriptionJob.retry_count), else_=0))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if released:
+            notify()
+        else:
+            db.execute(
+                update(TranscriptionJob)
+                .where(owned)
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=JOB_RETRY_DELAY_SECONDS))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+class LeaseHeartbeat:
+    """
+    Context manager that extends a job lease every JOB_HEARTBEAT_SECONDS.
+
+    It is also the handler's view of the lease: ``lost`` is set once another
+    worker owns the job, ``check()`` raises LeaseLost from then on, and
+    ``guard(session)`` fences every commit on that session.
+    """
+
+    def __init__(self, job_id: str, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"heartbeat-{job_id}", daemon=True
+        )
+
+    def _run(self):
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                if not extend_lease(self.job_id, self.worker_id):
+                    self._mark_lost()
+                    return
+            except Exception as e:
+                logger.warning(f"[{self.job_id}] Heartbeat failed: {e}")
+
+    def _mark_lost(self):
+        if not self.lost.is_set():
+            logger.warning(f"[{self.job_id}] Lease lost by {self.worker_id}")
+        self.lost.set()
+
+    def check(self):
+        if self.lost.is_set():
+            raise LeaseLost(f"{self.job_id} is no longer leased by {self.worker_id}")
+
+    def guard(self, session: Session):
+        """Renew the lease inside every transaction ``session`` commits; raise LeaseLost if it is gone."""
+        event.listen(session, "before_commit", self._fence)
+
+    def _fence(self, session: Session):
+        self.check()
+        now = datetime.utcnow()
+        renewed = session.execute(
+            update(TranscriptionJob)
+            .where(TranscriptionJob.id == self.job_id)
+            .where(TranscriptionJob.lease_owner == self.worker_id)
+            .values(lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS), heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if renewed != 1:
+            self._mark_lost()
+            self.check()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        return False
+
+
+def run_worker_loop(handler: JobHandler, worker_id: str, stop: threading.Event, phase: str = "transcribe"):
+    """Claim and run ``phase`` jobs until ``stop`` is set."""
+    logger.info(f"Job worker {worker_id} started")
+    while not stop.is_set():
+        claimed = None
+        db = SessionLocal()
+        try:
+            claimed = claim_next_job(db, worker_id, phase)
+        except Exception as e:
+            logger.error(f"Job worker {worker_id} claim failed: {e}")
+        finally:
+            db.close()
+
+        if claimed is None:
+            _wakeup.wait(JOB_POLL_INTERVAL_SECONDS)
+            _wakeup.clear()
+            continue
+
+        job_id, url, lang = claimed
+        try:
+            with LeaseHeartbeat(job_id, worker_id) as lease:
+                handler(job_id, url, lang, lease)
+        except LeaseLost as e:
+            logger.warning(f"[{job_id}] Stopped in {worker_id}: {e}")
+        except Exception as e:
+            # The handler records its own failures; this only guards the loop.
+            logger.error(f"[{job_id}] Job handler crashed in {worker_id}: {e}")
+        finally:
+            try:
+                release_lease(job_id, worker_id, phase)
+            except Exception as e:
+                logger.warning(f"[{job_id}] Failed to release lease: {e}")
+    logger.info(f"Job worker {worker_id} stopped")
+
+
+def start_workers(handler: JobHandler, concurrency: int,
+                  stop: threading.Event, phase: str = "transcribe") -> List[threading.Thread]:
+    """Start ``concurrency`` daemon ``phase`` worker threads sharing ``stop``."""
+    threads = []
+    for i in range(concurrency):
+        suffix = str(i) if phase == "transcribe" else f"{phase}-{i}"
+        thread = threading.Thread(
+            target=run_worker_loop,
+            args=(handler, make_worker_id(suffix), stop, phase),
+            name=f"job-worker-{suffix}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def stop_workers(threads: List[threading.Thread], stop: threading.Event, timeout: float = 5):
+    stop.set()
+    notify()
+    for thread in threads:
+        thread.join(timeout=timeout)
@@ -0,0 +1,95 @@
+"""
+lang_id.py — lang="auto": spoken-language identification.
+
+Instead of forcing the language the user picked, Whisper's language-ID head
+runs once on the first LANG_ID_WINDOW_SECONDS of VAD-detected speech (a
+single encoder pass plus one decoder step, not a transcription). The decision
+is cached per audio hash, so retries, re-submissions and the same clip
+arriving from another URL skip it.
+
+After transcription the choice is confirmed post hoc: one compiled
+alternation over every ``lang_keywords`` phrase scans the transcript, and a
+clear keyword majority for another app language (e.g. Pidgin under a Whisper
+"en" decision) is reported as the app-level language.
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from cache_utils import LRUCache
+from transcript_cache import make_key
+from vad import SAMPLE_RATE
+
+AUTO_LANG = "auto"
+LANG_ID_WINDOW_SECONDS = float(os.environ.get("LANG_ID_WINDOW_SECONDS", "30"))
+LANG_ID_CACHE_ITEMS = int(os.environ.get("LANG_ID_CACHE_ITEMS", "10000"))
+LANG_ID_CACHE_SECONDS = int(os.environ.get("LANG_ID_CACHE_SECONDS", str(7 * 24 * 3600)))
+# Keyword hits (distinct phrases) another language needs to override the detected one.
+LANG_ID_MIN_KEYWORD_HITS = int(os.environ.get("LANG_ID_MIN_KEYWORD_HITS", "3"))
+
+detection_cache = LRUCache(LANG_ID_CACHE_ITEMS * 256, sizeof=lambda _: 256,
+                           max_items=LANG_ID_CACHE_ITEMS, ttl_seconds=LANG_ID_CACHE_SECONDS)
+
+
+def speech_window(speech_audio: np.ndarray, seconds: float = LANG_ID_WINDOW_SECONDS) -> np.ndarray:
+    """The first ``seconds`` of VAD-compacted speech (``vad.speech_only`` output)."""
+    return speech_audio[:int(seconds * SAMPLE_RATE)]
+
+
+def detection_key(audio: np.ndarray, model_key: str) -> str:
+    return make_key(audio, AUTO_LANG, model_key, {"lang_id_window": LANG_ID_WINDOW_SECONDS})
+
+
+class KeywordMatcher:
+    """One compiled regex over every language's keywords; counts distinct hits per language."""
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        self._languages: Dict[str, List[str]] = {}
+        for language, phrases in keywords.items():
+            for phrase in phrases:
+                self._languages.setdefault(phrase.lower(), []).append(language)
+        alternation = "|".join(re.escape(p) for p in sorted(self._languages, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+    def hits(self, text: str) -> Dict[str, int]:
+        found = {match.lower() for match in self._pattern.findall(text or "")}
+        counts: Dict[str, int] = {}
+        for phrase in found:
+            for language in self._languages[phrase]:
+                counts[language] = counts.get(language, 0) + 1
+        return dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def confirm(detection: Dict[str, Any], text: str, matcher: KeywordMatcher,
+            app_language_for: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Add the keyword check to a detection: ``language`` becomes the app-level
+    language (the keyword winner when it clearly beats the detected one) and
+    ``confirmed`` says whether the keywords agreed with Whisper.
+    """
+    hits = matcher.hits(text)
+    detected = app_language_for.get(detection["whisper_language"], detection["whisper_language"])
+    language, confirmed = detected, None
+    if hits:
+        leader, leader_hits = next(iter(hits.items()))
+        confirmed = leader == detected or hits.get(detected, 0) == leader_hits
+        if not confirmed and leader_hits >= LANG_ID_MIN_KEYWORD_HITS:
+            language = leader
+    return {**detection, "language": language, "confirmed": confirmed, "keyword_hits": hits}
+
+
+def lookup(audio: np.ndarray, model_key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """(cache key, cached detection or None) for the full decoded PCM."""
+    key = detection_key(audio, model_key)
+    return key, detection_cache.get(key)
+
+
+def from_probabilities(probabilities: Dict[str, float]) -> Optional[Dict[str, Any]]:
+    if not probabilities:
+        return None
+    code, probability = max(probabilities.items(), key=lambda kv: kv[1])
+    return {"whisper_language": code, "probability": round(probability, 4),
+            "candidates": {c: round(p, 4) for c, p in probabilities.items()}}
@@ -0,0 +1,187 @@
+"""
+live.py — rolling-window state for /ws/live dictation.
+
+The client streams audio frames; ``LiveSession`` keeps only the audio that
+has not been finalized yet. Each decode pass transcribes that tail. Segments
+that end comfortably before the end of the buffer (LIVE_STABLE_MARGIN_SECONDS)
+won't change when more audio arrives, so they are finalized and trimmed from
+the buffer. The last segment, and anything near the buffer edge, is sent as
+a partial that the next pass may revise. Only the unstable tail is ever
+re-decoded, so the cost per pass stays bounded by LIVE_MAX_BUFFER_SECONDS.
+
+``PcmDecoder`` turns client frames into 16 kHz mono float32: raw PCM is
+converted in-process, while WebM/Ogg Opus (what browsers' MediaRecorder
+produces) goes through one long-lived ffmpeg process per connection.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vad import detect_speech
+
+SAMPLE_RATE = 16000
+
+# Re-decode once this much new audio has arrived.
+LIVE_STEP_SECONDS = float(os.environ.get("LIVE_STEP_SECONDS", "0.5"))
+# Segments ending this close to the buffer edge stay partial.
+LIVE_STABLE_MARGIN_SECONDS = float(os.environ.get("LIVE_STABLE_MARGIN_SECONDS", "1.5"))
+# Past this, everything but the last segment is finalized regardless (one Whisper window).
+LIVE_MAX_BUFFER_SECONDS = float(os.environ.get("LIVE_MAX_BUFFER_SECONDS", "25"))
+
+PCM_ENCODINGS = {"pcm_s16le": np.int16, "pcm_f32le": np.float32}
+CONTAINER_ENCODINGS = {"webm_opus": "webm", "ogg_opus": "ogg"}
+SUPPORTED_ENCODINGS = tuple(PCM_ENCODINGS) + tuple(CONTAINER_ENCODINGS)
+
+
+class LiveSession:
+    def __init__(self, stable_margin: float = LIVE_STABLE_MARGIN_SECONDS,
+                 max_buffer_seconds: float = LIVE_MAX_BUFFER_SECONDS):
+        self.stable_margin = stable_margin
+        self.max_buffer_seconds = max_buffer_seconds
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0          # absolute time of buffer[0], seconds
+        self.committed_text = ""
+        self._decoded_samples = 0        # buffer length at the last decode
+
+    def append(self, pcm: np.ndarray):
+        self.buffer = np.concatenate([self.buffer, pcm])
+
+    def pending_seconds(self) -> float:
+        return (len(self.buffer) - self._decoded_samples) / SAMPLE_RATE
+
+    def snapshot(self) -> Tuple[np.ndarray, int]:
+        """Audio to decode now and its length in samples (pass back to ``apply``)."""
+        self._decoded_samples = len(self.buffer)
+        return self.buffer.copy(), len(self.buffer)
+
+    def prompt(self) -> Optional[str]:
+        """Recent finalized text, fed to Whisper as context for the next pass."""
+        return self.committed_text[-200:] or None
+
+    def has_speech(self, audio: np.ndarray) -> bool:
+        return bool(detect_speech(audio))
+
+    def _trim(self, seconds: float):
+        cut = min(len(self.buffer), int(seconds * SAMPLE_RATE))
+        self.buffer = self.buffer[cut:]
+        self.buffer_start += cut / SAMPLE_RATE
+        self._decoded_samples = max(0, self._decoded_samples - cut)
+
+    def skip_silence(self, snapshot_len: int):
+        """No speech in the snapshot: drop it but keep a margin for a word just starting."""
+        self._trim(max(0.0, snapshot_len / SAMPLE_RATE - self.stable_margin))
+
+    def apply(self, result: Dict[str, Any], snapshot_len: int,
+              final: bool = False) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Split a decode of the snapshot into finalized segments and one partial.
+
+        With ``final=True`` (client stopped) everything is finalized.
+        """
+        segments = [seg for seg in result.get("segments", []) if seg["text"].strip()]
+        duration = snapshot_len / SAMPLE_RATE
+
+        if final:
+            stable = segments
+        else:
+            stable_until = duration - self.stable_margin
+            stable = [seg for seg in segments[:-1] if seg["end"] <= stable_until]
+            if not stable and duration >= self.max_buffer_seconds and len(segments) > 1:
+                stable = segments[:-1]
+
+        finals = [
+            {"start": round(self.buffer_start + seg["start"], 3),
+             "end": round(self.buffer_start + seg["end"], 3),
+             "text": seg["text"].strip()}
+            for seg in stable
+        ]
+        rest = segments[len(stable):]
+        partial = None
+        if rest:
+            partial = {
+                "start": round(self.buffer_start + rest[0]["start"], 3),
+                "end": round(self.buffer_start + rest[-1]["end"], 3),
+                "text": "".join(seg["text"] for seg in rest).strip(),
+            }
+
+        if stable:
+            self.committed_text += "".join(seg["text"] for seg in stable)
+            self._trim(duration if final else stable[-1]["end"])
+        elif duration >= self.max_buffer_seconds:
+            # One long unbroken segment: keep the newest window so the buffer can't grow forever.
+            self._trim(duration - self.max_buffer_seconds / 2)
+        return finals, partial
+
+
+class PcmDecoder:
+    """Convert client frames to 16 kHz mono float32 for one connection."""
+
+    def __init__(self, encoding: str, sample_rate: int = SAMPLE_RATE):
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported encoding. Must be one of: {', '.join(SUPPORTED_ENCODINGS)}")
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._carry = b""
+
+    async def start(self):
+        if self.encoding in CONTAINER_ENCODINGS:
+            self._proc = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-nostdin", "-loglevel", "error",
+                "-f", CONTAINER_ENCODINGS[self.encoding], "-i", "pipe:0",
+                "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+
+    def _from_pcm(self, data: bytes) -> np.ndarray:
+        dtype = PCM_ENCODINGS[self.encoding]
+        width = np.dtype(dtype).itemsize
+        data = self._carry + data
+        usable = len(data) - len(data) % width
+        self._carry = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=dtype)
+        audio = samples.astype(np.float32) / 32768.0 if dtype == np.int16 else samples.astype(np.float32)
+        if self.sample_rate != SAMPLE_RATE and len(audio):
+            n_out = int(len(audio) * SAMPLE_RATE / self.sample_rate)
+            audio = np.interp(
+                np.linspace(0, len(audio) - 1, n_out), np.arange(len(audio)), audio
+            ).astype(np.float32)
+        return audio
+
+    async def feed(self, data: bytes):
+        """Queue raw client bytes. PCM is returned directly; containers go to ffmpeg."""
+        if self._proc is None:
+            return self._from_pcm(data)
+        self._proc.stdin.write(data)
+        await self._proc.stdin.drain()
+        return None
+
+    async def read_decoded(self) -> Optional[np.ndarray]:
+        """For container encodings: next chunk of decoded PCM, or None at EOF."""
+        chunk = await self._proc.stdout.read(SAMPLE_RATE * 4 // 10)  # ~100 ms
+        if not chunk:
+            return None
+        data = self._carry + chunk
+        usable = len(data) - len(data) % 4
+        self._carry = data[usable:]
+        return np.frombuffer(data[:usable], dtype=np.float32).copy()
+
+    @property
+    def needs_reader(self) -> bool:
+        return self._proc is not None
+
+    async def close_input(self):
+        if self._proc is not None and self._proc.stdin and not self._proc.stdin.is_closing():
+            self._proc.stdin.close()
+
+    async def close(self):
+        if self._proc is not None:
+            await self.close_input()
+            if self._proc.returncode is None:
+                self._proc.kill()
+            await self._proc.wait()
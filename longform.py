@@ -0,0 +1,135 @@
+"""
+longform.py — silence-aligned chunking and stitching for long media.
+
+Long recordings are split near low-energy frames so no chunk boundary cuts a
+word, each chunk is transcribed independently (in parallel across the
+inference pool, see ``inference.transcribe_longform_blocking``), and the
+segments are stitched back with the chunk offset added to their timestamps.
+Whisper sometimes repeats the last words of one chunk at the start of the
+next; ``stitch_segments`` drops that overlap.
+
+Everything here is pure NumPy on 16 kHz mono float32 PCM.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+
+# Media at least this long is transcribed in chunks.
+LONGFORM_MIN_SECONDS = int(os.environ.get("LONGFORM_MIN_SECONDS", "600"))
+# Target chunk length; the real boundary moves to the quietest frame nearby.
+LONGFORM_CHUNK_SECONDS = int(os.environ.get("LONGFORM_CHUNK_SECONDS", "90"))
+# How far (each way) from the target boundary to look for silence.
+LONGFORM_SEARCH_SECONDS = int(os.environ.get("LONGFORM_SEARCH_SECONDS", "10"))
+
+_WORD_RE = re.compile(r"[\w']+", re.UNICODE)
+
+
+def frame_energy(audio: np.ndarray, frame: int) -> np.ndarray:
+    """Mean-square energy per non-overlapping frame of ``frame`` samples."""
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    return np.einsum("ij,ij->i", frames, frames) / frame
+
+
+def split_on_silence(audio: np.ndarray, chunk_seconds: float = LONGFORM_CHUNK_SECONDS,
+                     search_seconds: float = LONGFORM_SEARCH_SECONDS,
+                     sr: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    Return ``[(start_sample, end_sample), ...]`` covering ``audio``.
+
+    Each boundary sits at the lowest-energy frame (lightly smoothed) within
+    ``search_seconds`` of a multiple of ``chunk_seconds``.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * sr)
+    if total <= chunk + int(search_seconds * sr):
+        return [(0, total)]
+
+    frame = int(FRAME_SECONDS * sr)
+    energy = frame_energy(audio, frame)
+    # Five-frame moving average so a single click doesn't look like speech
+    energy = np.convolve(energy, np.ones(5, dtype=np.float32) / 5, mode="same")
+
+    chunk_frames = chunk // frame
+    search_frames = int(search_seconds * sr) // frame
+    boundaries = [0]
+    target = chunk_frames
+    while target + search_frames < len(energy):
+        lo = max(boundaries[-1] // frame + search_frames, target - search_frames)
+        hi = min(len(energy), target + search_frames + 1)
+        cut_frame = lo + int(np.argmin(energy[lo:hi]))
+        boundaries.append(cut_frame * frame + frame // 2)
+        target = cut_frame + chunk_frames
+    boundaries.append(total)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD_RE.findall(text)]
+
+
+def _drop_repeated_prefix(previous_text: str, text: str, max_words: int = 8) -> str:
+    """Remove words at the start of ``text`` that repeat the end of ``previous_text``."""
+    prev_words = _words(previous_text)[-max_words:]
+    tokens = text.split()
+    cur_words = [_words(tok) for tok in tokens]
+    flat = [w for ws in cur_words for w in ws]
+    for k in range(min(len(prev_words), len(flat)), 0, -1):
+        if prev_words[-k:] == flat[:k]:
+            # Walk whitespace tokens until k words are consumed
+            consumed, cut = 0, 0
+            while cut < len(tokens) and consumed < k:
+                consumed += len(cur_words[cut])
+                cut += 1
+            remainder = " ".join(tokens[cut:])
+            return (" " + remainder) if remainder else ""
+    return text
+
+
+def offset_chunk_segments(result: Dict[str, Any], offset: float,
+                          previous_text: str = "") -> List[Dict[str, Any]]:
+    """
+    Shift one chunk's segments by ``offset`` seconds, dropping words at its
+    start that repeat the end of ``previous_text`` (the prior chunk's last
+    segment).
+    """
+    segments: List[Dict[str, Any]] = []
+    for i, seg in enumerate(result.get("segments", [])):
+        text = seg["text"]
+        if i == 0 and previous_text:
+            text = _drop_repeated_prefix(previous_text, text)
+        if not text.strip():
+            continue
+        segments.append({
+            "start": round(seg["start"] + offset, 3),
+            "end": round(seg["end"] + offset, 3),
+            "text": text,
+        })
+    return segments
+
+
+def stitch_segments(chunk_results: List[Dict[str, Any]],
+                    offsets_seconds: List[float]) -> Dict[str, Any]:
+    """Merge per-chunk Whisper results into one result with absolute timestamps."""
+    segments: List[Dict[str, Any]] = []
+    language = None
+    for result, offset in zip(chunk_results, offsets_seconds):
+        if language is None and result.get("segments"):
+            language = result.get("language")
+        previous_text = segments[-1]["text"] if segments else ""
+        segments.extend(offset_chunk_segments(result, offset, previous_text))
+    if language is None and chunk_results:
+        language = chunk_results[0].get("language")
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "language": language,
+        "segments": segments,
+    }
@@ -1,33 +1,55 @@
-from fastapi import FastAPI, HTTPException, Request, Depends, BackgroundTasks, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Request, Depends, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
-import whisper
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import yt_dlp
 import tempfile
 import os
 import re
 import uuid
+import hashlib
 import logging
 import shutil
-import subprocess
 import errno
 import requests
 from pydantic import BaseModel, validator
 from typing import Optional, Dict, Any, List
-# MT5Tokenizer was removed in transformers 5.x — use AutoTokenizer as the drop-in replacement.
-from transformers import MT5ForConditionalGeneration, AutoTokenizer, MarianMTModel, MarianTokenizer
-import torch
+# transformers (and torch with it) is imported where it's used: importing it here
+# cost seconds and hundreds of MB before /health could answer (see test_startup.py).
 import time
+import asyncio
+from collections import deque
 from datetime import datetime
 import json
-from sqlalchemy.orm import Session
-from urllib.parse import urlparse
+from sqlalchemy.orm import Session, defer
+from urllib.parse import urlparse, urlencode, parse_qsl, urlunparse
+from functools import lru_cache
+from datetime import timedelta
 from database import get_db, TranscriptionJob, InstagramCookie
-import pandas as pd
-import io
 from crypto_utils import encrypt_cookie, decrypt_cookie
-from pydub import AudioSegment
+from inference import (InferenceBackpressure, WARM_START, WARM_START_MODELS, pool as inference_pool, transcribe_async,
+                       transcribe_blocking, transcribe_longform_blocking, detect_language_async,
+                       detect_language_blocking)
+from longform import LONGFORM_MIN_SECONDS, SAMPLE_RATE, offset_chunk_segments, split_on_silence
+from vad import remap_result, speech_only
+from media import MediaInfo, inspect_media
+from pcm_stream import DISKLESS_ENABLED, DisklessUnavailable, decode_url, ydl_source
+from live import LIVE_STEP_SECONDS, LiveSession, PcmDecoder
+from transcript_cache import cache as transcript_cache, make_key as transcript_cache_key
+from translation_cache import cache as translation_cache
+from cache_utils import LRUCache
+import job_queue
+import exporters
+from bulk_export import BULK_EXPORT_FILE_TYPES, export_record, iter_bulk_files, iter_bulk_jobs, iter_bulk_ndjson
+import lang_id
+import mt_enhance
+import renditions
+import training_pairs
+import transcript_segments
+from lang_id import AUTO_LANG
+from model_registry import ALLOWED_MODELS, ModelSpec, is_allowed as is_allowed_model
+import threading
 
 logging.basicConfig(
     level=logging.INFO,
@@ -109,26 +131,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Use lazy loading for models to speed up startup
-model = None
+# Job-queue workers running inside the API process. Set EMBEDDED_JOB_WORKERS=0
+# when dedicated `python worker.py` processes drain the queue instead.
+EMBEDDED_JOB_WORKERS = int(os.environ.get("EMBEDDED_JOB_WORKERS", "1"))
+_job_worker_stop = threading.Event()
+_job_worker_threads: List[threading.Thread] = []
+
+# Readiness for /ready. Without WARM_START the instance is ready immediately
+# (models load on first use); with it, only after the warm-up thread finishes.
+_readiness: Dict[str, Any] = {"ready": not WARM_START, "state": "cold" if WARM_START else "lazy",
+                              "error": None, "warm_seconds": None}
+
+
+def warm_start():
+    """Background thread: preload WARM_START_MODELS in every inference worker, then flip /ready."""
+    started = time.time()
+    _readiness["state"] = "warming"
+    logger.info(f"Warm start: loading {', '.join(WARM_START_MODELS)} in {inference_pool.workers} worker(s)...")
+    try:
+        inference_pool.warm_up(WARM_START_MODELS)
+    except Exception as e:
+        _readiness.update(state="failed", error=f"{type(e).__name__}: {e}")
+        logger.error(f"❌ Warm start failed: {type(e).__name__}: {e}")
+        return
+    _readiness.update(ready=True, state="warm", warm_seconds=round(time.time() - started, 2))
+    logger.info(f"✅ Warm start complete in {_readiness['warm_seconds']}s — instance ready")
+
+# Use lazy loading for models to speed up startup.
+# Whisper itself lives in the inference pool workers (see inference.py).
 lang_models = {}
 mt5_model = None
 mt5_tokenizer = None
 
-def get_whisper_model():
-    """Lazy load Whisper model on first use"""
-    global model
-    if model is None:
-        logger.info("Loading Whisper base model for better accent recognition...")
-        model = whisper.load_model("base")
-        logger.info("Whisper base model loaded successfully")
-    return model
-
 def get_lang_models():
     """Lazy load MT5 models on first use"""
     global lang_models, mt5_model, mt5_tokenizer
     if not lang_models:
         try:
+            # MT5Tokenizer was removed in transformers 5.x — use AutoTokenizer as the drop-in replacement.
+            from transformers import MT5ForConditionalGeneration, AutoTokenizer
+
             logger.info("Loading mT5-small for African languages...")
             mt5_model = MT5ForConditionalGeneration.from_pretrained("google/mt5-small")
             mt5_tokenizer = AutoTokenizer.from_pretrained("google/mt5-small")
@@ -167,9 +209,31 @@ async def startup_event():
     stale = cleanup_stale_parts()
     if stale:
         logger.info(f"Startup cleanup: removed {stale} stale partial download(s)")
-    logger.info("Models will be loaded on first use (lazy loading)")
+    threading.Thread(target=training_pairs.backfill, name="training-backfill", daemon=True).start()
+    if WARM_START:
+        threading.Thread(target=warm_start, name="warm-start", daemon=True).start()
+    else:
+        logger.info("Models will be loaded on first use (lazy loading)")
+    if EMBEDDED_JOB_WORKERS > 0:
+        _job_worker_threads.extend(
+            job_queue.start_workers(process_transcription_background, EMBEDDED_JOB_WORKERS, _job_worker_stop)
+        )
+        logger.info(f"Started {EMBEDDED_JOB_WORKERS} embedded job worker(s)")
+        if mt_enhance.MT_ENHANCE_ENABLED and mt_enhance.MT_ENHANCE_WORKERS > 0:
+            _job_worker_threads.extend(job_queue.start_workers(
+                enhance_job_background, mt_enhance.MT_ENHANCE_WORKERS, _job_worker_stop, phase="enhance"
+            ))
+            logger.info(f"Started {mt_enhance.MT_ENHANCE_WORKERS} embedded MT enhance worker(s)")
+    else:
+        logger.info("Embedded job workers disabled — run worker.py to drain the queue")
     logger.info("Ready to accept requests on 0.0.0.0:8080")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop job and inference workers so they don't outlive the API process."""
+    job_queue.stop_workers(_job_worker_threads, _job_worker_stop)
+    inference_pool.shutdown()
+
 # Health check endpoint for Fly.io
 @app.get("/health")
 async def health_check():
@@ -180,6 +244,24 @@ async def health_check():
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
 
+@app.get("/live")
+async def liveness():
+    """Liveness: the process is up and serving the event loop."""
+    return {"status": "alive", "version": VERSION, "timestamp": datetime.utcnow().isoformat() + "Z"}
+
+@app.get("/ready")
+async def readiness():
+    """Readiness: 200 once models are warm (WARM_START=1) or immediately in lazy mode; 503 before."""
+    body = {
+        "status": "ready" if _readiness["ready"] else "not_ready",
+        "state": _readiness["state"],
+        "warm_seconds": _readiness["warm_seconds"],
+        "error": _readiness["error"],
+        "version": VERSION,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+    return JSONResponse(body, status_code=200 if _readiness["ready"] else 503)
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -189,7 +271,11 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "live": "/live",
+            "ready": "/ready",
             "transcribe": "/transcribe",
+            "transcribe_stream": "/transcribe/stream",
+            "live_dictation": "/ws/live",
             "jobs": "/jobs"
         }
     }
@@ -220,9 +306,18 @@ whisper_lang_map = {
     "french": "fr",
     "portuguese": "pt",
     "ewe": "ee",
-    "dagbani": "en"
+    "dagbani": "en",
+    "auto": AUTO_LANG,  # detected per clip, see lang_id.py
 }
 
+# lang="auto": Whisper code -> app language (first listed wins, so "en" -> "en"), and
+# one compiled matcher over lang_keywords for the post-hoc check.
+app_language_for_whisper: Dict[str, str] = {}
+for _app_lang, _whisper_code in whisper_lang_map.items():
+    if _whisper_code != AUTO_LANG:
+        app_language_for_whisper.setdefault(_whisper_code, _app_lang)
+lang_keyword_matcher = lang_id.KeywordMatcher(lang_keywords)
+
 # ── Transcript Cleaning ──────────────────────────────────────────────────────
 
 def clean_transcript(full_text: str, language: str = "en") -> Optional[str]:
@@ -307,11 +402,12 @@ class TranscribeRequest(BaseModel):
     url: Optional[str] = None
     file_path: Optional[str] = None
     lang: str = "en"
+    model: Optional[str] = None  # e.g. "tiny" for previews, "small" or "small:int8" for premium; default from config
     
     @validator('lang')
     def validate_lang(cls, v):
         valid_langs = ["en", "pidgin", "twi", "igbo", "yoruba", "hausa", 
-                       "swahili", "amharic", "french", "portuguese", "ewe", "dagbani"]
+                       "swahili", "amharic", "french", "portuguese", "ewe", "dagbani", "auto"]
         if v not in valid_langs:
             raise ValueError(f"Invalid language. Must be one of: {', '.join(valid_langs)}")
         return v
@@ -320,6 +416,12 @@ class TranscribeRequest(BaseModel):
     def validate_url(cls, v):
         return v.strip() if isinstance(v, str) else v
 
+    @validator('model')
+    def validate_model(cls, v):
+        if not is_allowed_model(v):
+            raise ValueError(f"Invalid model. Must be one of: {', '.join(ALLOWED_MODELS)}")
+        return v
+
 class InstagramCookieRequest(BaseModel):
     session_id: str
     notes: Optional[str] = None
@@ -387,7 +489,8 @@ async def health_check():
     return JSONResponse({
         "status": "healthy",
         "version": VERSION,
-        "whisper_model": "base",
+        "whisper_model": inference_pool.model_name,
+        "inference": inference_pool.stats(),
         "mt_available": len(lang_models) > 0,
         "supported_languages": len(lang_models) + 1,
         "timestamp": datetime.utcnow().isoformat()
@@ -400,7 +503,8 @@ async def api_info():
         "version": VERSION,
         "description": "Sovereign audio transcription with multilingual enhancement",
         "features": {
-            "whisper_model": "base",
+            "whisper_model": inference_pool.model_name,
+            "whisper_models_allowed": list(ALLOWED_MODELS),
             "mt_models": list(lang_models.keys()) if lang_models else [],
             "supported_platforms": ["TikTok", "Instagram", "YouTube", "Local Files"],
             "output_format": "JSON with timestamped segments"
@@ -408,6 +512,19 @@ async def api_info():
         "sovereignty": "100% local processing - no cloud APIs"
     })
 
+@app.get("/stats")
+async def runtime_stats():
+    """Cache and executor counters for capacity planning"""
+    return JSONResponse({
+        "inference": inference_pool.stats(),
+        "transcript_cache": transcript_cache.stats(),
+        "ydl_info_cache": ydl_info_cache.stats(),
+        "lang_id_cache": lang_id.detection_cache.stats(),
+        "translation_cache": translation_cache.stats(),
+        "renditions": renditions.cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
 @app.post("/instagram/cookie")
 async def add_instagram_cookie(request: InstagramCookieRequest, db: Session = Depends(get_db)):
     """Add Instagram session cookie for reliable downloads"""
@@ -470,8 +587,8 @@ async def delete_instagram_cookie(db: Session = Depends(get_db)):
 # Instagram fallback downloaders
 # ---------------------------------------------------------------------------
 
-def try_cobalt_download(url: str) -> Optional[str]:
-    """Layer 1 fallback: cobalt.tools API"""
+def resolve_cobalt_media_url(url: str) -> Optional[str]:
+    """Layer 1 fallback: ask the cobalt.tools API for a direct media URL"""
     try:
         resp = requests.post(
             "https://api.cobalt.tools/",
@@ -488,28 +605,21 @@ def try_cobalt_download(url: str) -> Optional[str]:
             logger.warning(f"cobalt.tools unexpected status: {data.get('status')}")
             return None
 
-        media_url = data.get("url")
-        if not media_url:
-            return None
-
-        media_resp = requests.get(media_url, timeout=120, stream=True)
-        if media_resp.status_code != 200:
-            return None
-
-        temp_path = os.path.join(tempfile.gettempdir(), f"cobalt_{uuid.uuid4().hex}.mp4")
-        with open(temp_path, "wb") as f:
-            for chunk in media_resp.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        logger.info(f"cobalt.tools download succeeded: {temp_path}")
-        return temp_path
+        return data.get("url") or None
     except Exception as e:
         logger.warning(f"cobalt.tools failed: {e}")
         return None
 
 
-def try_embed_download(url: str) -> Optional[str]:
-    """Layer 2 fallback: Instagram embed scrape"""
+INSTAGRAM_EMBED_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def resolve_embed_media_url(url: str) -> Optional[str]:
+    """Layer 2 fallback: scrape the video URL from the Instagram embed page"""
     try:
         match = re.search(r'instagram\.com/(?:reel|p|tv)/([A-Za-z0-9_-]+)', url)
         if not match:
@@ -517,13 +627,7 @@ def try_embed_download(url: str) -> Optional[str]:
 
         post_id = match.group(1)
         embed_url = f"https://www.instagram.com/p/{post_id}/embed/"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15",
-            "Accept": "text/html,application/xhtml+xml",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-
-        resp = requests.get(embed_url, headers=headers, timeout=15)
+        resp = requests.get(embed_url, headers=INSTAGRAM_EMBED_HEADERS, timeout=15)
         if resp.status_code != 200:
             return None
 
@@ -537,23 +641,73 @@ def try_embed_download(url: str) -> Optional[str]:
             logger.warning("Embed method: no video URL found in embed HTML")
             return None
 
-        video_url = video_match.group(1).replace("\\/", "/")
-        media_resp = requests.get(video_url, headers=headers, timeout=60, stream=True)
+        return video_match.group(1).replace("\\/", "/")
+    except Exception as e:
+        logger.warning(f"Embed method failed: {e}")
+        return None
+
+
+def download_media_to_temp(media_url: str, prefix: str, headers: Optional[dict] = None,
+                           timeout: int = 120) -> Optional[str]:
+    """Stream a direct media URL into a temp file; returns its path or None."""
+    try:
+        media_resp = requests.get(media_url, headers=headers, timeout=timeout, stream=True)
         if media_resp.status_code != 200:
             return None
 
-        temp_path = os.path.join(tempfile.gettempdir(), f"embed_{uuid.uuid4().hex}.mp4")
+        temp_path = os.path.join(tempfile.gettempdir(), f"{prefix}_{uuid.uuid4().hex}.mp4")
         with open(temp_path, "wb") as f:
             for chunk in media_resp.iter_content(chunk_size=8192):
                 f.write(chunk)
-
-        logger.info(f"Embed method download succeeded: {temp_path}")
         return temp_path
     except Exception as e:
-        logger.warning(f"Embed method failed: {e}")
+        logger.warning(f"{prefix} download failed: {e}")
         return None
 
 
+def decode_media_diskless(media_url: str, headers: Optional[dict], log_prefix: str) -> Optional[MediaInfo]:
+    """
+    ``MediaInfo`` decoded straight from ``media_url`` when diskless mode
+    applies; None means the caller should download to a file instead.
+    """
+    if not DISKLESS_ENABLED:
+        return None
+    try:
+        return decode_url(media_url, headers)
+    except DisklessUnavailable as e:
+        logger.info(f"[{log_prefix}] Diskless decode unavailable ({str(e)[:200]}); using a file download")
+        return None
+
+
+def instagram_fallback_media(url: str, log_prefix: str, allow_disk: bool = True) -> tuple:
+    """
+    Instagram fallback chain: cobalt.tools, then the embed scrape.
+
+    Returns ``(media, None)`` when decoded diskless, ``(None, path)`` after a
+    file download, or ``(None, None)`` when every layer failed.
+    """
+    layers = (
+        ("cobalt.tools", "cobalt", resolve_cobalt_media_url, None),
+        ("embed", "embed", resolve_embed_media_url, INSTAGRAM_EMBED_HEADERS),
+    )
+    for label, prefix, resolve, headers in layers:
+        logger.info(f"[{log_prefix}] Trying {label} fallback...")
+        media_url = resolve(url)
+        if not media_url:
+            continue
+        media = decode_media_diskless(media_url, headers, log_prefix)
+        if media is not None:
+            logger.info(f"[{log_prefix}] {label} diskless decode succeeded")
+            return media, None
+        if not allow_disk:
+            continue
+        temp_path = download_media_to_temp(media_url, prefix, headers)
+        if temp_path:
+            logger.info(f"[{log_prefix}] {label} download succeeded: {temp_path}")
+            return None, temp_path
+    return None, None
+
+
 def instagram_friendly_error(error_str: str) -> str:
     """Return a user-friendly message for Instagram download failures."""
     if "not be comfortable" in error_str or "Log in for access" in error_str:
@@ -566,11 +720,48 @@ def instagram_friendly_error(error_str: str) -> str:
     )
 
 
+# Share/tracking query params that never change which media a link points to.
+TRACKING_QUERY_PARAMS = {"igsh", "igshid", "si", "feature", "is_from_webapp", "sender_device",
+                         "is_copy_url", "_r", "_t", "utm_source", "utm_medium", "utm_campaign",
+                         "utm_term", "utm_content"}
+
+
 def normalize_url(url: str) -> Optional[str]:
     if not url:
         return None
     normalized = url.strip()
-    return normalized or None
+    if not normalized:
+        return None
+    parsed = urlparse(normalized)
+    if not parsed.scheme or not parsed.netloc:
+        return normalized
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_QUERY_PARAMS]
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path,
+                       parsed.params, urlencode(query), ""))
+
+
+@lru_cache(maxsize=1)
+def _specific_extractors() -> tuple:
+    return tuple(ie for ie in yt_dlp.extractor.gen_extractor_classes() if ie.ie_key() != "Generic")
+
+
+@lru_cache(maxsize=4096)
+def canonical_media_key(url: str) -> str:
+    """
+    Offline canonical identity for a media URL: ``<extractor>:<id>`` when a
+    yt_dlp extractor recognises the URL, otherwise the normalized URL. Share
+    links that only resolve over the network (vm.tiktok.com) fall back to the
+    URL here and are upgraded to the real extractor id once a worker
+    downloads them.
+    """
+    for ie in _specific_extractors():
+        if ie.suitable(url):
+            media_id = ie.get_temp_id(url)
+            if media_id:
+                return f"{ie.ie_key().lower()}:{media_id}"
+            break
+    return url
 
 
 def is_valid_url(url: Optional[str]) -> bool:
@@ -627,8 +818,70 @@ def complete_job(job: TranscriptionJob, db: Session):
     job.transcription_id = job.id
     job.updated_at = now
     job.completed_at = now
+    transcript_segments.replace_for_job(db, job)
     db.commit()
     db.refresh(job)
+    # Transcript is immutable from here until /correct: render every export format once
+    store_renditions(export_record(job))
+
+
+# Hard ceiling for jobs and direct requests, checked from the container header before
+# any audio is decoded. Long media is chunked (see longform.py), so this only guards
+# against pathological inputs such as 24-hour livestream VODs.
+MAX_MEDIA_DURATION_SECONDS = int(os.environ.get("MAX_MEDIA_DURATION_SECONDS", str(3 * 3600)))
+
+# /transcribe_file uploads are copied to disk in chunks and capped at this size (413 beyond).
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def save_upload(src, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """Copy an upload's file object to ``dest_path`` in chunks; returns bytes written."""
+    written = 0
+    with open(dest_path, "wb") as dest:
+        while chunk := src.read(UPLOAD_CHUNK_BYTES):
+            written += len(chunk)
+            if written > max_bytes:
+                raise UploadTooLarge()
+            dest.write(chunk)
+    return written
+
+# Jobs still able to produce a result; new submissions of the same media attach to them.
+IN_FLIGHT_STATES = job_queue.LEASED_STATES
+# How long a completed job's stored result is served to new submissions (0 disables reuse).
+RESULT_REUSE_SECONDS = int(os.environ.get("RESULT_REUSE_SECONDS", str(24 * 3600)))
+
+
+def find_reusable_job(db: Session, media_key: str, lang: str, model_key: str) -> Optional[TranscriptionJob]:
+    """
+    Return an in-flight or freshly completed job for the same media, language and model.
+
+    A plain lookup with no lock or unique key behind it: it coalesces duplicate
+    submissions within one API instance (see ``submit_job``), not across instances.
+    """
+    same_model = TranscriptionJob.whisper_model == model_key
+    if model_key == ModelSpec.parse(None).key:
+        same_model = same_model | TranscriptionJob.whisper_model.is_(None)  # rows from before per-job models
+    same_media = db.query(TranscriptionJob).filter(
+        TranscriptionJob.media_key == media_key,
+        TranscriptionJob.language == lang,
+        same_model,
+    )
+    in_flight = same_media.filter(TranscriptionJob.state.in_(IN_FLIGHT_STATES)) \
+        .order_by(TranscriptionJob.created_at.desc()).first()
+    if in_flight:
+        return in_flight
+    if RESULT_REUSE_SECONDS <= 0:
+        return None
+    fresh_since = datetime.utcnow() - timedelta(seconds=RESULT_REUSE_SECONDS)
+    return same_media.filter(
+        TranscriptionJob.state == "completed",
+        TranscriptionJob.completed_at >= fresh_since,
+    ).order_by(TranscriptionJob.completed_at.desc()).first()
 
 
 def probe_failure_message(platform: str) -> str:
@@ -660,68 +913,26 @@ def platform_failure_message(url: str, failure_code: str, default_message: str)
     return default_message
 
 
-def probe_media_audio_stream(media_path: str, timeout_seconds: int = 12) -> Dict[str, Any]:
-    """Return whether ffprobe can see at least one audio stream in downloaded media."""
-    if not media_path or not os.path.exists(media_path):
-        return {"ok": False, "has_audio": False, "failure": "missing_file",
-                "message": "Media file is missing before audio validation."}
-
-    ffprobe_path = shutil.which("ffprobe")
-    if not ffprobe_path:
-        return {"ok": False, "has_audio": False, "failure": "ffprobe_missing",
-                "message": "ffprobe is not installed or not on PATH."}
-
-    command = [
-        ffprobe_path, "-v", "error",
-        "-select_streams", "a",
-        "-show_entries", "stream=codec_type,codec_name,duration",
-        "-of", "json",
-        media_path,
-    ]
-    try:
-        completed = subprocess.run(command, capture_output=True, text=True,
-                                   timeout=timeout_seconds, check=False)
-    except subprocess.TimeoutExpired:
-        return {"ok": False, "has_audio": False, "failure": "probe_timeout",
-                "message": "Audio validation timed out."}
-    except Exception as e:
-        return {"ok": False, "has_audio": False, "failure": "probe_error", "message": str(e)}
+def usable_audio_failure(media: MediaInfo) -> Optional[tuple]:
+    """``(failure_code, default_message)`` when inspection rules media out, else None."""
+    if media.ok and media.has_audio:
+        return None
+    if media.failure == "no_audio_stream":
+        return "no_usable_audio", "No usable audio found in this media."
+    return "unsupported_media", "This media could not be prepared for transcription."
 
-    if completed.returncode != 0:
-        return {"ok": False, "has_audio": False, "failure": "probe_failed",
-                "message": completed.stderr.strip() or "ffprobe could not inspect this media."}
 
-    try:
-        parsed = json.loads(completed.stdout or "{}")
-    except json.JSONDecodeError:
-        return {"ok": False, "has_audio": False, "failure": "invalid_probe_json",
-                "message": "ffprobe returned invalid JSON."}
-
-    streams = parsed.get("streams") or []
-    has_audio = any(s.get("codec_type") == "audio" for s in streams)
-    return {"ok": True, "has_audio": has_audio,
-            "failure": None if has_audio else "no_audio_stream", "streams": streams}
-
-
-def require_usable_audio_or_raise(media_path: str, source_url: str, request_id: str):
-    """Raise HTTPException if ffprobe finds no audio stream — blocks Whisper on silent media."""
-    probe = probe_media_audio_stream(media_path)
-    if probe.get("ok") and probe.get("has_audio"):
-        logger.info(f"[{request_id}] Audio probe passed")
+def require_usable_audio_or_raise(media: MediaInfo, source_url: Optional[str], request_id: str):
+    """Raise HTTPException if inspection found no usable audio — blocks Whisper on silent media."""
+    failure = usable_audio_failure(media)
+    if failure is None:
+        logger.info(f"[{request_id}] Audio probe passed ({media.codec}, {media.sample_rate} Hz, {media.duration or 0:.1f}s)")
         return
 
-    failure = probe.get("failure")
-    logger.warning(f"[{request_id}] Audio probe blocked Whisper: {failure}")
-
-    if failure == "no_audio_stream":
-        failure_code, status_code = "no_usable_audio", 400
-        default_message = "No usable audio found in this media."
-    else:
-        failure_code, status_code = "unsupported_media", 400
-        default_message = "This media could not be prepared for transcription."
-
+    failure_code, default_message = failure
+    logger.warning(f"[{request_id}] Audio probe blocked Whisper: {media.failure} {media.message or ''}")
     raise HTTPException(
-        status_code=status_code,
+        status_code=400,
         detail={
             "error": failure_code,
             "message": platform_failure_message(source_url, failure_code, default_message),
@@ -731,28 +942,40 @@ def require_usable_audio_or_raise(media_path: str, source_url: str, request_id:
 
 
 def job_has_usable_audio_or_fail(job: TranscriptionJob, db: Session,
-                                  media_path: str, source_url: str) -> bool:
-    """Return True if audio probe passes; mark job failed and return False otherwise."""
-    probe = probe_media_audio_stream(media_path)
-    if probe.get("ok") and probe.get("has_audio"):
-        logger.info(f"[{job.id}] Audio probe passed")
+                                  media: MediaInfo, source_url: str) -> bool:
+    """Return True if inspection found usable audio; mark job failed and return False otherwise."""
+    failure = usable_audio_failure(media)
+    if failure is None:
+        logger.info(f"[{job.id}] Audio probe passed ({media.codec}, {media.sample_rate} Hz, {media.duration or 0:.1f}s)")
         return True
 
-    failure = probe.get("failure")
-    logger.warning(f"[{job.id}] Audio probe blocked Whisper: {failure}")
-
-    if failure == "no_audio_stream":
-        failure_code = "no_usable_audio"
-        default_message = "No usable audio found in this media."
-    else:
-        failure_code = "unsupported_media"
-        default_message = "This media could not be prepared for transcription."
-
+    failure_code, default_message = failure
+    logger.warning(f"[{job.id}] Audio probe blocked Whisper: {media.failure} {media.message or ''}")
     fail_job(job, db, failure_code,
              platform_failure_message(source_url, failure_code, default_message))
     return False
 
 
+def duration_limit_message(duration: Optional[float]) -> Optional[str]:
+    """User-facing message when media exceeds MAX_MEDIA_DURATION_SECONDS, else None."""
+    if not duration or duration <= MAX_MEDIA_DURATION_SECONDS:
+        return None
+    return (f"Video too long ({int(duration) // 60} minutes). "
+            f"Maximum: {MAX_MEDIA_DURATION_SECONDS // 60} minutes.")
+
+
+def require_duration_within_limit_or_raise(media: MediaInfo, request_id: Optional[str]):
+    """Raise HTTPException (413) when media exceeds MAX_MEDIA_DURATION_SECONDS."""
+    too_long = duration_limit_message(media.duration)
+    if too_long is None:
+        return
+    logger.warning(f"[{request_id}] Media too long: {media.duration:.0f}s")
+    raise HTTPException(
+        status_code=413,
+        detail={"error": "media_too_long", "message": too_long, "request_id": request_id},
+    )
+
+
 def classify_download_error(url: str, error_str: str) -> tuple[str, str]:
     """
     Map a yt_dlp / download exception string to a stable (error_code, user_message) pair.
@@ -810,6 +1033,303 @@ def download_failure_message(url: str, error_str: str) -> str:
     return message
 
 
+def inference_backpressure_error(exc: InferenceBackpressure, request_id: Optional[str] = None) -> HTTPException:
+    """Map an inference-pool refusal to 429 (queue full) or 503 (pool down) with Retry-After."""
+    logger.warning(f"[{request_id}] Inference backpressure [{exc.error_code}]: {exc.message}")
+    detail = {"error": exc.error_code, "message": exc.message}
+    if request_id:
+        detail["request_id"] = request_id
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=detail,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def lookup_cached_transcription(audio, whisper_lang: str, model: Optional[str] = None) -> tuple[str, Optional[dict]]:
+    """Return (cache_key, cached payload or None) for decoded PCM, a Whisper language and model."""
+    cache_key = transcript_cache_key(audio, whisper_lang, ModelSpec.parse(model).key)
+    return cache_key, transcript_cache.get(cache_key)
+
+
+def store_cached_transcription(cache_key: str, result: dict, whisper_lang: str,
+                               model: Optional[str] = None) -> dict:
+    """Cache a fresh Whisper result with its cleaned transcript; returns the stored payload."""
+    payload = {**result, "cleaned_transcript": clean_transcript(result.get("text", ""))}
+    transcript_cache.put(cache_key, payload, model_name=ModelSpec.parse(model).key, language=whisper_lang)
+    return payload
+
+
+def no_clear_speech_message(url: Optional[str]) -> str:
+    return platform_failure_message(url or "", "no_clear_speech", "No clear speech was found in this audio.")
+
+
+def log_language_detection(log_prefix: str, detection: dict, cached: bool):
+    logger.info(f"[{log_prefix}] Auto language: {detection['whisper_language']} "
+                f"(p={detection['probability']:.2f}{', cached' if cached else ''})")
+
+
+async def detect_pcm_language_async(audio, log_prefix: str, model: Optional[str] = None) -> tuple:
+    """
+    lang="auto" for HTTP handlers: ``(detection, speech)`` where ``speech`` is
+    the VAD ``(speech_audio, time_map)`` when it had to be computed. Detection
+    is None when there is no speech.
+    """
+    key, detection = await run_in_threadpool(lang_id.lookup, audio, ModelSpec.parse(model).key)
+    if detection is not None:
+        log_language_detection(log_prefix, detection, cached=True)
+        return detection, None
+    speech = await run_in_threadpool(speech_only, audio)
+    if len(speech[0]) == 0:
+        return None, speech
+    detection = lang_id.from_probabilities(
+        await detect_language_async(lang_id.speech_window(speech[0]), model=model)
+    )
+    lang_id.detection_cache.put(key, detection)
+    log_language_detection(log_prefix, detection, cached=False)
+    return detection, speech
+
+
+def detect_pcm_language_blocking(audio, log_prefix: str, model: Optional[str] = None) -> tuple:
+    """lang="auto" for job workers; see ``detect_pcm_language_async``."""
+    key, detection = lang_id.lookup(audio, ModelSpec.parse(model).key)
+    if detection is not None:
+        log_language_detection(log_prefix, detection, cached=True)
+        return detection, None
+    speech = speech_only(audio)
+    if len(speech[0]) == 0:
+        return None, speech
+    detection = lang_id.from_probabilities(detect_language_blocking(lang_id.speech_window(speech[0]), model=model))
+    lang_id.detection_cache.put(key, detection)
+    log_language_detection(log_prefix, detection, cached=False)
+    return detection, speech
+
+
+def with_language_detection(result: dict, detection: Optional[dict]) -> dict:
+    """Attach the keyword-confirmed detection to a result (no-op for a forced language)."""
+    if detection is None:
+        return result
+    return {**result, "language_detection": lang_id.confirm(
+        detection, result.get("text", ""), lang_keyword_matcher, app_language_for_whisper
+    )}
+
+
+async def transcribe_pcm_async(audio, whisper_lang: str, log_prefix: str,
+                               model: Optional[str] = None) -> Optional[dict]:
+    """
+    Cache lookup → VAD → inference pool, for HTTP handlers.
+
+    Returns None when the VAD pre-pass finds no speech. Raises
+    InferenceBackpressure when the pool is saturated. With ``AUTO_LANG`` the
+    language is detected first and the result carries ``language_detection``.
+    """
+    detection = speech = None
+    if whisper_lang == AUTO_LANG:
+        detection, speech = await detect_pcm_language_async(audio, log_prefix, model)
+        if detection is None:
+            logger.info(f"[{log_prefix}] VAD found no speech — skipping Whisper")
+            return None
+        whisper_lang = detection["whisper_language"]
+
+    cache_key, result = await run_in_threadpool(lookup_cached_transcription, audio, whisper_lang, model)
+    if result is not None:
+        logger.info(f"[{log_prefix}] Transcript cache hit — skipping Whisper")
+        return with_language_detection(result, detection)
+
+    speech_audio, time_map = speech or await run_in_threadpool(speech_only, audio)
+    if len(speech_audio) == 0:
+        logger.info(f"[{log_prefix}] VAD found no speech — skipping Whisper")
+        return None
+    logger.info(f"[{log_prefix}] VAD kept {len(speech_audio) / SAMPLE_RATE:.1f}s of {len(audio) / SAMPLE_RATE:.1f}s")
+    result = await transcribe_async(speech_audio, language=whisper_lang, model=model)
+    result = await run_in_threadpool(store_cached_transcription, cache_key,
+                                     remap_result(result, time_map), whisper_lang, model)
+    return with_language_detection(result, detection)
+
+
+def transcribe_pcm_blocking(audio, whisper_lang: str, log_prefix: str,
+                            model: Optional[str] = None) -> Optional[dict]:
+    """Cache lookup → VAD → inference pool (long-form when long enough), for job workers."""
+    detection = speech = None
+    if whisper_lang == AUTO_LANG:
+        detection, speech = detect_pcm_language_blocking(audio, log_prefix, model)
+        if detection is None:
+            logger.info(f"[{log_prefix}] VAD found no speech — skipping Whisper")
+            return None
+        whisper_lang = detection["whisper_language"]
+
+    cache_key, result = lookup_cached_transcription(audio, whisper_lang, model)
+    if result is not None:
+        logger.info(f"[{log_prefix}] Transcript cache hit — skipping Whisper")
+        return with_language_detection(result, detection)
+
+    speech_audio, time_map = speech or speech_only(audio)
+    speech_seconds = len(speech_audio) / SAMPLE_RATE
+    if speech_seconds == 0:
+        logger.info(f"[{log_prefix}] VAD found no speech — skipping Whisper")
+        return None
+    logger.info(f"[{log_prefix}] VAD kept {speech_seconds:.1f}s of {len(audio) / SAMPLE_RATE:.1f}s")
+    if speech_seconds >= LONGFORM_MIN_SECONDS:
+        logger.info(f"[{log_prefix}] Long-form mode: {speech_seconds:.0f}s of speech")
+        result = transcribe_longform_blocking(speech_audio, language=whisper_lang, model=model)
+    else:
+        result = transcribe_blocking(speech_audio, language=whisper_lang, model=model)
+    result = store_cached_transcription(cache_key, remap_result(result, time_map), whisper_lang, model)
+    return with_language_detection(result, detection)
+
+
+# Extractor metadata (page, player JS, format list) per canonical URL, format selector
+# and cookie identity. Retries and duplicate submissions within the TTL skip the network
+# round trips; a cookie-authenticated extraction is never served to a cookie-less caller.
+YDL_INFO_CACHE_SECONDS = int(os.environ.get("YDL_INFO_CACHE_SECONDS", "300"))
+YDL_INFO_CACHE_BYTES = int(os.environ.get("YDL_INFO_CACHE_BYTES", str(32 * 1024 * 1024)))
+ydl_info_cache = LRUCache(YDL_INFO_CACHE_BYTES, sizeof=len, ttl_seconds=YDL_INFO_CACHE_SECONDS)
+
+
+def ydl_info_cache_key(url: str, ydl_opts: dict) -> tuple:
+    """``(canonical URL, format selector, cookie identity)``; cookies are hashed, never kept."""
+    # From the options, not the YoutubeDL: it moves a Cookie header into its jar only at extraction
+    cookies = [str(ydl_opts.get("cookiefile") or ""), str(ydl_opts.get("cookiesfrombrowser") or ""),
+               (ydl_opts.get("http_headers") or {}).get("Cookie", "")]
+    identity = hashlib.sha256("\0".join(cookies).encode("utf-8")).hexdigest()[:16] if any(cookies) else None
+    return canonical_media_key(normalize_url(url) or url), ydl_opts.get("format"), identity
+
+
+def ydl_extract_info(ydl, url: str, ydl_opts: dict) -> dict:
+    """
+    Resolve ``url`` without downloading, reusing a recent extraction of the
+    same canonical URL made with the same format selector and cookies
+    (``ydl_opts`` is what ``ydl`` was built from). The returned dict is a
+    private copy that can be fed to ``ydl.process_ie_result(info, download=True)``.
+    """
+    key = ydl_info_cache_key(url, ydl_opts)
+    cached = ydl_info_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+    info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+    ydl_info_cache.put(key, json.dumps(info))
+    return info
+
+
+def ydl_download_info(ydl, info: dict) -> str:
+    """Download an already-extracted info dict; returns the local media path."""
+    info = ydl.process_ie_result(info, download=True)
+    return ydl.prepare_filename(info)
+
+
+def ydl_fetch_info(ydl, info: dict, log_prefix: str, allow_disk: bool = True) -> tuple:
+    """
+    Fetch an extracted info dict's media: ``(media, None)`` when the selected
+    format decodes diskless, else ``(None, path)`` after a file download.
+    """
+    source = ydl_source(info, ydl.cookiejar) if DISKLESS_ENABLED else None
+    if source:
+        media = decode_media_diskless(*source, log_prefix)
+        if media is not None:
+            return media, None
+    if not allow_disk:
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    return None, ydl_download_info(ydl, info)
+
+
+def ydl_fetch_media(url: str, ydl_opts: dict, log_prefix: str, allow_disk: bool = True) -> tuple:
+    """Blocking yt_dlp fetch with one extraction; see ``ydl_fetch_info``."""
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl_fetch_info(ydl, ydl_extract_info(ydl, url, ydl_opts), log_prefix, allow_disk)
+
+
+async def fetch_request_media(request: TranscribeRequest, db: Session, request_id: str) -> tuple:
+    """
+    Resolve a /transcribe-style request to ``(media, path)``.
+
+    URLs are fetched off the event loop (yt_dlp, then the Instagram
+    fallbacks). Small media is decoded diskless and comes back as
+    ``(MediaInfo, None)``; anything else is downloaded and comes back as
+    ``(None, path)`` for the caller to inspect and remove.
+    ``file_path`` is returned as ``(None, file_path)``. Raises HTTPException
+    with the same error shapes /transcribe has always returned.
+    """
+    audio_path = None
+    if request.url:
+        # ── Disk preflight ────────────────────────────────────────────────
+        # Fail before touching the network so we don't leave a partial file.
+        # With diskless decoding on, a full disk only rules out file downloads.
+        has_space, free_bytes = check_disk_space()
+        if not has_space:
+            free_mb = free_bytes // (1024 * 1024) if free_bytes >= 0 else -1
+            if not DISKLESS_ENABLED:
+                logger.error(f"[{request_id}] ENOSPC preflight: {free_mb} MB free — refusing download")
+                raise HTTPException(
+                    status_code=507,
+                    detail={
+                        "error": "disk_full",
+                        "message": "Not enough storage to process this right now. Try again shortly.",
+                        "request_id": request_id
+                    }
+                )
+            logger.warning(f"[{request_id}] Low disk ({free_mb} MB free) — diskless decode only")
+
+        # ── Stale-part cleanup before download ────────────────────────────
+        cleanup_stale_parts()
+
+        logger.info(f"[{request_id}] Downloading audio from URL...")
+        ydl_opts = build_ydl_opts(request.url, db)
+        ydl_error_str = None
+        media = None
+
+        try:
+            media, audio_path = await run_in_threadpool(ydl_fetch_media, request.url, ydl_opts, request_id, has_space)
+            logger.info(f"[{request_id}] yt_dlp {'diskless decode' if media is not None else 'download'} succeeded")
+        except Exception as e:
+            ydl_error_str = str(e)
+            # Surface ENOSPC immediately without going through the fallback chain
+            if isinstance(e, OSError) and e.errno == errno.ENOSPC:
+                logger.error(f"[{request_id}] ENOSPC during download: {ydl_error_str}")
+                raise HTTPException(
+                    status_code=507,
+                    detail={
+                        "error": "disk_full",
+                        "message": "Not enough storage to process this right now. Try again shortly.",
+                        "request_id": request_id
+                    }
+                )
+            error_code_check, _ = classify_download_error(request.url, ydl_error_str)
+            logger.warning(f"[{request_id}] yt_dlp failed [{error_code_check}]: {ydl_error_str[:300]}")
+
+        # Fallback chain for Instagram
+        if media is None and not audio_path and "instagram.com" in request.url:
+            media, audio_path = await run_in_threadpool(
+                instagram_fallback_media, request.url, request_id, has_space
+            )
+
+        if media is not None:
+            return media, None
+
+        if not audio_path:
+            error_code, user_message = classify_download_error(request.url, ydl_error_str or "")
+            logger.warning(f"[{request_id}] All download attempts failed [{error_code}]")
+            status_code = 507 if error_code == "disk_full" else 400
+            raise HTTPException(
+                status_code=status_code,
+                detail={"error": error_code, "message": user_message, "request_id": request_id}
+            )
+    else:
+        audio_path = request.file_path
+
+    if not audio_path or not os.path.exists(audio_path):
+        logger.error(f"[{request_id}] Audio file not found: {audio_path}")
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "file_not_found",
+                "message": "Audio file not accessible",
+                "request_id": request_id
+            }
+        )
+
+    return None, audio_path
+
+
 @app.post("/transcribe")
 async def transcribe(request: TranscribeRequest, db: Session = Depends(get_db)):
     start_time = time.time()
@@ -829,105 +1349,49 @@ async def transcribe(request: TranscribeRequest, db: Session = Depends(get_db)):
         )
     
     audio_path = None
-    is_temp_file = False
+    is_temp_file = bool(request.url)
 
     try:
-        if request.url:
-            # ── Disk preflight ────────────────────────────────────────────────
-            # Fail before touching the network so we don't leave a partial file.
-            has_space, free_bytes = check_disk_space()
-            if not has_space:
-                free_mb = free_bytes // (1024 * 1024) if free_bytes >= 0 else -1
-                logger.error(f"[{request_id}] ENOSPC preflight: {free_mb} MB free — refusing download")
-                raise HTTPException(
-                    status_code=507,
-                    detail={
-                        "error": "disk_full",
-                        "message": "Not enough storage to process this right now. Try again shortly.",
-                        "request_id": request_id
-                    }
-                )
-
-            # ── Stale-part cleanup before download ────────────────────────────
-            cleanup_stale_parts()
+        fetch_start = time.time()
+        media, audio_path = await fetch_request_media(request, db, request_id)
+        if media is None:
+            download_time = time.time() - fetch_start
+            media = await run_in_threadpool(inspect_media, audio_path, MAX_MEDIA_DURATION_SECONDS)
+            media.timings["download"] = download_time
 
-            logger.info(f"[{request_id}] Downloading audio from URL...")
-            is_temp_file = True
-            ydl_opts = build_ydl_opts(request.url, db)
-            ydl_error_str = None
+        # Duration ceiling and audio gate — reject before Whisper
+        require_duration_within_limit_or_raise(media, request_id)
+        require_usable_audio_or_raise(media, request.url, request_id)
 
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(request.url, download=True)
-                    audio_path = ydl.prepare_filename(info)
-                logger.info(f"[{request_id}] yt_dlp download succeeded")
-            except Exception as e:
-                ydl_error_str = str(e)
-                # Surface ENOSPC immediately without going through the fallback chain
-                if isinstance(e, OSError) and e.errno == errno.ENOSPC:
-                    logger.error(f"[{request_id}] ENOSPC during download: {ydl_error_str}")
-                    raise HTTPException(
-                        status_code=507,
-                        detail={
-                            "error": "disk_full",
-                            "message": "Not enough storage to process this right now. Try again shortly.",
-                            "request_id": request_id
-                        }
-                    )
-                error_code_check, _ = classify_download_error(request.url, ydl_error_str)
-                logger.warning(f"[{request_id}] yt_dlp failed [{error_code_check}]: {ydl_error_str[:300]}")
-
-            # Fallback chain for Instagram
-            if not audio_path and "instagram.com" in request.url:
-                logger.info(f"[{request_id}] Trying cobalt.tools fallback...")
-                audio_path = try_cobalt_download(request.url)
-
-                if not audio_path:
-                    logger.info(f"[{request_id}] Trying embed fallback...")
-                    audio_path = try_embed_download(request.url)
-
-            if not audio_path:
-                error_code, user_message = classify_download_error(request.url, ydl_error_str or "")
-                logger.warning(f"[{request_id}] All download attempts failed [{error_code}]")
-                status_code = 507 if error_code == "disk_full" else 400
-                raise HTTPException(
-                    status_code=status_code,
-                    detail={"error": error_code, "message": user_message, "request_id": request_id}
-                )
-        else:
-            audio_path = request.file_path
+        logger.info(f"[{request_id}] Starting Whisper transcription...")
+        whisper_start = time.time()
         
-        if not audio_path or not os.path.exists(audio_path):
-            logger.error(f"[{request_id}] Audio file not found: {audio_path}")
+        whisper_lang = whisper_lang_map.get(request.lang, "en")
+        if whisper_lang != AUTO_LANG:
+            logger.info(f"[{request_id}] Forcing Whisper language: {whisper_lang} (user selected: {request.lang})")
+        try:
+            result = await transcribe_pcm_async(media.pcm, whisper_lang, request_id, request.model)
+        except InferenceBackpressure as e:
+            raise inference_backpressure_error(e, request_id)
+        if result is None:
             raise HTTPException(
-                status_code=404,
+                status_code=400,
                 detail={
-                    "error": "file_not_found",
-                    "message": "Audio file not accessible",
+                    "error": "no_clear_speech",
+                    "message": no_clear_speech_message(request.url),
                     "request_id": request_id
                 }
             )
-
-        # ffprobe audio gate — reject before Whisper if no audio stream present
-        if is_temp_file and request.url:
-            require_usable_audio_or_raise(audio_path, request.url, request_id)
-
-        logger.info(f"[{request_id}] Starting Whisper transcription...")
-        whisper_start = time.time()
-        
-        whisper_lang = whisper_lang_map.get(request.lang, "en")
-        logger.info(f"[{request_id}] Forcing Whisper language: {whisper_lang} (user selected: {request.lang})")
-        whisper_model = get_whisper_model()
-        result = whisper_model.transcribe(audio_path, language=whisper_lang)
         
         whisper_time = time.time() - whisper_start
-        logger.info(f"[{request_id}] Whisper completed in {whisper_time:.2f}s")
+        media.timings["transcribe"] = whisper_time
+        logger.info(f"[{request_id}] Whisper completed in {whisper_time:.2f}s — stages: {media.summary()['timings']}")
         
         segments = [{"start": seg['start'], "end": seg['end'], "text": seg['text']} for seg in result['segments']]
         full_text = result["text"]
 
-        # Cleaning pass — best-effort, never blocks success
-        cleaned_transcript = clean_transcript(full_text, language=request.lang)
+        # Cleaning pass — best-effort, never blocks success (computed once, cached with the transcript)
+        cleaned_transcript = result.get("cleaned_transcript")
         if cleaned_transcript:
             logger.info(f"[{request_id}] cleaned_transcript produced ({len(cleaned_transcript)} chars)")
         else:
@@ -952,8 +1416,10 @@ async def transcribe(request: TranscribeRequest, db: Session = Depends(get_db)):
             "duration": result["segments"][-1]["end"] if segments else 0,
             "segment_count": len(segments),
             "processing_time": round(processing_time, 2),
+            "media": media.summary(),
             "timestamp": datetime.utcnow().isoformat(),
             "cleaned_transcript": cleaned_transcript,
+            "language_detection": result.get("language_detection"),
         })
     except HTTPException:
         raise
@@ -998,9 +1464,361 @@ async def transcribe(request: TranscribeRequest, db: Session = Depends(get_db)):
             except Exception as cleanup_err:
                 logger.debug(f"[{request_id}] Cleanup warning: {cleanup_err}")
 
-def process_transcription_background(job_id: str, url: str, lang: str):
-    """Background task to process transcription"""
+# Chunk length for /transcribe/stream. Short chunks put the first segments on the
+# wire after one chunk's decode instead of after the whole clip.
+STREAM_CHUNK_SECONDS = int(os.environ.get("STREAM_CHUNK_SECONDS", "30"))
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/transcribe/stream")
+async def transcribe_stream(request: TranscribeRequest, db: Session = Depends(get_db)):
+    """
+    Server-Sent Events variant of /transcribe.
+
+    Emits `stage` events (downloading, probing, transcribing), a `language`
+    event when lang="auto", one `segment` event per segment as soon as its
+    chunk is decoded, then a `done` summary.
+    Failures end the stream with a single `error` event carrying the same
+    error shape /transcribe uses.
+    """
+    request_id = f"req_{int(time.time() * 1000)}"
+    logger.info(f"[{request_id}] New streaming transcription request - lang: {request.lang}")
+
+    if not request.url and not request.file_path:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "missing_input",
+                "message": "Provide either 'url' or 'file_path'",
+                "request_id": request_id
+            }
+        )
+
+    async def events():
+        start_time = time.time()
+        audio_path = None
+        is_temp_file = bool(request.url)
+        in_flight = deque()
+        try:
+            yield sse_event("stage", {"stage": "downloading", "request_id": request_id})
+            media, audio_path = await fetch_request_media(request, db, request_id)
+
+            yield sse_event("stage", {"stage": "probing", "request_id": request_id})
+            if media is None:
+                media = await run_in_threadpool(inspect_media, audio_path, MAX_MEDIA_DURATION_SECONDS)
+            require_duration_within_limit_or_raise(media, request_id)
+            require_usable_audio_or_raise(media, request.url, request_id)
+            audio = media.pcm
+            whisper_lang = whisper_lang_map.get(request.lang, "en")
+            detection = speech = None
+            if whisper_lang == AUTO_LANG:
+                detection, speech = await detect_pcm_language_async(audio, request_id, request.model)
+                if detection is not None:
+                    whisper_lang = detection["whisper_language"]
+                    yield sse_event("language", {**detection, "request_id": request_id})
+            cache_key, result = (None, None) if whisper_lang == AUTO_LANG else \
+                await run_in_threadpool(lookup_cached_transcription, audio, whisper_lang, request.model)
+
+            yield sse_event("stage", {"stage": "transcribing", "request_id": request_id})
+            if result is not None:
+                logger.info(f"[{request_id}] Transcript cache hit — replaying segments")
+                for seg in result["segments"]:
+                    yield sse_event("segment", {"start": seg["start"], "end": seg["end"], "text": seg["text"]})
+            else:
+                speech_audio, time_map = speech or await run_in_threadpool(speech_only, audio)
+                if len(speech_audio) == 0:
+                    raise HTTPException(
+                        status_code=400,
+                        detail={
+                            "error": "no_clear_speech",
+                            "message": no_clear_speech_message(request.url),
+                            "request_id": request_id
+                        }
+                    )
+
+                # Keep one chunk per inference worker in flight; emit strictly in order.
+                spans = split_on_silence(speech_audio, STREAM_CHUNK_SECONDS)
+                segments, language, next_span = [], None, 0
+                while next_span < len(spans) or in_flight:
+                    while next_span < len(spans) and len(in_flight) < inference_pool.workers:
+                        chunk_start, chunk_end = spans[next_span]
+                        in_flight.append((chunk_start, asyncio.ensure_future(
+                            transcribe_async(speech_audio[chunk_start:chunk_end], language=whisper_lang,
+                                             model=request.model)
+                        )))
+                        next_span += 1
+                    chunk_start, task = in_flight.popleft()
+                    chunk_result = await task
+                    if language is None and chunk_result["segments"]:
+                        language = chunk_result["language"]
+                    previous_text = segments[-1]["text"] if segments else ""
+                    new_segments = remap_result(
+                        {"segments": offset_chunk_segments(chunk_result, chunk_start / SAMPLE_RATE, previous_text)},
+                        time_map,
+                    )["segments"]
+                    for seg in new_segments:
+                        yield sse_event("segment", seg)
+                    segments.extend(new_segments)
+
+                result = await run_in_threadpool(store_cached_transcription, cache_key, {
+                    "text": "".join(seg["text"] for seg in segments),
+                    "language": language or whisper_lang,
+                    "segments": segments,
+                }, whisper_lang, request.model)
+            result = with_language_detection(result, detection)
+
+            processing_time = time.time() - start_time
+            logger.info(f"[{request_id}] ✅ Streaming transcription complete in {processing_time:.2f}s")
+            yield sse_event("done", {
+                "success": True,
+                "request_id": request_id,
+                "full_text": result["text"],
+                "language": result["language"],
+                "duration": result["segments"][-1]["end"] if result["segments"] else 0,
+                "segment_count": len(result["segments"]),
+                "processing_time": round(processing_time, 2),
+                "timestamp": datetime.utcnow().isoformat(),
+                "cleaned_transcript": result.get("cleaned_transcript"),
+                "language_detection": result.get("language_detection"),
+            })
+        except HTTPException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"error": "request_failed", "message": str(e.detail)}
+            yield sse_event("error", {**detail, "status_code": e.status_code})
+        except InferenceBackpressure as e:
+            logger.warning(f"[{request_id}] Inference backpressure [{e.error_code}]: {e.message}")
+            yield sse_event("error", {
+                "error": e.error_code,
+                "message": e.message,
+                "retry_after": e.retry_after,
+                "status_code": e.status_code,
+                "request_id": request_id
+            })
+        except Exception as e:
+            logger.error(f"[{request_id}] ❌ Streaming transcription error: {type(e).__name__}: {str(e)}")
+            yield sse_event("error", {
+                "error": "transcription_failed",
+                "message": "Transcription failed. Please check your audio file or URL.",
+                "error_type": type(e).__name__,
+                "status_code": 500,
+                "request_id": request_id
+            })
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+            if is_temp_file and audio_path and os.path.exists(audio_path):
+                try:
+                    os.remove(audio_path)
+                except Exception as cleanup_err:
+                    logger.debug(f"[{request_id}] Cleanup warning: {cleanup_err}")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/ws/live")
+async def live_dictation(websocket: WebSocket, lang: str = "en", encoding: str = "pcm_s16le",
+                         sample_rate: int = 16000, model: Optional[str] = None):
+    """
+    Live dictation over a WebSocket.
+
+    Query params: `lang`, `encoding` (pcm_s16le, pcm_f32le, webm_opus,
+    ogg_opus), `sample_rate` (PCM only) and optional `model`. The client sends audio as binary
+    frames and `{"type": "stop"}` when done. The server sends `partial`
+    messages (revised as more audio arrives), `final` messages (never
+    revised), an `error` message on backpressure, and `done` after stop.
+    With `lang=auto` a `language` message reports the language detected on
+    the first pass with speech.
+    """
+    session_id = f"live_{int(time.time() * 1000)}"
+    await websocket.accept()
+
+    if lang not in whisper_lang_map:
+        await websocket.send_json({"type": "error", "error": "invalid_language",
+                                   "message": f"Invalid language. Must be one of: {', '.join(whisper_lang_map)}"})
+        await websocket.close(code=1008)
+        return
+    if not is_allowed_model(model):
+        await websocket.send_json({"type": "error", "error": "invalid_model",
+                                   "message": f"Invalid model. Must be one of: {', '.join(ALLOWED_MODELS)}"})
+        await websocket.close(code=1008)
+        return
+    try:
+        decoder = PcmDecoder(encoding, sample_rate)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "error": "invalid_encoding", "message": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    logger.info(f"[{session_id}] Live dictation started - lang: {lang}, encoding: {encoding}")
+    # "auto": Whisper detects on the first decode with speech; later passes reuse it
+    whisper_lang = None if lang == AUTO_LANG else whisper_lang_map[lang]
+    session = LiveSession()
+    audio_ready = asyncio.Event()
+    closing = asyncio.Event()
+    finalized: List[dict] = []
+    busy_reported = False
+
+    async def decode_pass(final: bool = False):
+        nonlocal busy_reported, whisper_lang
+        audio, n_samples = session.snapshot()
+        if n_samples == 0:
+            return
+        if not session.has_speech(audio):
+            session.skip_silence(n_samples)
+            return
+        try:
+            result = await transcribe_async(
+                audio, language=whisper_lang, model=model,
+                initial_prompt=session.prompt(), condition_on_previous_text=False,
+            )
+        except InferenceBackpressure as e:
+            if not busy_reported:
+                logger.warning(f"[{session_id}] Inference backpressure [{e.error_code}]: {e.message}")
+                await websocket.send_json({"type": "error", "error": e.error_code,
+                                           "message": e.message, "retry_after": e.retry_after})
+                busy_reported = True
+            return
+        busy_reported = False
+        if whisper_lang is None and result["segments"] and result.get("language"):
+            whisper_lang = result["language"]
+            logger.info(f"[{session_id}] Auto language: {whisper_lang}")
+            await websocket.send_json({"type": "language", "language": whisper_lang})
+        finals, partial = session.apply(result, n_samples, final=final)
+        for seg in finals:
+            await websocket.send_json({"type": "final", **seg})
+        finalized.extend(finals)
+        if partial:
+            await websocket.send_json({"type": "partial", **partial})
+
+    async def decode_loop():
+        # Decodes run one at a time; audio keeps arriving while one is in flight.
+        while not closing.is_set():
+            await audio_ready.wait()
+            audio_ready.clear()
+            if not closing.is_set() and session.pending_seconds() >= LIVE_STEP_SECONDS:
+                await decode_pass()
+
+    async def pump_decoded():
+        while (pcm := await decoder.read_decoded()) is not None:
+            session.append(pcm)
+            audio_ready.set()
+
+    decoding = pumping = None
+    try:
+        await decoder.start()
+        decoding = asyncio.create_task(decode_loop())
+        pumping = asyncio.create_task(pump_decoded()) if decoder.needs_reader else None
+        await websocket.send_json({"type": "ready", "session_id": session_id})
+
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                pcm = await decoder.feed(message["bytes"])
+                if pcm is not None and len(pcm):
+                    session.append(pcm)
+                    audio_ready.set()
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(control, dict) and control.get("type") == "stop":
+                    break
+
+        # Stop: drain the decoder, let the in-flight pass finish, finalize the rest
+        await decoder.close_input()
+        if pumping:
+            await pumping
+        closing.set()
+        audio_ready.set()
+        await decoding
+        await decode_pass(final=True)
+        await websocket.send_json({
+            "type": "done",
+            "full_text": " ".join(seg["text"] for seg in finalized),
+            "segment_count": len(finalized),
+            "duration": round(session.buffer_start, 3),
+        })
+        await websocket.close()
+        logger.info(f"[{session_id}] ✅ Live dictation complete: {len(finalized)} segment(s)")
+    except WebSocketDisconnect:
+        logger.info(f"[{session_id}] Live dictation client disconnected")
+    except Exception as e:
+        logger.error(f"[{session_id}] ❌ Live dictation error: {type(e).__name__}: {str(e)}")
+        try:
+            await websocket.send_json({"type": "error", "error": "transcription_failed",
+                                       "message": "Live transcription failed."})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        for task in (decoding, pumping):
+            if task is not None and not task.done():
+                task.cancel()
+        await decoder.close()
+
+# Languages with an mT5 prompt (see get_lang_models); English needs no enhancement.
+MT_LANGUAGES = {lang for lang in whisper_lang_map if lang not in ("en", AUTO_LANG)}
+
+
+def enhance_job_segments(job: TranscriptionJob, db: Session):
+    """Batched mT5 over the stored segments, then complete the job."""
+    language = job.detected_mt or job.language
+    started = time.time()
+    try:
+        models = get_lang_models().get(language)
+        if not models:
+            raise RuntimeError(f"no MT model loaded for {language}")
+        segments = json.loads(job.segments)
+        enhanced = mt_enhance.enhance_texts([seg.get("text", "") for seg in segments], language,
+                                            models["model"], models["tokenizer"])
+        for seg, text in zip(segments, enhanced):
+            if text:
+                seg["text_enhanced"] = text
+        job.segments = json.dumps(segments)
+        job.detected_mt = language
+        job.mt_enhanced = True
+        logger.info(f"[{job.id}] MT enhancement ({language}) done in {time.time() - started:.2f}s")
+    except Exception as e:
+        # The transcript stands on its own; enhancement is best-effort
+        logger.warning(f"[{job.id}] MT enhancement skipped: {type(e).__name__}: {e}")
+    complete_job(job, db)
+
+
+def enhance_job_background(job_id: str, url: str, lang: str,
+                           lease: Optional[job_queue.LeaseHeartbeat] = None):
+    """Job-queue handler for the "enhance" phase: MT over a stored transcript, then complete"""
     db = SessionLocal()
+    if lease is not None:
+        lease.guard(db)
+    try:
+        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+        if not job or job.state != "enhancing":
+            return
+        if not job.segments:
+            complete_job(job, db)
+            return
+        logger.info(f"[{job_id}] MT enhancement started")
+        enhance_job_segments(job, db)
+    finally:
+        db.close()
+
+
+def process_transcription_background(job_id: str, url: str, lang: str,
+                                     lease: Optional[job_queue.LeaseHeartbeat] = None):
+    """Job-queue handler: download, transcribe and store results for one leased job"""
+    db = SessionLocal()
+    if lease is not None:
+        # Every commit re-checks the lease, so a worker that lost the job cannot overwrite it
+        lease.guard(db)
     try:
         job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
         if not job:
@@ -1008,6 +1826,7 @@ def process_transcription_background(job_id: str, url: str, lang: str):
 
         start_time = time.time()
         audio_path = None
+
         
         try:
             set_job_state(job, db, "downloading")
@@ -1019,70 +1838,85 @@ def process_transcription_background(job_id: str, url: str, lang: str):
             probe_error_str = None
             ydl_error_str = None
 
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-            except Exception as probe_err:
-                probe_error_str = str(probe_err)
-                logger.warning(f"[{job_id}] Probe failed: {probe_error_str}")
-                if job.platform_guess != "instagram":
-                    fail_job(job, db, "probe_failed", probe_failure_message(job.platform_guess or "unknown"))
-                    return
+            media = None
+            fetch_start = time.time()
 
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=True)
-                    audio_path = ydl.prepare_filename(info)
-            except Exception as ydl_err:
-                ydl_error_str = str(ydl_err)
-                logger.warning(f"[{job_id}] yt_dlp failed: {ydl_error_str}")
-                if "instagram.com" in url:
-                    logger.info(f"[{job_id}] Trying cobalt.tools fallback...")
-                    audio_path = try_cobalt_download(url)
-                    if not audio_path:
-                        logger.info(f"[{job_id}] Trying embed fallback...")
-                        audio_path = try_embed_download(url)
-                if not audio_path:
-                    if probe_error_str:
+            # One extraction: the probe's info dict drives the download
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                try:
+                    info = ydl_extract_info(ydl, url, ydl_opts)
+                except Exception as probe_err:
+                    probe_error_str = str(probe_err)
+                    logger.warning(f"[{job_id}] Probe failed: {probe_error_str}")
+                    if job.platform_guess != "instagram":
                         fail_job(job, db, "probe_failed", probe_failure_message(job.platform_guess or "unknown"))
-                    else:
-                        fail_job(job, db, "download_failed", download_failure_message(url, ydl_error_str))
-                    return
-
-            # ffprobe audio gate — reject before Whisper if no audio stream present
-            if not job_has_usable_audio_or_fail(job, db, audio_path, url):
+                        return
+
+                if info is not None:
+                    # Check the extractor's duration against the ceiling before fetching anything
+                    too_long = duration_limit_message(info.get('duration'))
+                    if too_long:
+                        fail_job(job, db, "download_failed", too_long)
+                        return
+
+                    try:
+                        media, audio_path = ydl_fetch_info(ydl, info, job_id)
+                    except Exception as ydl_err:
+                        ydl_error_str = str(ydl_err)
+                        logger.warning(f"[{job_id}] yt_dlp failed: {ydl_error_str}")
+
+            if media is None and not audio_path and "instagram.com" in url:
+                media, audio_path = instagram_fallback_media(url, job_id)
+
+            if media is None and not audio_path:
+                if probe_error_str:
+                    fail_job(job, db, "probe_failed", probe_failure_message(job.platform_guess or "unknown"))
+                else:
+                    fail_job(job, db, "download_failed", download_failure_message(url, ydl_error_str))
                 return
 
-            # Check video duration (limit to 21 minutes to prevent crashes)
-            video_duration = info.get('duration', 0) if info else 0
-            max_duration = 1260  # 21 minutes (buffer for ~20 min videos)
-            if video_duration > max_duration:
-                fail_job(
-                    job,
-                    db,
-                    "download_failed",
-                    f"Video too long ({video_duration//60} minutes). Maximum: {max_duration//60} minutes."
-                )
+            # Upgrade the single-flight key to the extractor's real id (resolves short links)
+            if info and info.get("extractor_key") and info.get("id"):
+                resolved_key = f"{info['extractor_key'].lower()}:{info['id']}"
+                if resolved_key != job.media_key:
+                    job.media_key = resolved_key
+                    db.commit()
+
+            # One inspection pass feeds the audio gate, the duration limit and inference
+            if media is None:
+                download_time = time.time() - fetch_start
+                media = inspect_media(audio_path, MAX_MEDIA_DURATION_SECONDS)
+                media.timings["download"] = download_time
+
+            too_long = duration_limit_message(media.duration)
+            if too_long:
+                fail_job(job, db, "download_failed", too_long)
                 return
-            
-            logger.info(f"[{job_id}] Video duration: {video_duration}s")
-            
+            if not job_has_usable_audio_or_fail(job, db, media, url):
+                return
+            logger.info(f"[{job_id}] Media duration: {media.duration:.1f}s")
+
             # Transcribe
+            if lease is not None:
+                lease.check()
             set_job_state(job, db, "transcribing")
             logger.info(f"[{job_id}] Starting Whisper transcription...")
             whisper_lang = whisper_lang_map.get(lang, "en")
-            logger.info(f"[{job_id}] Forcing Whisper language: {whisper_lang} (user selected: {lang})")
-            whisper_model = get_whisper_model()
-            result = whisper_model.transcribe(audio_path, language=whisper_lang)
+            if whisper_lang != AUTO_LANG:
+                logger.info(f"[{job_id}] Forcing Whisper language: {whisper_lang} (user selected: {lang})")
+            transcribe_start = time.time()
+            result = transcribe_pcm_blocking(media.pcm, whisper_lang, job_id, job.whisper_model)
+            media.timings["transcribe"] = time.time() - transcribe_start
+            if result is None:
+                fail_job(job, db, "no_clear_speech", no_clear_speech_message(url))
+                return
             
             segments = [{"start": seg['start'], "end": seg['end'], "text": seg['text']} for seg in result['segments']]
             full_text = result["text"]
 
             # Reject empty / unintelligible output — Whisper succeeded but found no speech
             if not full_text or not full_text.strip():
-                fail_job(job, db, "no_clear_speech",
-                         platform_failure_message(url, "no_clear_speech",
-                                                  "No clear speech was found in this audio."))
+                fail_job(job, db, "no_clear_speech", no_clear_speech_message(url))
                 return
 
             # Cleanup
@@ -1095,13 +1929,23 @@ def process_transcription_background(job_id: str, url: str, lang: str):
             job.full_text = full_text
             job.segments = json.dumps(segments)
             job.detected_language = result["language"]
+            if result.get("language_detection"):
+                job.detected_mt = result["language_detection"]["language"]
             job.duration = result["segments"][-1]["end"] if segments else 0
             job.segment_count = len(segments)
             job.processing_time = round(processing_time, 2)
-            complete_job(job, db)
+            job.media_info = json.dumps(media.summary())
+            if mt_enhance.needs_mt_enhancement(job, MT_LANGUAGES):
+                # Transcript is served by /results from here on; an enhance worker fills in text_enhanced
+                set_job_state(job, db, "enhancing")
+                logger.info(f"[{job_id}] ✅ Transcript ready in {processing_time:.2f}s — queued for MT")
+            else:
+                complete_job(job, db)
             
             logger.info(f"[{job_id}] ✅ Background transcription complete in {processing_time:.2f}s")
             
+        except job_queue.LeaseLost:
+            raise
         except Exception as e:
             logger.error(f"[{job_id}] ❌ Background transcription failed: {str(e)}")
             fail_job(job, db, "transcription_failed", "Transcription failed. Please check your audio source and try again.")
@@ -1117,6 +1961,7 @@ def process_transcription_background(job_id: str, url: str, lang: str):
 async def transcribe_file(
     file: UploadFile = File(...),
     lang: str = Form("en"),
+    model: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     """Transcribe an uploaded audio file"""
@@ -1124,36 +1969,63 @@ async def transcribe_file(
 
     # Validate language
     valid_langs = ["en", "pidgin", "twi", "igbo", "yoruba", "hausa",
-                   "swahili", "amharic", "french", "portuguese", "ewe", "dagbani"]
+                   "swahili", "amharic", "french", "portuguese", "ewe", "dagbani", "auto"]
     if lang not in valid_langs:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid language. Must be one of: {', '.join(valid_langs)}"
         )
+    if not is_allowed_model(model):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid model. Must be one of: {', '.join(ALLOWED_MODELS)}"
+        )
+
+    upload_too_large = HTTPException(
+        status_code=413,
+        detail={
+            "error": "upload_too_large",
+            "message": f"File too large. Maximum upload size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+        }
+    )
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise upload_too_large
 
     temp_audio_path = None
 
     try:
-        # Save uploaded file to temp location
+        # Stream the upload to a temp location in chunks (never the whole file in memory)
         temp_dir = tempfile.mkdtemp()
-        temp_audio_path = os.path.join(temp_dir, file.filename)
+        temp_audio_path = os.path.join(temp_dir, os.path.basename(file.filename or "upload"))
 
-        with open(temp_audio_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        try:
+            size = await run_in_threadpool(save_upload, file.file, temp_audio_path)
+        except UploadTooLarge:
+            raise upload_too_large
 
-        logger.info(f"💾 Saved file to: {temp_audio_path}")
+        logger.info(f"💾 Saved {size} bytes to: {temp_audio_path}")
 
-        # Get audio duration
-        audio = AudioSegment.from_file(temp_audio_path)
-        duration = len(audio) / 1000.0  # Convert ms to seconds
+        # One pass: container duration (checked before decoding), audio gate and the PCM Whisper consumes
+        media = await run_in_threadpool(inspect_media, temp_audio_path, MAX_MEDIA_DURATION_SECONDS)
+        require_duration_within_limit_or_raise(media, file.filename)
+        require_usable_audio_or_raise(media, None, file.filename)
+        duration = media.duration
 
         # Transcribe using Whisper with proper language mapping
         logger.info(f"🎙️ Starting transcription with language: {lang}")
         whisper_lang = whisper_lang_map.get(lang, "en")
-        logger.info(f"Forcing Whisper language: {whisper_lang} (user selected: {lang})")
-        whisper_model = get_whisper_model()
-        result = whisper_model.transcribe(temp_audio_path, language=whisper_lang)
+        if whisper_lang != AUTO_LANG:
+            logger.info(f"Forcing Whisper language: {whisper_lang} (user selected: {lang})")
+        audio_pcm = media.pcm
+        try:
+            result = await transcribe_pcm_async(audio_pcm, whisper_lang, file.filename, model)
+        except InferenceBackpressure as e:
+            raise inference_backpressure_error(e)
+        if result is None:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "no_clear_speech", "message": no_clear_speech_message(None)}
+            )
 
         # Format segments
         segments = []
@@ -1167,8 +2039,8 @@ async def transcribe_file(
         full_text = result.get("text", "").strip()
         detected_language = result.get("language", lang)
 
-        # Cleaning pass — best-effort, never blocks success
-        cleaned_transcript = clean_transcript(full_text, language=lang)
+        # Cleaning pass — best-effort, never blocks success (computed once, cached with the transcript)
+        cleaned_transcript = result.get("cleaned_transcript")
         if cleaned_transcript:
             logger.info(f"✅ Transcription complete: {len(segments)} segments, cleaned_transcript produced")
         else:
@@ -1181,10 +2053,13 @@ async def transcribe_file(
             "language": detected_language.upper(),
             "duration": duration,
             "cleaned_transcript": cleaned_transcript,
+            "language_detection": result.get("language_detection"),
         }
 
         return JSONResponse(add_metadata(response_data))
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Transcription failed: {str(e)}")
         return JSONResponse(
@@ -1205,23 +2080,53 @@ async def transcribe_file(
                 logger.warning(f"Failed to clean up temp file: {e}")
 
 @app.post("/submit")
-async def submit_job(request: TranscribeRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def submit_job(request: TranscribeRequest, db: Session = Depends(get_db)):
     """Submit a transcription job and get job ID immediately"""
     if not request.url:
         raise HTTPException(status_code=400, detail="URL is required for background jobs")
     
+    normalized_url = normalize_url(request.url)
+    platform = guess_platform(normalized_url)
+
+    # Single-flight: attach to an in-flight job or serve a fresh result for the same media.
+    # Extractor matching runs off-loop; the lookup and the insert below stay await-free so
+    # two submissions in this process can't both miss. This is per instance: media_key has
+    # no unique constraint, so two app instances racing on the same link can each create a
+    # job (both complete; later submissions reuse the newest).
+    model_key = ModelSpec.parse(request.model).key
+    media_key = None
+    if is_valid_url(normalized_url) and platform != "unknown":
+        media_key = await run_in_threadpool(canonical_media_key, normalized_url)
+        existing = find_reusable_job(db, media_key, request.lang, model_key)
+        if existing:
+            existing_state = existing.state or existing.status
+            logger.info(f"[{existing.id}] Reusing job for {media_key} ({existing_state})")
+            return JSONResponse(add_metadata({
+                "success": True,
+                "job_id": existing.id,
+                "state": existing_state,
+                "reused": True,
+                "original_url": request.url,
+                "normalized_url": existing.normalized_url,
+                "platform_guess": existing.platform_guess,
+                "message": "Transcript ready!" if existing_state in ("completed", "enhancing")
+                           else "This link is already being transcribed. Check status or come back later.",
+                "status_url": f"/status/{existing.id}",
+                "results_url": f"/results/{existing.id}"
+            }))
+
     job_id = f"job_{int(time.time() * 1000)}"
     now = datetime.utcnow()
     
     # Create job record
-    normalized_url = normalize_url(request.url)
-    platform = guess_platform(normalized_url)
     job = TranscriptionJob(
         id=job_id,
         url=normalized_url or request.url,
         original_url=request.url,
         normalized_url=normalized_url,
         platform_guess=platform,
+        media_key=media_key,
+        whisper_model=model_key,
         language=request.lang,
         status="received",
         state="received",
@@ -1261,17 +2166,17 @@ async def submit_job(request: TranscribeRequest, background_tasks: BackgroundTas
             status_code=400
         )
 
+    # "accepted" is the durable queue state — a job worker leases it from here
     set_job_state(job, db, "accepted", url=normalized_url)
+    job_queue.notify()
     
-    # Start background task
-    background_tasks.add_task(process_transcription_background, job_id, normalized_url, request.lang)
-    
-    logger.info(f"[{job_id}] Job submitted for background processing")
+    logger.info(f"[{job_id}] Job queued for background processing")
     
     return JSONResponse(add_metadata({
         "success": True,
         "job_id": job_id,
         "state": job.state,
+        "reused": False,
         "original_url": job.original_url,
         "normalized_url": job.normalized_url,
         "platform_guess": job.platform_guess,
@@ -1306,9 +2211,23 @@ async def get_status(job_id: str, db: Session = Depends(get_db)):
     }))
 
 @app.get("/results/{job_id}")
-async def get_results(job_id: str, db: Session = Depends(get_db)):
-    """Get full transcription results"""
-    job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+async def get_results(job_id: str, offset: int = 0, limit: Optional[int] = None,
+                      from_s: Optional[float] = None, to_s: Optional[float] = None,
+                      db: Session = Depends(get_db)):
+    """Get transcription results; offset/limit and from_s/to_s return one page or time window of segments"""
+    paged = bool(offset) or limit is not None or from_s is not None or to_s is not None
+    if paged and (offset < 0 or (limit is not None and limit < 1)):
+        raise HTTPException(status_code=400, detail={
+            "error": "invalid_page",
+            "message": "offset must be >= 0 and limit >= 1",
+            "job_id": job_id,
+        })
+    
+    query = db.query(TranscriptionJob)
+    if paged:
+        # The page comes from transcript_segments; don't load the multi-MB JSON blobs
+        query = query.options(defer(TranscriptionJob.segments), defer(TranscriptionJob.corrected_segments))
+    job = query.filter(TranscriptionJob.id == job_id).first()
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -1324,7 +2243,8 @@ async def get_results(job_id: str, db: Session = Depends(get_db)):
             }
         )
     
-    if job.status != "completed":
+    # "enhancing" jobs already have their transcript; text_enhanced arrives later
+    if job.status not in ("completed", "enhancing"):
         return JSONResponse({
             "job_id": job_id,
             "state": job.state or job.status,
@@ -1334,6 +2254,23 @@ async def get_results(job_id: str, db: Session = Depends(get_db)):
             "message": "Transcription still in progress. Check back soon!"
         })
     
+    segment_page = None
+    if paged:
+        found = transcript_segments.page(db, job_id, offset, limit, from_s, to_s)
+        if found is None:
+            found = transcript_segments.page_from_blob(job, offset, limit, from_s, to_s)
+            if job.status == "completed":
+                # Completed before the segments table existed: store its rows for the next page
+                transcript_segments.replace_for_job(db, job)
+                db.commit()
+        segments, segment_total = found
+        corrected_segments = None  # each paged segment carries its own corrected_text
+        segment_page = {"offset": offset, "limit": limit, "from_s": from_s, "to_s": to_s,
+                        "returned": len(segments), "total": segment_total}
+    else:
+        segments = json.loads(job.segments) if job.segments else []
+        corrected_segments = json.loads(job.corrected_segments) if job.corrected_segments else None
+    
     return JSONResponse(add_metadata({
         "success": True,
         "job_id": job_id,
@@ -1347,18 +2284,20 @@ async def get_results(job_id: str, db: Session = Depends(get_db)):
         "transcription_id": job.transcription_id,
         "retry_count": job.retry_count or 0,
         "full_text": job.full_text,
-        "segments": json.loads(job.segments) if job.segments else [],
+        "segments": segments,
+        "segment_page": segment_page,
         "language": job.detected_language,
         "detected_mt": job.detected_mt,
         "mt_enhanced": job.mt_enhanced,
         "duration": job.duration,
         "segment_count": job.segment_count,
         "processing_time": job.processing_time,
+        "media": json.loads(job.media_info) if job.media_info else None,
         "created_at": job.created_at.isoformat(),
         "updated_at": job.updated_at.isoformat() if job.updated_at else None,
-        "completed_at": job.completed_at.isoformat(),
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
         "corrected_text": job.corrected_text,
-        "corrected_segments": json.loads(job.corrected_segments) if job.corrected_segments else None,
+        "corrected_segments": corrected_segments,
         "corrected_at": job.corrected_at.isoformat() if job.corrected_at else None
     }))
 
@@ -1404,10 +2343,19 @@ async def save_corrections(job_id: str, request: Request, db: Session = Depends(
     job.corrected_text = data.get("corrected_text")
     job.corrected_segments = json.dumps(data.get("corrected_segments")) if data.get("corrected_segments") else None
     job.corrected_at = datetime.utcnow()
+    # Diff pairs for /export/training, committed with the correction itself
+    pair_count = training_pairs.replace_for_job(db, job)
+    if job.status == "completed":
+        transcript_segments.replace_for_job(db, job)
     
     db.commit()
     
-    logger.info(f"[{job_id}] Corrections saved")
+    # Only this job's exports change; re-render them from the corrected segments
+    await run_in_threadpool(renditions.cache.invalidate, job_id)
+    if job.status == "completed":
+        await run_in_threadpool(store_renditions, export_record(job))
+    
+    logger.info(f"[{job_id}] Corrections saved ({pair_count} training pair(s))")
     
     return JSONResponse({
         "success": True,
@@ -1415,126 +2363,131 @@ async def save_corrections(job_id: str, request: Request, db: Session = Depends(
     })
 
 @app.get("/export/training")
-async def export_training_data(db: Session = Depends(get_db)):
-    """Export all corrections as training data pairs"""
-    jobs = db.query(TranscriptionJob).filter(
-        TranscriptionJob.corrected_text.isnot(None)
-    ).all()
-    
-    training_pairs = []
-    for job in jobs:
-        if job.corrected_segments:
-            original_segments = json.loads(job.segments) if job.segments else []
-            corrected_segments = json.loads(job.corrected_segments)
-            
-            for i, (orig, corr) in enumerate(zip(original_segments, corrected_segments)):
-                if orig.get("text") != corr.get("text"):
-                    training_pairs.append({
-                        "job_id": job.id,
-                        "segment_index": i,
-                        "original": orig.get("text"),
-                        "corrected": corr.get("text"),
-                        "language": job.detected_language,
-                        "timestamp_start": orig.get("start"),
-                        "timestamp_end": orig.get("end")
-                    })
-    
-    return JSONResponse({
-        "total_corrections": len(training_pairs),
-        "training_pairs": training_pairs
-    })
+async def export_training_data(since: int = 0, limit: int = training_pairs.TRAINING_EXPORT_PAGE_SIZE,
+                               db: Session = Depends(get_db)):
+    """
+    Stream correction pairs with id > since as NDJSON, one keyset page at a time.
 
-@app.get("/export/{job_id}/csv")
-async def export_csv(job_id: str, db: Session = Depends(get_db)):
-    """Export transcription as CSV file (Excel-compatible)"""
-    job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    segments = json.loads(job.segments) if job.segments else []
-    corrected_segments = json.loads(job.corrected_segments) if job.corrected_segments else None
-    
-    data = []
-    for i, segment in enumerate(segments):
-        corrected_seg = corrected_segments[i] if corrected_segments and i < len(corrected_segments) else None
-        
-        text = corrected_seg.get('text', segment.get('text', '')).strip() if corrected_seg else segment.get('text', '').strip()
-        translation = segment.get('text_enhanced', '').strip()
-        
-        data.append({
-            "Start Time": f"{segment.get('start', 0):.2f}",
-            "End Time": f"{segment.get('end', 0):.2f}",
-            "Duration": f"{segment.get('end', 0) - segment.get('start', 0):.2f}",
-            "Text": text,
-            "MT Enhanced": translation if translation else ''
-        })
-    
-    df = pd.DataFrame(data)
-    
-    output = io.StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
+    Pass X-Next-Since back as ``since``. Pages stop short of pairs written in
+    the last TRAINING_EXPORT_SETTLE_SECONDS, so ids never arrive out of order:
+    once a page ends at N, no pair with id <= N can appear later (only a
+    re-correction, which writes new ids). X-Has-More is false when the page
+    is short, including when it stopped at the settle window; poll again later.
+    """
+    limit = max(1, min(limit, training_pairs.TRAINING_EXPORT_MAX_PAGE_SIZE))
+    last_id, count = await run_in_threadpool(training_pairs.page_end, db, since, limit)
+    next_since = last_id if last_id is not None else since
     
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8-sig')),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=transcript_{job_id}.csv"}
+        training_pairs.iter_ndjson(since, next_since),
+        media_type="application/x-ndjson",
+        headers={
+            "X-Next-Since": str(next_since),
+            "X-Page-Count": str(count),
+            "X-Has-More": "true" if count == limit else "false",
+        }
     )
 
-@app.get("/export/{job_id}/xlsx")
-async def export_xlsx(job_id: str, db: Session = Depends(get_db)):
-    """Export transcription as Excel file"""
-    job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    segments = json.loads(job.segments) if job.segments else []
-    corrected_segments = json.loads(job.corrected_segments) if job.corrected_segments else None
-    
-    data = []
-    for i, segment in enumerate(segments):
-        corrected_seg = corrected_segments[i] if corrected_segments and i < len(corrected_segments) else None
-        
-        text = corrected_seg.get('text', segment.get('text', '')).strip() if corrected_seg else segment.get('text', '').strip()
-        translation = segment.get('text_enhanced', '').strip()
-        
-        data.append({
-            "Start Time": f"{segment.get('start', 0):.2f}",
-            "End Time": f"{segment.get('end', 0):.2f}",
-            "Duration": f"{segment.get('end', 0) - segment.get('start', 0):.2f}",
-            "Text": text,
-            "MT Enhanced": translation if translation else ''
+# ── Per-job exports (renditions.py) ─────────────────────────────────────────
+# CSV, XLSX, SRT, VTT and JSON are rendered at complete_job and after /correct,
+# then served from the rendition store with the content sha256 as a strong ETag.
+def store_renditions(record: dict) -> Dict[str, bytes]:
+    """Render every export format for a job and make them its current renditions."""
+    rendered = renditions.render_all(record)
+    renditions.cache.store(record["job_id"], rendered)
+    return rendered
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+@app.get("/export/{job_id}/{fmt}")
+async def export_rendition(job_id: str, fmt: str, request: Request, db: Session = Depends(get_db)):
+    """Export a transcription as csv, xlsx, srt, vtt or json (cached; ETag / If-None-Match aware)"""
+    if fmt not in renditions.FORMATS:
+        raise HTTPException(status_code=404, detail={
+            "error": "unknown_format",
+            "message": f"Export format must be one of: {', '.join(renditions.FORMATS)}",
+            "request_id": str(uuid.uuid4())[:8],
         })
+    if_none_match = request.headers.get("if-none-match")
     
-    df = pd.DataFrame(data)
-    
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Transcript')
-        
-        workbook = writer.book
-        worksheet = writer.sheets['Transcript']
-        
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+    sha = await run_in_threadpool(renditions.cache.etag, job_id, fmt)
+    if sha and etag_matches(if_none_match, f'"{sha}"'):
+        return Response(status_code=304, headers={"ETag": f'"{sha}"', "Cache-Control": "no-cache"})
+    content = await run_in_threadpool(renditions.cache.content, sha) if sha else None
     
-    output.seek(0)
+    if content is None:
+        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        record = export_record(job)
+        if job.status == "completed":
+            # Completed before renditions existed (or the store failed): fill them in now
+            content = (await run_in_threadpool(store_renditions, record)).get(fmt)
+        if content is None:
+            content = await run_in_threadpool(renditions.render, fmt, record)
+        sha = renditions.content_sha(content)
+        if etag_matches(if_none_match, f'"{sha}"'):
+            return Response(status_code=304, headers={"ETag": f'"{sha}"', "Cache-Control": "no-cache"})
     
+    return Response(
+        content=content,
+        media_type=renditions.MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename=transcript_{job_id}.{fmt}",
+            "ETag": f'"{sha}"',
+            "Cache-Control": "no-cache",
+        }
+    )
+
+# ── Bulk export ─────────────────────────────────────────────────────────────
+# Jobs are read in batches and each is rendered and sent before the next is
+# read (see bulk_export.py), so memory stays flat however many jobs match.
+@app.get("/export/bulk")
+async def export_bulk(
+    format: str = "zip",
+    files: str = ",".join(BULK_EXPORT_FILE_TYPES),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    state: Optional[str] = None,
+    lang: Optional[str] = None,
+    platform: Optional[str] = None,
+):
+    """Export every job matching the filter as a streamed ZIP (per-job CSV/SRT/JSON) or NDJSON"""
+    request_id = str(uuid.uuid4())[:8]
+    if format not in ("zip", "ndjson"):
+        raise HTTPException(status_code=400, detail={
+            "error": "invalid_format",
+            "message": "format must be 'zip' or 'ndjson'",
+            "request_id": request_id,
+        })
+    file_types = [f.strip().lower() for f in files.split(",") if f.strip()]
+    unknown = [f for f in file_types if f not in BULK_EXPORT_FILE_TYPES]
+    if format == "zip" and (unknown or not file_types):
+        raise HTTPException(status_code=400, detail={
+            "error": "invalid_files",
+            "message": f"files must be a comma-separated subset of {', '.join(BULK_EXPORT_FILE_TYPES)}",
+            "request_id": request_id,
+        })
+
+    logger.info(f"[{request_id}] Bulk export ({format}) from={created_from} to={created_to} "
+                f"state={state} lang={lang} platform={platform}")
+    jobs = iter_bulk_jobs(created_from, created_to, state, lang, platform)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_bulk_ndjson(jobs),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=transcripts_{stamp}.ndjson"}
+        )
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=transcript_{job_id}.xlsx"}
+        exporters.iter_zip(iter_bulk_files(jobs, file_types)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=transcripts_{stamp}.zip"}
     )
 
 # ── Yaro Handoff Mock ────────────────────────────────────────────────────────
@@ -0,0 +1,180 @@
+"""
+media.py — one inspection pass per media file.
+
+A single ffmpeg process decodes the first audio stream to 16 kHz mono PCM and,
+from the same run, reports the container duration and every audio stream's
+codec, sample rate and channel layout. The resulting ``MediaInfo`` is what the
+audio gate, the duration limit and inference all read, so nothing opens the
+media a second time (no separate ffprobe, pydub or whisper.load_audio decode).
+
+The PCM matches ``whisper.load_audio`` (s16le then scaled to float32), which is
+what the transcript cache hashes.
+
+Callers with a duration ceiling pass ``max_duration``: ffmpeg prints the input
+report before it decodes anything, so over-long media is rejected (and the
+process killed) without ever holding its PCM.
+"""
+
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper's native input rate
+
+_CHUNK_BYTES = 64 * 1024
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_AUDIO_STREAM_RE = re.compile(
+    r"Stream #\d+:(\d+)[^:\n]*: Audio: (\w+)[^,\n]*(?:, (\d+) Hz)?(?:, ([^,\n]+))?"
+)
+
+
+@dataclass
+class MediaInfo:
+    """Everything one ffmpeg pass learned about a media file."""
+
+    path: Optional[str]
+    streams: List[Dict[str, Any]] = field(default_factory=list)   # audio streams only
+    duration: Optional[float] = None
+    pcm: Optional[np.ndarray] = None
+    failure: Optional[str] = None     # no_audio_stream, ffmpeg_missing, decode_failed, too_long
+    message: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.failure is None and self.pcm is not None
+
+    @property
+    def has_audio(self) -> bool:
+        # A successful decode proves an audio stream even if the report didn't parse
+        return self.failure != "no_audio_stream" and (bool(self.streams) or self.pcm is not None)
+
+    @property
+    def codec(self) -> Optional[str]:
+        return self.streams[0]["codec_name"] if self.streams else None
+
+    @property
+    def sample_rate(self) -> Optional[int]:
+        return self.streams[0]["sample_rate"] if self.streams else None
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-safe view without the PCM."""
+        return {
+            "duration": self.duration,
+            "codec": self.codec,
+            "sample_rate": self.sample_rate,
+            "audio_streams": len(self.streams),
+            "timings": {stage: round(seconds, 3) for stage, seconds in self.timings.items()},
+        }
+
+
+def decode_command(source: str, sr: int = SAMPLE_RATE) -> List[str]:
+    """ffmpeg invocation shared by file and pipe decoding; the report goes to stderr."""
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-nostats", "-loglevel", "info",
+        "-threads", "0",
+        "-i", source,
+        "-map", "0:a:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr),
+        "pipe:1",
+    ]
+
+
+def parse_report(stderr: str) -> Dict[str, Any]:
+    """Duration and input audio streams from ffmpeg's stderr report."""
+    input_section = re.split(r"\nStream mapping:|\nOutput #0", stderr, maxsplit=1)[0]
+    duration = None
+    match = _DURATION_RE.search(input_section)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    streams = [
+        {
+            "index": int(index),
+            "codec_name": codec,
+            "sample_rate": int(rate) if rate else None,
+            "channel_layout": layout.strip() if layout else None,
+        }
+        for index, codec, rate, layout in _AUDIO_STREAM_RE.findall(input_section)
+    ]
+    return {"duration": duration, "streams": streams}
+
+
+def drain(stream, sink: bytearray):
+    """Copy a pipe into ``sink`` until EOF; run on its own thread so ffmpeg never blocks."""
+    for block in iter(lambda: stream.read(_CHUNK_BYTES), b""):
+        sink.extend(block)
+
+
+def build_media_info(path: Optional[str], pcm_bytes: bytes, stderr: str, returncode: int,
+                     timings: Dict[str, float]) -> MediaInfo:
+    """Turn one finished ffmpeg run into a ``MediaInfo``."""
+    report = parse_report(stderr)
+    info = MediaInfo(path=path, streams=report["streams"], duration=report["duration"], timings=timings)
+    if returncode != 0:
+        if "matches no streams" in stderr:
+            info.failure, info.message = "no_audio_stream", "No audio stream in this media."
+        else:
+            tail = stderr.strip().splitlines()[-1:] or ["ffmpeg could not decode this media."]
+            info.failure, info.message = "decode_failed", tail[0]
+        return info
+    pcm = np.frombuffer(pcm_bytes, np.int16).astype(np.float32)
+    pcm /= 32768.0  # in place: one float32 copy of the audio, not two
+    info.pcm = pcm
+    if info.duration is None:
+        info.duration = len(info.pcm) / SAMPLE_RATE
+    return info
+
+
+def inspect_media(path: str, max_duration: Optional[float] = None) -> MediaInfo:
+    """
+    Decode ``path`` once; return its streams, duration and PCM.
+
+    When the container reports a duration above ``max_duration``, ffmpeg is
+    stopped before it decodes any audio and the result fails with
+    ``too_long`` (``duration`` and ``streams`` are still filled in).
+    """
+    started = time.time()
+    try:
+        proc = subprocess.Popen(decode_command(path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        return MediaInfo(path=path, failure="ffmpeg_missing",
+                         message="ffmpeg is not installed or not on PATH.")
+    pcm = bytearray()
+    reader = threading.Thread(target=drain, args=(proc.stdout, pcm), daemon=True)
+    reader.start()
+
+    # The input report is complete once ffmpeg moves on to the output side
+    stderr = bytearray()
+    for line in iter(proc.stderr.readline, b""):
+        stderr.extend(line)
+        if line.startswith((b"Stream mapping:", b"Output #0")):
+            break
+    report = parse_report(stderr.decode(errors="ignore"))
+    if max_duration and report["duration"] and report["duration"] > max_duration:
+        proc.kill()
+        proc.wait()
+        reader.join()
+        return MediaInfo(path=path, streams=report["streams"], duration=report["duration"],
+                         failure="too_long", message=f"Media is longer than {max_duration:.0f}s.",
+                         timings={"probe": time.time() - started})
+
+    stderr.extend(proc.stderr.read())
+    proc.wait()
+    reader.join()
+    return build_media_info(path, pcm, stderr.decode(errors="ignore"), proc.returncode,
+                            {"decode": time.time() - started})
+
+
+def load_audio(path: str) -> np.ndarray:
+    """Decode any ffmpeg-readable media to mono float32 PCM in [-1, 1]."""
+    info = inspect_media(path)
+    if not info.ok:
+        raise RuntimeError(f"Failed to load audio: {info.message}")
+    return info.pcm
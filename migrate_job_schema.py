@@ -5,8 +5,9 @@ migrate_job_schema.py — standalone runner for the job-schema migration.
 Usage:
     python migrate_job_schema.py [--db PATH]
 
-Adds nine columns required by the background-job contract to the
-transcription_jobs table.  Safe to run multiple times (idempotent).
+Adds the columns required by the background-job contract and the durable
+job queue to the transcription_jobs table.  Safe to run multiple times
+(idempotent).
 """
 
 import argparse
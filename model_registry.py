@@ -0,0 +1,204 @@
+"""
+model_registry.py — on-demand model residency under a RAM budget.
+
+Models are keyed by ``ModelSpec(engine, size, quantization)`` and loaded the
+first time a request asks for one. Loaded models stay resident until the
+total of their parameter and buffer bytes would exceed MODEL_RAM_BUDGET_MB.
+At that point the least recently used models are evicted, so "tiny" for quick
+previews and "small" for premium jobs can share one worker process.
+
+Each inference worker process owns one registry (see ``inference.py``); the
+registry itself never touches the API process. ``stats()`` reports load
+time, resident bytes and hit counts per model, and the workers attach it to
+every result so the API can expose it on /stats.
+
+Engines are pluggable: ``register_engine(name, loader)`` adds a loader
+``loader(size, quantization) -> engine`` returning an object that follows the
+contract in ``engines.py``. The built-in "whisper" engine supports
+quantization "none" (fp32) and "int8".
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from engines import WHISPER_QUANTIZATIONS, load_whisper
+
+logger = logging.getLogger(__name__)
+
+MODEL_RAM_BUDGET_MB = int(os.environ.get("MODEL_RAM_BUDGET_MB", "2048"))
+
+WHISPER_SIZES = ("tiny", "tiny.en", "base", "base.en", "small", "small.en",
+                 "medium", "medium.en", "large", "large-v1", "large-v2", "large-v3", "turbo")
+
+_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml")
+
+
+def _configured_default_model() -> str:
+    """WHISPER_MODEL env, then config.yaml ``whisper.model`` (if PyYAML is installed), then "base"."""
+    if os.environ.get("WHISPER_MODEL"):
+        return os.environ["WHISPER_MODEL"]
+    if not os.path.exists(_CONFIG_PATH):
+        return "base"
+    try:
+        import yaml
+    except ImportError:
+        logger.warning(f"{_CONFIG_PATH} exists but PyYAML is not installed; ignoring whisper.model")
+        return "base"
+    try:
+        with open(_CONFIG_PATH, "r", encoding="utf-8") as f:
+            model = ((yaml.safe_load(f) or {}).get("whisper") or {}).get("model")
+    except Exception as e:
+        logger.warning(f"Could not read whisper.model from {_CONFIG_PATH}: {type(e).__name__}: {e}")
+        return "base"
+    return str(model) if model else "base"
+
+
+DEFAULT_MODEL = _configured_default_model()
+# Models a request or job may ask for; anything else is rejected with 400.
+ALLOWED_MODELS = tuple(
+    m.strip() for m in os.environ.get("WHISPER_ALLOWED_MODELS", "tiny,base,small,medium").split(",") if m.strip()
+)
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    engine: str = "whisper"
+    size: str = "base"
+    quantization: str = "none"
+
+    @property
+    def key(self) -> str:
+        return f"{self.engine}:{self.size}:{self.quantization}"
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> "ModelSpec":
+        """Accept "small", "small:int8", "whisper:small" or "whisper:small:int8"."""
+        parts = (value or DEFAULT_MODEL).split(":")
+        if len(parts) == 1:
+            return cls(size=parts[0])
+        if len(parts) == 2 and parts[0] in WHISPER_SIZES:
+            return cls(size=parts[0], quantization=parts[1])
+        if len(parts) == 2:
+            return cls(engine=parts[0], size=parts[1])
+        return cls(engine=parts[0], size=parts[1], quantization=parts[2])
+
+
+def is_allowed(value: Optional[str]) -> bool:
+    """Whether a request may select ``value`` (the default model is always allowed)."""
+    if value is None:
+        return True
+    try:
+        spec = ModelSpec.parse(value)
+    except Exception:
+        return False
+    if spec.engine == "whisper" and spec.quantization not in WHISPER_QUANTIZATIONS:
+        return False
+    return spec.engine in _ENGINES and (
+        spec.size in ALLOWED_MODELS or spec == ModelSpec.parse(DEFAULT_MODEL)
+    )
+
+
+_ENGINES: Dict[str, Callable[[str, str], Any]] = {"whisper": load_whisper}
+
+
+def register_engine(name: str, loader: Callable[[str, str], Any]):
+    _ENGINES[name] = loader
+
+
+def model_bytes(model) -> int:
+    """Bytes an engine (or bare torch module's parameters and buffers) keeps resident."""
+    if hasattr(model, "nbytes"):
+        return model.nbytes()
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelRegistry:
+    def __init__(self, budget_bytes: int = MODEL_RAM_BUDGET_MB * 1024 * 1024,
+                 on_load: Optional[Callable[[Any], Any]] = None):
+        self.budget_bytes = budget_bytes
+        self.on_load = on_load  # e.g. batching.enable_encoder_batching; returns the engine to keep
+        self._models: "OrderedDict[ModelSpec, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, spec: ModelSpec):
+        """Return the resident model for ``spec``, loading (and evicting) as needed."""
+        with self._lock:
+            entry = self._models.get(spec)
+            if entry is not None:
+                self._models.move_to_end(spec)
+                entry["hits"] += 1
+                entry["last_used"] = time.time()
+                return entry["model"]
+
+            loader = _ENGINES.get(spec.engine)
+            if loader is None:
+                raise ValueError(f"Unknown model engine: {spec.engine}")
+            logger.info(f"[models pid={os.getpid()}] Loading {spec.key}...")
+            started = time.time()
+            model = loader(spec.size, spec.quantization)
+            if self.on_load is not None:
+                model = self.on_load(model)
+            entry = {
+                "model": model,
+                "bytes": model_bytes(model),
+                "load_seconds": time.time() - started,
+                "hits": 0,
+                "last_used": time.time(),
+            }
+            self._models[spec] = entry
+            self.loads += 1
+            logger.info(f"[models pid={os.getpid()}] {spec.key} ready in {entry['load_seconds']:.1f}s "
+                        f"({entry['bytes'] / 1e6:.0f} MB)")
+            self._evict(keep=spec)
+            return model
+
+    def _evict(self, keep: ModelSpec):
+        """Drop least recently used models until the budget fits (never ``keep``)."""
+        evicted = False
+        while self.resident_bytes() > self.budget_bytes:
+            victim = next((s for s in self._models if s != keep), None)
+            if victim is None:
+                break
+            logger.info(f"[models pid={os.getpid()}] Evicting {victim.key} to stay under budget")
+            close = getattr(self._models.pop(victim)["model"], "close", None)
+            if close:
+                close()
+            self.evictions += 1
+            evicted = True
+        if evicted:
+            gc.collect()
+
+    def resident_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._models.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self.resident_bytes(),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "models": {
+                    spec.key: {
+                        "bytes": entry["bytes"],
+                        "load_seconds": round(entry["load_seconds"], 3),
+                        "hits": entry["hits"],
+                        "last_used": entry["last_used"],
+                        **(entry["model"].stats() if hasattr(entry["model"], "stats") else {}),
+                    }
+                    for spec, entry in self._models.items()
+                },
+            }
@@ -0,0 +1,119 @@
+"""
+mt_enhance.py — batched mT5 enhancement of transcript segments.
+
+Runs as its own job phase after transcription: the transcription worker
+leaves the job in state ``enhancing`` and returns, and MT_ENHANCE_WORKERS
+dedicated "enhance" workers (job_queue.py) claim it from there. The transcript
+is readable from /results meanwhile, and MT never holds a transcription
+worker's slot or lease. Every segment becomes one "translate <Language> to
+English: <text>" prompt for the shared mT5 model and tokenizer from
+``main.get_lang_models()``.
+
+Prompts are tokenized once, sorted by length and packed into batches whose
+padded size (rows x longest row) stays within MT_BATCH_TOKEN_BUDGET, so short
+segments are not padded to the length of long ones and peak memory is bounded
+however long the transcript is. ``generate`` runs greedily under
+``torch.inference_mode`` and one batch at a time per process, because every
+job shares the same model. Segments already in ``translation_cache`` (same
+normalized text, languages and model version) skip generation entirely.
+
+Off unless MT_ENHANCE_ENABLED=1.
+"""
+
+import logging
+import os
+import threading
+from typing import Collection, List, Optional
+
+import translation_cache
+
+logger = logging.getLogger(__name__)
+
+MT_ENHANCE_ENABLED = os.environ.get("MT_ENHANCE_ENABLED", "0") == "1"
+# "enhance" job workers per process; generation is serialized per process anyway.
+MT_ENHANCE_WORKERS = int(os.environ.get("MT_ENHANCE_WORKERS", "1"))
+MT_BATCH_TOKEN_BUDGET = int(os.environ.get("MT_BATCH_TOKEN_BUDGET", "2048"))
+MT_MAX_INPUT_TOKENS = int(os.environ.get("MT_MAX_INPUT_TOKENS", "256"))
+MT_MAX_NEW_TOKENS = int(os.environ.get("MT_MAX_NEW_TOKENS", "128"))
+MT_TARGET_LANG = "en"
+# Bump when build_prompt changes so cached translations from the old prompt stop matching.
+MT_PROMPT_VERSION = "1"
+
+_generate_lock = threading.Lock()
+
+
+def needs_mt_enhancement(job, languages: Collection[str]) -> bool:
+    """Whether a transcribed job goes to the enhance phase: MT is on, its language has a prompt, it has segments."""
+    return MT_ENHANCE_ENABLED and (job.detected_mt or job.language) in languages and bool(job.segments)
+
+
+def build_prompt(text: str, language: str) -> str:
+    return f"translate {language.title()} to English: {text.strip()}"
+
+
+def plan_batches(lengths: List[int], token_budget: int = MT_BATCH_TOKEN_BUDGET) -> List[List[int]]:
+    """
+    Group indices into batches sorted by length whose padded size
+    (len(batch) * longest) stays within ``token_budget``. A single row longer
+    than the budget still gets a batch of its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so the row being added is the batch's longest
+        if current and lengths[i] * (len(current) + 1) > token_budget:
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def model_version(model, max_new_tokens: int = MT_MAX_NEW_TOKENS) -> str:
+    """Everything besides the text and languages that changes a translation."""
+    return f"{getattr(model, 'name_or_path', type(model).__name__)}|prompt{MT_PROMPT_VERSION}|new{max_new_tokens}"
+
+
+def enhance_texts(texts: List[str], language: str, model, tokenizer,
+                  token_budget: int = MT_BATCH_TOKEN_BUDGET,
+                  max_new_tokens: int = MT_MAX_NEW_TOKENS) -> List[Optional[str]]:
+    """English enhancement for each text (None for blank input), in input order."""
+    import torch
+
+    outputs: List[Optional[str]] = [None] * len(texts)
+    version = model_version(model, max_new_tokens)
+    keys = {i: translation_cache.make_key(text, language, MT_TARGET_LANG, version)
+            for i, text in enumerate(texts) if text and text.strip()}
+    cached = translation_cache.cache.get_many(list(keys.values()))
+    for i, key in keys.items():
+        outputs[i] = cached.get(key)
+    # One generation per distinct uncached text; repeats within the transcript copy it
+    first_index = {}
+    for i, key in keys.items():
+        if key not in cached:
+            first_index.setdefault(key, i)
+    todo = list(first_index.values())
+    if not todo:
+        logger.info(f"MT enhancement: all {len(keys)} segment(s) from the translation cache")
+        return outputs
+    encoded = tokenizer([build_prompt(texts[i], language) for i in todo],
+                        truncation=True, max_length=MT_MAX_INPUT_TOKENS)["input_ids"]
+
+    batches = plan_batches([len(ids) for ids in encoded], token_budget)
+    for batch in batches:
+        inputs = tokenizer.pad({"input_ids": [encoded[j] for j in batch]},
+                               padding="longest", return_tensors="pt")
+        with _generate_lock, torch.inference_mode():
+            generated = model.generate(**inputs, max_new_tokens=max_new_tokens, num_beams=1, do_sample=False)
+        for j, text in zip(batch, tokenizer.batch_decode(generated, skip_special_tokens=True)):
+            outputs[todo[j]] = text.strip()
+
+    for i, key in keys.items():
+        if outputs[i] is None:
+            outputs[i] = outputs[first_index[key]]
+    translation_cache.cache.put_many({keys[i]: outputs[i] for i in todo if outputs[i]},
+                                     language, MT_TARGET_LANG, version)
+    logger.info(f"MT enhancement: {len(todo)} segment(s) in {len(batches)} batch(es), "
+                f"{len(keys) - len(todo)} from the translation cache or repeats")
+    return outputs
@@ -0,0 +1,155 @@
+"""
+pcm_stream.py — diskless download-to-PCM.
+
+Media bytes from a plain HTTP(S) source (a yt_dlp format URL, a cobalt.tools
+tunnel or an Instagram embed video URL) are piped straight into one ffmpeg
+process that writes 16 kHz mono PCM to stdout, so no container file is ever
+written to the temp volume. It is the same ffmpeg pass ``media.inspect_media``
+runs on files and returns the same ``MediaInfo``, so the audio gate and the
+transcript cache behave identically whichever path decoded the media.
+
+yt_dlp sources carry their cookies into the request: the YoutubeDL cookie jar's
+header for the format URL (newer yt_dlp moves a Cookie in ``http_headers``
+there) plus the format's own ``info["cookies"]``. Cookies that can't be
+replayed send the download back to disk, where yt_dlp handles them itself.
+
+Sources that can't be decoded this way (no Content-Length budget, fragmented
+protocols, MP4s with the index at the end) raise ``DisklessUnavailable`` and
+the caller falls back to the regular file download.
+"""
+
+import logging
+import os
+import subprocess
+import threading
+import time
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from media import MediaInfo, build_media_info, decode_command, drain
+
+logger = logging.getLogger(__name__)
+
+DISKLESS_ENABLED = os.environ.get("DISKLESS_DOWNLOADS", "1") == "1"
+# Media larger than this is downloaded to disk as before.
+DISKLESS_MAX_BYTES = int(os.environ.get("DISKLESS_MAX_BYTES", str(150 * 1024 * 1024)))
+DISKLESS_TIMEOUT_SECONDS = int(os.environ.get("DISKLESS_TIMEOUT_SECONDS", "60"))
+
+_CHUNK_BYTES = 64 * 1024
+
+
+class DisklessUnavailable(Exception):
+    """The source can't be decoded from a pipe; fall back to a file download."""
+
+
+def cookie_header(info: Dict[str, Any], cookiejar=None) -> Optional[str]:
+    """
+    Cookie header yt_dlp would send for the selected format: the jar's
+    cookies for its URL, any Cookie from ``http_headers`` and
+    ``info["cookies"]`` (Set-Cookie syntax). Raises CookieError when
+    ``info["cookies"]`` can't be parsed.
+    """
+    parts = []
+    if cookiejar is not None and hasattr(cookiejar, "get_cookie_header"):
+        parts.append(cookiejar.get_cookie_header(info["url"]))
+    parts.append((info.get("http_headers") or {}).get("Cookie"))
+    if info.get("cookies"):
+        parsed = SimpleCookie()
+        parsed.load(info["cookies"])
+        if not parsed:
+            raise CookieError(f"unparseable cookies: {info['cookies'][:80]!r}")
+        parts.append("; ".join(f"{morsel.key}={morsel.coded_value}" for morsel in parsed.values()))
+    header = "; ".join(part for part in parts if part)
+    return header or None
+
+
+def ydl_source(info: Dict[str, Any], cookiejar=None) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    ``(url, headers)`` for a yt_dlp info dict whose selected format is one
+    plain HTTP(S) file within DISKLESS_MAX_BYTES, else None. ``cookiejar`` is
+    the extracting ``YoutubeDL.cookiejar``; its cookies for the format URL
+    are sent along with the format's own.
+    """
+    if info.get("requested_formats") or info.get("_type", "video") != "video":
+        return None
+    if info.get("protocol") not in ("http", "https") or not info.get("url"):
+        return None
+    if (info.get("filesize") or info.get("filesize_approx") or 0) > DISKLESS_MAX_BYTES:
+        return None
+    try:
+        cookies = cookie_header(info, cookiejar)
+    except CookieError as e:
+        logger.info(f"Diskless decode skipped: {e}")
+        return None
+    headers = {k: v for k, v in (info.get("http_headers") or {}).items() if k.lower() != "cookie"}
+    if cookies:
+        headers["Cookie"] = cookies
+    return info["url"], headers
+
+
+def decode_url(media_url: str, headers: Optional[Dict[str, str]] = None,
+               max_bytes: int = DISKLESS_MAX_BYTES,
+               timeout: int = DISKLESS_TIMEOUT_SECONDS) -> MediaInfo:
+    """
+    Stream ``media_url`` through ffmpeg and return its ``MediaInfo`` (with PCM).
+
+    Media without an audio stream comes back with ``failure="no_audio_stream"``;
+    anything a file download might still handle raises ``DisklessUnavailable``.
+    """
+    started = time.time()
+    try:
+        response = requests.get(media_url, headers=headers or {}, stream=True, timeout=timeout)
+    except requests.RequestException as e:
+        raise DisklessUnavailable(f"request failed: {e}")
+
+    with response:
+        if response.status_code != 200:
+            raise DisklessUnavailable(f"HTTP {response.status_code}")
+        if int(response.headers.get("Content-Length") or 0) > max_bytes:
+            raise DisklessUnavailable("media larger than DISKLESS_MAX_BYTES")
+
+        try:
+            proc = subprocess.Popen(decode_command("pipe:0"), stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise DisklessUnavailable("ffmpeg is not installed or not on PATH")
+        pcm, stderr = bytearray(), bytearray()
+        readers = [threading.Thread(target=drain, args=(proc.stdout, pcm), daemon=True),
+                   threading.Thread(target=drain, args=(proc.stderr, stderr), daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        abort = None
+        received = 0
+        try:
+            for chunk in response.iter_content(_CHUNK_BYTES):
+                received += len(chunk)
+                if received > max_bytes:
+                    abort = "media larger than DISKLESS_MAX_BYTES"
+                    break
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg exited early; its exit status and stderr say why
+        except requests.RequestException as e:
+            abort = f"download interrupted: {e}"
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            if abort:
+                proc.kill()
+            proc.wait()
+            for reader in readers:
+                reader.join()
+
+    if abort:
+        raise DisklessUnavailable(abort)
+    info = build_media_info(None, pcm, stderr.decode(errors="ignore"), proc.returncode,
+                            {"fetch_decode": time.time() - started})
+    if info.failure == "decode_failed":
+        raise DisklessUnavailable(info.message)
+    logger.info(f"Diskless decode: {received} bytes -> {info.duration or 0:.1f}s of audio")
+    return info
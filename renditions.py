@@ -0,0 +1,196 @@
+"""
+renditions.py — precomputed, content-addressed export files.
+
+A job's transcript does not change between ``complete_job`` and the next
+/correct, so every export format is rendered once at those two points instead
+of on each download. Rendered bytes go into ``rendition_blobs`` keyed by their
+sha256 (identical files are stored once), and ``job_renditions`` maps
+(job_id, format) to the current blob. The sha256 is the strong ETag, so a
+conditional GET is answered from the map row alone, without loading the blob.
+
+Corrections replace only that job's map rows; blobs no longer referenced by
+any job are deleted. Recently served blobs are kept in an in-process LRU
+(RENDITION_CACHE_MEMORY_BYTES); blobs are immutable, so it never goes stale.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from io import BytesIO
+from typing import Any, Dict, Iterable, Optional
+
+import exporters
+from cache_utils import LRUCache
+from database import JobRendition, RenditionBlob, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_ENABLED = os.environ.get("RENDITIONS_ENABLED", "1") == "1"
+RENDITION_CACHE_MEMORY_BYTES = int(os.environ.get("RENDITION_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": exporters.XLSX_MEDIA_TYPE,
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "json": "application/json",
+}
+FORMATS = tuple(MEDIA_TYPES)
+
+
+def render(fmt: str, record: Dict[str, Any]) -> bytes:
+    """One export of ``record`` (``bulk_export.export_record`` output) as bytes."""
+    segments, corrected = record.get("segments") or [], record.get("corrected_segments")
+    if fmt == "csv":
+        return exporters.csv_bytes(segments, corrected)
+    if fmt == "xlsx":
+        dest = BytesIO()
+        exporters.write_xlsx(exporters.transcript_rows(segments, corrected), dest)
+        return dest.getvalue()
+    if fmt == "srt":
+        return exporters.srt_text(segments, corrected).encode("utf-8")
+    if fmt == "vtt":
+        return exporters.vtt_text(segments, corrected).encode("utf-8")
+    if fmt == "json":
+        return json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8")
+    raise ValueError(f"unknown rendition format: {fmt}")
+
+
+def render_all(record: Dict[str, Any], formats: Iterable[str] = FORMATS) -> Dict[str, bytes]:
+    """Every format that renders; a failing one (e.g. openpyxl missing) is skipped."""
+    rendered = {}
+    for fmt in formats:
+        try:
+            rendered[fmt] = render(fmt, record)
+        except Exception as e:
+            logger.warning(f"[{record.get('job_id')}] {fmt} rendition failed: {type(e).__name__}: {e}")
+    return rendered
+
+
+def content_sha(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class RenditionCache:
+    def __init__(self, memory_bytes: int = RENDITION_CACHE_MEMORY_BYTES):
+        self.memory = LRUCache(memory_bytes, sizeof=len)
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.invalidated = 0
+        self.blobs_deleted = 0
+
+    def store(self, job_id: str, rendered: Dict[str, bytes]) -> Dict[str, str]:
+        """Make ``rendered`` the job's complete set of renditions; returns ``{fmt: sha256}``."""
+        if not RENDITIONS_ENABLED or not rendered:
+            return {}
+        shas = {fmt: content_sha(content) for fmt, content in rendered.items()}
+
+        db = SessionLocal()
+        try:
+            existing = {
+                sha for (sha,) in
+                db.query(RenditionBlob.sha256).filter(RenditionBlob.sha256.in_(list(set(shas.values()))))
+            }
+            added = set()
+            for fmt, sha in shas.items():
+                if sha not in existing and sha not in added:
+                    db.add(RenditionBlob(sha256=sha, content=rendered[fmt], size_bytes=len(rendered[fmt])))
+                    added.add(sha)
+            replaced = self._unmap(db, job_id)
+            db.add_all([JobRendition(job_id=job_id, fmt=fmt, blob_sha256=sha) for fmt, sha in shas.items()])
+            db.commit()
+            self._delete_orphans(db, replaced - set(shas.values()))
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[{job_id}] Storing renditions failed: {e}")
+            return {}
+        finally:
+            db.close()
+
+        for fmt, sha in shas.items():
+            self.memory.put(sha, rendered[fmt])
+        with self._lock:
+            self.stored += len(shas)
+        return shas
+
+    def invalidate(self, job_id: str):
+        """Drop every rendition of one job (other jobs sharing a blob keep it)."""
+        db = SessionLocal()
+        try:
+            replaced = self._unmap(db, job_id)
+            db.commit()
+            self._delete_orphans(db, replaced)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[{job_id}] Invalidating renditions failed: {e}")
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self.invalidated += 1
+
+    def etag(self, job_id: str, fmt: str) -> Optional[str]:
+        """sha256 of the job's current ``fmt`` rendition, or None when there is none."""
+        if not RENDITIONS_ENABLED:
+            return None
+        db = SessionLocal()
+        try:
+            row = db.get(JobRendition, (job_id, fmt))
+            return row.blob_sha256 if row else None
+        finally:
+            db.close()
+
+    def content(self, sha: str) -> Optional[bytes]:
+        value = self.memory.get(sha)
+        if value is not None:
+            return value
+        db = SessionLocal()
+        try:
+            row = db.get(RenditionBlob, sha)
+            value = row.content if row else None
+        finally:
+            db.close()
+        if value is not None:
+            self.memory.put(sha, value)
+        return value
+
+    @staticmethod
+    def _unmap(db, job_id: str) -> set:
+        """Delete the job's map rows; returns the blob shas they pointed at."""
+        query = db.query(JobRendition).filter(JobRendition.job_id == job_id)
+        shas = {row.blob_sha256 for row in query}
+        query.delete(synchronize_session=False)
+        return shas
+
+    def _delete_orphans(self, db, shas: set):
+        if not shas:
+            return
+        still_used = {
+            sha for (sha,) in
+            db.query(JobRendition.blob_sha256).filter(JobRendition.blob_sha256.in_(list(shas))).distinct()
+        }
+        orphans = list(shas - still_used)
+        if not orphans:
+            return
+        deleted = db.query(RenditionBlob).filter(RenditionBlob.sha256.in_(orphans)).delete(synchronize_session=False)
+        db.commit()
+        for sha in orphans:
+            self.memory.discard(sha)
+        with self._lock:
+            self.blobs_deleted += deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored, invalidated, blobs_deleted = self.stored, self.invalidated, self.blobs_deleted
+        return {
+            "enabled": RENDITIONS_ENABLED,
+            "memory": self.memory.stats(),
+            "stored": stored,
+            "invalidated": invalidated,
+            "blobs_deleted": blobs_deleted,
+        }
+
+
+cache = RenditionCache()
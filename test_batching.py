@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+torch = pytest.importorskip("torch")
+whisper = pytest.importorskip("whisper")
+
+from whisper.decoding import DecodingOptions  # noqa: E402
+from whisper.model import ModelDimensions, Whisper  # noqa: E402
+
+from batching import BatchedWhisperModel, EncoderBatcher  # noqa: E402
+
+OPTIONS = DecodingOptions(language="en", without_timestamps=True, fp16=False, sample_len=12)
+
+
+@pytest.fixture(scope="module")
+def tiny_whisper():
+    torch.manual_seed(0)
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2, n_audio_layer=1,
+                           n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=2, n_text_layer=2)
+    return Whisper(dims).eval()
+
+
+@pytest.fixture(scope="module")
+def mels():
+    torch.manual_seed(1)
+    return [torch.randn(80, 3000) for _ in range(6)]
+
+
+def test_encoder_batcher_matches_single_forwards(tiny_whisper, mels):
+    batcher = EncoderBatcher(tiny_whisper.encoder, max_batch=4, wait_ms=20)
+    try:
+        with ThreadPoolExecutor(len(mels)) as pool:
+            batched = list(pool.map(lambda mel: batcher.encode(mel.unsqueeze(0))[0], mels))
+    finally:
+        batcher.close()
+    with torch.no_grad():
+        for mel, features in zip(mels, batched):
+            assert torch.allclose(tiny_whisper.encoder(mel.unsqueeze(0))[0], features, atol=1e-4)
+    assert batcher.stats()["largest_batch"] > 1
+
+
+def test_concurrent_decodes_match_sequential(tiny_whisper, mels):
+    with torch.no_grad():
+        expected = [tiny_whisper.decode(mel, OPTIONS).tokens for mel in mels]
+
+    model = BatchedWhisperModel(tiny_whisper, EncoderBatcher(tiny_whisper.encoder))
+    try:
+        with ThreadPoolExecutor(len(mels)) as pool, torch.no_grad():
+            actual = list(pool.map(lambda mel: model.decode(mel, OPTIONS).tokens, mels))
+    finally:
+        model.close()
+
+    assert actual == expected
+
+
+def test_forward_without_cache_is_unchanged(tiny_whisper, mels):
+    model = BatchedWhisperModel(tiny_whisper, EncoderBatcher(tiny_whisper.encoder))
+    tokens = torch.tensor([[50258, 50259, 50359]])
+    try:
+        with torch.no_grad():
+            assert torch.allclose(model(mels[0].unsqueeze(0), tokens),
+                                  tiny_whisper(mels[0].unsqueeze(0), tokens), atol=1e-4)
+    finally:
+        model.close()
@@ -0,0 +1,78 @@
+import io
+import json
+import zipfile
+from datetime import datetime
+
+import pytest
+
+import bulk_export
+import exporters
+from database import TranscriptionJob
+
+SEGMENTS = [{"start": 0.0, "end": 1.5, "text": " Hello"}, {"start": 1.5, "end": 3.0, "text": " ẹ kú àárọ̀"}]
+
+
+def add_job(db, job_id, day, state="completed", language="en", platform="youtube", corrected=None):
+    db.add(TranscriptionJob(
+        id=job_id, url=f"https://example.com/{job_id}", language=language, state=state, status=state,
+        platform_guess=platform, created_at=datetime(2026, 1, day), full_text="Hello ẹ kú àárọ̀",
+        segments=json.dumps(SEGMENTS), segment_count=len(SEGMENTS),
+        corrected_segments=json.dumps(corrected) if corrected else None,
+    ))
+    db.commit()
+
+
+@pytest.fixture
+def jobs(db):
+    add_job(db, "job-b", 2, corrected=[{**SEGMENTS[0], "text": " Hi"}, SEGMENTS[1]])
+    add_job(db, "job-a", 1)
+    add_job(db, "job-c", 3, state="failed")
+    add_job(db, "job-d", 4, language="yo", platform="tiktok")
+
+
+def ids(**filters):
+    args = {"created_from": None, "created_to": None, "state": None, "lang": None, "platform": None, **filters}
+    return [job.id for job in bulk_export.iter_bulk_jobs(**args)]
+
+
+def test_jobs_are_filtered_and_oldest_first(jobs):
+    assert ids() == ["job-a", "job-b", "job-c", "job-d"]
+    assert ids(state="completed") == ["job-a", "job-b", "job-d"]
+    assert ids(lang="yo") == ["job-d"]
+    assert ids(platform="youtube", created_from=datetime(2026, 1, 2), created_to=datetime(2026, 1, 3)) == ["job-b"]
+
+
+def test_jobs_stream_across_batches(jobs, monkeypatch):
+    monkeypatch.setattr(bulk_export, "BULK_EXPORT_BATCH_ROWS", 1)
+
+    assert ids() == ["job-a", "job-b", "job-c", "job-d"]
+
+
+def test_ndjson_has_one_record_per_job(jobs):
+    body = b"".join(bulk_export.iter_bulk_ndjson(bulk_export.iter_bulk_jobs(None, None, "completed", None, None)))
+
+    records = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert [r["job_id"] for r in records] == ["job-a", "job-b", "job-d"]
+    assert records[0]["segments"] == SEGMENTS and records[0]["corrected_segments"] is None
+    assert records[1]["corrected_segments"][0]["text"] == " Hi"
+    assert records[2]["language"] == "yo"
+
+
+def test_zip_holds_requested_files_per_job(jobs):
+    files = bulk_export.iter_bulk_files(bulk_export.iter_bulk_jobs(None, None, "completed", "en", None), ["csv", "json"])
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(exporters.iter_zip(files))))
+
+    assert archive.namelist() == ["job-a/transcript.csv", "job-a/transcript.json",
+                                  "job-b/transcript.csv", "job-b/transcript.json"]
+    assert json.loads(archive.read("job-a/transcript.json"))["full_text"] == "Hello ẹ kú àárọ̀"
+    # Corrected text wins in the per-job files
+    assert "Hi" in archive.read("job-b/transcript.csv").decode("utf-8-sig")
+    assert archive.read("job-b/transcript.csv") == exporters.csv_bytes(SEGMENTS, [{**SEGMENTS[0], "text": " Hi"},
+                                                                                   SEGMENTS[1]])
+
+
+def test_zip_srt_files(jobs):
+    files = dict(bulk_export.iter_bulk_files(bulk_export.iter_bulk_jobs(None, None, None, "yo", None), ["srt"]))
+
+    assert list(files) == ["job-d/transcript.srt"]
+    assert files["job-d/transcript.srt"].decode("utf-8").startswith("1\n00:00:00,000 --> 00:00:01,500\nHello")
@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+import exporters
+
+SEGMENTS = [{"start": 0.0, "end": 1.25, "text": " Hello"}, {"start": 1.25, "end": 3.0, "text": " world",
+                                                             "text_enhanced": "world (en)"}]
+
+
+def test_corrections_win_in_rows():
+    rows = list(exporters.transcript_rows(SEGMENTS, [{"text": " Hi"}, None]))
+
+    assert rows == [("0.00", "1.25", "1.25", "Hi", ""), ("1.25", "3.00", "1.75", "world", "world (en)")]
+
+
+def test_csv_streams_in_chunks():
+    chunks = list(exporters.iter_csv(exporters.transcript_rows(SEGMENTS), rows_per_chunk=1))
+
+    assert len(chunks) == 2 and chunks[0].startswith("\ufeffStart Time".encode("utf-8"))
+    assert b"".join(chunks) == exporters.csv_bytes(SEGMENTS)
+
+
+def test_srt_and_vtt_timestamps():
+    assert exporters.srt_text(SEGMENTS).startswith("1\n00:00:00,000 --> 00:00:01,250\nHello\n")
+    assert "00:00:01.250 --> 00:00:03.000\nworld" in exporters.vtt_text(SEGMENTS)
+
+
+def test_xlsx_appends_rows_straight_from_the_generator():
+    openpyxl = pytest.importorskip("openpyxl")
+    consumed = []
+
+    def rows():
+        for row in exporters.transcript_rows(SEGMENTS * 500):
+            consumed.append(row)
+            yield row
+
+    dest = io.BytesIO()
+    exporters.write_xlsx(rows(), dest)
+
+    sheet = openpyxl.load_workbook(io.BytesIO(dest.getvalue())).active
+    assert sheet.title == "Transcript"
+    assert [c.value for c in sheet[1]] == list(exporters.TRANSCRIPT_HEADER)
+    assert sheet.max_row == 1001 and len(consumed) == 1000
+    assert [c.value for c in sheet[3]] == ["1.25", "3.00", "1.75", "world", "world (en)"]
+    assert sheet.column_dimensions["A"].width == len("Start Time") + 2
+    assert sheet.column_dimensions["E"].width == len("MT Enhanced") + 2
+
+
+def test_xlsx_widths_come_from_the_leading_rows():
+    openpyxl = pytest.importorskip("openpyxl")
+    segments = [{"start": 0.0, "end": 1.0, "text": " a medium length line"},
+                {"start": 1.0, "end": 2.0, "text": " " + "x" * 200},
+                {"start": 2.0, "end": 3.0, "text": " " + "y" * 30}]
+
+    capped, sampled = io.BytesIO(), io.BytesIO()
+    exporters.write_xlsx(exporters.transcript_rows(segments), capped)
+    exporters.write_xlsx(exporters.transcript_rows(segments[::2]), sampled, sample_rows=1)
+
+    assert openpyxl.load_workbook(capped).active.column_dimensions["D"].width == exporters.XLSX_MAX_COLUMN_WIDTH
+    sheet = openpyxl.load_workbook(sampled).active
+    assert sheet.column_dimensions["D"].width == len("a medium length line") + 2
+    assert sheet.max_row == 3
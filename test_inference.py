@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import inference
+import model_registry
+from inference import PcmFile
+
+
+def finished(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def test_longform_chunks_reach_workers_as_files(monkeypatch):
+    monkeypatch.setattr(inference.pool, "backend", "process")
+    received = []
+
+    def submit(fn, audio, options, model, block=False, timeout=None):
+        assert isinstance(audio, PcmFile)
+        received.append((audio.path, len(audio.load())))
+        return finished({"language": "en", "segments": []})
+
+    monkeypatch.setattr(inference.pool, "submit", submit)
+    audio = (0.1 * np.random.default_rng(0).standard_normal(250 * inference.SAMPLE_RATE)).astype(np.float32)
+
+    inference.transcribe_longform_blocking(audio, language="en", chunk_seconds=90)
+
+    assert len(received) == 3
+    assert sum(length for _, length in received) == len(audio)
+    assert not any(os.path.exists(path) for path, _ in received)
+
+
+class FakeEngine:
+    def transcribe(self, audio, **options):
+        return {"text": "", "segments": []}
+
+    def nbytes(self):
+        return 1
+
+
+def test_warm_up_reaches_every_worker(monkeypatch):
+    # fork, so the fake torch and engine below reach the workers
+    fork = multiprocessing.get_context("fork")
+    monkeypatch.setattr(inference.multiprocessing, "get_context", lambda method=None: fork)
+    started = fork.Value("i", 0)
+
+    def set_num_threads(n):
+        # Every worker after the first starts slowly, so the first one is idle while they boot
+        with started.get_lock():
+            started.value += 1
+            late = started.value > 1
+        if late:
+            time.sleep(0.5)
+
+    monkeypatch.setitem(sys.modules, "torch", types.SimpleNamespace(set_num_threads=set_num_threads))
+    monkeypatch.setitem(model_registry._ENGINES, "fake", lambda size, quantization: FakeEngine())
+    pool = inference.InferencePool(workers=3, queue_size=0, model_name="fake:tiny", backend="process")
+    try:
+        pool.warm_up(["fake:small"])
+
+        registries = pool.stats()["model_registries"]
+        assert len({r["pid"] for r in registries}) == 3
+        assert all(set(r["models"]) == {"fake:tiny:none", "fake:small:none"} for r in registries)
+    finally:
+        pool.shutdown()
+
+
+def test_full_pool_refuses_with_retry_after(monkeypatch):
+    monkeypatch.setattr(inference, "_init_thread_backend", lambda *args: None)
+    pool = inference.InferencePool(workers=1, queue_size=1, retry_after=7, backend="threads")
+    release = threading.Event()
+    try:
+        running = [pool.submit(release.wait), pool.submit(release.wait)]
+
+        with pytest.raises(inference.InferenceQueueFull) as refused:
+            pool.submit(release.wait)
+        assert refused.value.status_code == 429 and refused.value.retry_after == 7
+        assert pool.stats()["in_flight"] == 2
+
+        release.set()
+        for future in running:
+            future.result(timeout=5)
+        pool.submit(release.wait).result(timeout=5)
+    finally:
+        release.set()
+        pool.shutdown()
+
+    with pytest.raises(inference.InferenceUnavailable) as unavailable:
+        pool.submit(release.wait)
+    assert unavailable.value.status_code == 503
@@ -0,0 +1,214 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import job_queue
+from database import SessionLocal, TranscriptionJob
+
+
+def add_job(db, job_id="job-1", state="accepted"):
+    db.add(TranscriptionJob(id=job_id, url="https://example.com/v", language="en",
+                            state=state, status=state, created_at=datetime.utcnow()))
+    db.commit()
+
+
+def load(job_id="job-1"):
+    db = SessionLocal()
+    try:
+        return db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+    finally:
+        db.close()
+
+
+def set_state(job_id, state):
+    db = SessionLocal()
+    try:
+        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+        job.state = state
+        job.status = state
+        db.commit()
+    finally:
+        db.close()
+
+
+def claim(worker_id):
+    db = SessionLocal()
+    try:
+        return job_queue.claim_next_job(db, worker_id)
+    finally:
+        db.close()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_DELAY_SECONDS", 0)
+    monkeypatch.setattr(job_queue, "JOB_POLL_INTERVAL_SECONDS", 0.01)
+
+
+def test_claim_is_exclusive(db):
+    add_job(db)
+
+    assert claim("worker-a") == ("job-1", "https://example.com/v", "en")
+    assert claim("worker-b") is None
+    assert load().lease_owner == "worker-a"
+
+
+def test_claim_skips_terminal_jobs(db):
+    add_job(db, state="completed")
+
+    assert claim("worker-a") is None
+
+
+def test_release_clears_lease_for_terminal_state(db):
+    add_job(db)
+    claim("worker-a")
+    set_state("job-1", "completed")
+
+    job_queue.release_lease("job-1", "worker-a")
+
+    job = load()
+    assert job.lease_owner is None and job.lease_expires_at is None
+
+
+def test_release_keeps_owner_for_unfinished_job(db):
+    add_job(db)
+    claim("worker-a")
+    set_state("job-1", "downloading")
+
+    job_queue.release_lease("job-1", "worker-a")
+    time.sleep(0.01)
+
+    assert load().lease_owner == "worker-a"
+    assert claim("worker-b") is not None
+    job = load()
+    assert job.lease_owner == "worker-b" and job.retry_count == 1
+
+
+def test_expired_lease_is_reclaimed_as_retry(db):
+    add_job(db)
+    claim("worker-a")
+    db.query(TranscriptionJob).update({"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    assert claim("worker-b") is not None
+    job = load()
+    assert job.lease_owner == "worker-b" and job.retry_count == 1
+
+
+def test_retries_exhausted_fails_job(db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_MAX_RETRIES", 2)
+    add_job(db)
+
+    for attempt in range(3):
+        assert claim(f"worker-{attempt}") is not None
+        set_state("job-1", "transcribing")
+        job_queue.release_lease("job-1", f"worker-{attempt}")
+        time.sleep(0.01)
+
+    assert claim("worker-last") is None
+    job = load()
+    assert job.state == "failed" and job.failure_code == "retries_exhausted"
+    assert job.lease_owner is None
+
+
+def test_worker_loop_stops_retrying_a_crashing_handler(db, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_MAX_RETRIES", 2)
+    add_job(db)
+    calls = []
+
+    def handler(job_id, url, lang, lease):
+        calls.append(job_id)
+        set_state(job_id, "downloading")
+        raise RuntimeError("boom")
+
+    stop = threading.Event()
+    thread = threading.Thread(target=job_queue.run_worker_loop, args=(handler, "worker-a", stop), daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while time.time() < deadline and load().state != "failed":
+        time.sleep(0.02)
+    stop.set()
+    thread.join(timeout=5)
+
+    job = load()
+    assert job.failure_code == "retries_exhausted"
+    assert len(calls) == 3  # first run + JOB_MAX_RETRIES retries
+
+
+def test_guarded_session_cannot_commit_after_takeover(db):
+    add_job(db)
+    claim("worker-a")
+    lease = job_queue.LeaseHeartbeat("job-1", "worker-a")
+    session = SessionLocal()
+    lease.guard(session)
+    try:
+        job = session.query(TranscriptionJob).filter(TranscriptionJob.id == "job-1").first()
+        job.state = "transcribing"
+        session.commit()  # still ours: renews the lease
+
+        # worker-b takes over after the lease expires
+        db.query(TranscriptionJob).update({"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        assert claim("worker-b") is not None
+
+        job.state = "completed"
+        job.status = "completed"
+        with pytest.raises(job_queue.LeaseLost):
+            session.commit()
+        session.rollback()
+    finally:
+        session.close()
+
+    assert lease.lost.is_set()
+    job = load()
+    assert job.state == "transcribing" and job.lease_owner == "worker-b"
+
+
+def test_enhancing_jobs_are_claimed_by_the_enhance_phase_only(db):
+    add_job(db, state="enhancing")
+
+    assert claim("worker-a") is None
+    db_session = SessionLocal()
+    try:
+        assert job_queue.claim_next_job(db_session, "mt-a", phase="enhance") is not None
+    finally:
+        db_session.close()
+    assert load().lease_owner == "mt-a"
+
+
+def test_handoff_to_enhance_releases_without_a_retry(db):
+    add_job(db)
+    claim("worker-a")
+    set_state("job-1", "transcribing")
+    job_queue.release_lease("job-1", "worker-a")
+    time.sleep(0.01)
+    assert claim("worker-b") is not None  # first retry
+    set_state("job-1", "enhancing")
+
+    job_queue.release_lease("job-1", "worker-b")
+
+    job = load()
+    assert job.lease_owner is None and job.retry_count == 0
+    db_session = SessionLocal()
+    try:
+        assert job_queue.claim_next_job(db_session, "mt-a", phase="enhance") is not None
+    finally:
+        db_session.close()
+    assert load().retry_count == 0
+
+
+def test_crashed_enhancement_counts_as_retry(db):
+    add_job(db, state="enhancing")
+    db_session = SessionLocal()
+    try:
+        job_queue.claim_next_job(db_session, "mt-a", phase="enhance")
+        job_queue.release_lease("job-1", "mt-a", phase="enhance")
+        time.sleep(0.01)
+        assert job_queue.claim_next_job(db_session, "mt-b", phase="enhance") is not None
+    finally:
+        db_session.close()
+
+    job = load()
+    assert job.lease_owner == "mt-b" and job.retry_count == 1
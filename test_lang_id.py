@@ -0,0 +1,78 @@
+import numpy as np
+
+import lang_id
+from lang_id import KeywordMatcher, confirm, from_probabilities
+
+KEYWORDS = {
+    "pidgin": ["wetin", "dey", "abeg", "how far", "na so"],
+    "yoruba": ["bawo", "e kaaro", "o dabo"],
+    "en": ["the", "how"],
+}
+APP_LANGUAGE_FOR = {"en": "en", "yo": "yoruba"}
+
+
+def detection(code="en", probability=0.9):
+    return {"whisper_language": code, "probability": probability, "candidates": {code: probability}}
+
+
+def test_matcher_counts_distinct_whole_word_phrases():
+    matcher = KeywordMatcher(KEYWORDS)
+
+    hits = matcher.hits("Abeg, wetin dey happen? Wetin dey? How far my guy, the thing dey.")
+
+    # "how far" wins over "how"; repeats of a phrase count once
+    assert hits == {"pidgin": 4, "en": 1}
+    assert matcher.hits("deyond thewetin") == {}
+    assert matcher.hits("") == {}
+
+
+def test_keyword_majority_overrides_whisper():
+    result = confirm(detection("en"), "wetin dey happen, abeg how far", KeywordMatcher(KEYWORDS), APP_LANGUAGE_FOR)
+
+    assert result["language"] == "pidgin" and result["confirmed"] is False
+    assert result["whisper_language"] == "en" and result["probability"] == 0.9
+
+
+def test_too_few_keywords_keep_whisper_language():
+    result = confirm(detection("en"), "abeg, wetin happened there", KeywordMatcher(KEYWORDS), APP_LANGUAGE_FOR)
+
+    assert result["language"] == "en" and result["confirmed"] is False
+
+
+def test_agreeing_keywords_confirm_detection():
+    result = confirm(detection("yo"), "e kaaro, bawo ni", KeywordMatcher(KEYWORDS), APP_LANGUAGE_FOR)
+
+    assert result["language"] == "yoruba" and result["confirmed"] is True
+
+
+def test_no_keywords_leaves_confirmation_open():
+    result = confirm(detection("fr"), "bonjour à tous", KeywordMatcher(KEYWORDS), APP_LANGUAGE_FOR)
+
+    assert result["language"] == "fr" and result["confirmed"] is None and result["keyword_hits"] == {}
+
+
+def test_from_probabilities_picks_the_most_likely_language():
+    result = from_probabilities({"en": 0.2, "yo": 0.712345, "ha": 0.05})
+
+    assert result["whisper_language"] == "yo" and result["probability"] == 0.7123
+    assert set(result["candidates"]) == {"en", "yo", "ha"}
+    assert from_probabilities({}) is None
+
+
+def test_speech_window_takes_the_leading_seconds():
+    speech = np.zeros(60 * lang_id.SAMPLE_RATE, dtype=np.float32)
+
+    assert len(lang_id.speech_window(speech, seconds=30)) == 30 * lang_id.SAMPLE_RATE
+    assert len(lang_id.speech_window(speech[:100], seconds=30)) == 100
+
+
+def test_detection_is_cached_per_audio_and_model():
+    audio = np.random.default_rng(0).standard_normal(16000).astype(np.float32)
+    key, cached = lang_id.lookup(audio, "small")
+    assert cached is None
+
+    lang_id.detection_cache.put(key, detection("yo"))
+
+    assert lang_id.lookup(audio, "small")[1]["whisper_language"] == "yo"
+    assert lang_id.lookup(audio, "medium")[1] is None
+    assert lang_id.lookup(audio * 0.5, "small")[1] is None
@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from live import SAMPLE_RATE, LiveSession, PcmDecoder
+
+
+def seg(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+
+def session_with(seconds, **kwargs):
+    session = LiveSession(**kwargs)
+    session.append(np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32))
+    return session
+
+
+def test_segments_near_the_edge_stay_partial():
+    session = session_with(6, stable_margin=1.5)
+    _, length = session.snapshot()
+
+    finals, partial = session.apply({"segments": [seg(0.0, 2.0, " one"), seg(2.0, 4.0, " two"),
+                                                  seg(4.0, 6.0, " three")]}, length)
+
+    assert [f["text"] for f in finals] == ["one", "two"]
+    assert partial == {"start": 4.0, "end": 6.0, "text": "three"}
+    # Finalized audio is trimmed; later times stay on the absolute timeline
+    assert session.buffer_start == 4.0
+    assert len(session.buffer) == 2 * SAMPLE_RATE
+    assert session.prompt() == " one two"
+
+
+def test_final_pass_commits_everything():
+    session = session_with(3)
+    _, length = session.snapshot()
+
+    finals, partial = session.apply({"segments": [seg(0.0, 1.0, " a"), seg(1.0, 3.0, " b")]}, length, final=True)
+
+    assert [f["text"] for f in finals] == ["a", "b"] and partial is None
+    assert len(session.buffer) == 0
+
+
+def test_full_buffer_forces_finalization():
+    session = session_with(10, stable_margin=1.5, max_buffer_seconds=10)
+    _, length = session.snapshot()
+
+    finals, partial = session.apply({"segments": [seg(0.0, 5.0, " long"), seg(5.0, 9.9, " tail")]}, length)
+
+    assert [f["text"] for f in finals] == ["long"]
+    assert partial["text"] == "tail"
+
+
+def test_one_unbroken_segment_cannot_grow_the_buffer_forever():
+    session = session_with(10, max_buffer_seconds=10)
+    _, length = session.snapshot()
+
+    finals, partial = session.apply({"segments": [seg(0.0, 10.0, " endless")]}, length)
+
+    assert finals == [] and partial["text"] == "endless"
+    assert len(session.buffer) == 5 * SAMPLE_RATE
+
+
+def test_skip_silence_keeps_a_margin():
+    session = session_with(4, stable_margin=1.5)
+    _, length = session.snapshot()
+
+    session.skip_silence(length)
+
+    assert len(session.buffer) == int(1.5 * SAMPLE_RATE)
+    assert session.pending_seconds() == 0
+
+
+def test_pcm_s16le_carries_partial_samples_across_frames():
+    decoder = PcmDecoder("pcm_s16le")
+    samples = np.array([0, 16384, -16384, 32767], dtype=np.int16).tobytes()
+
+    first = asyncio.run(decoder.feed(samples[:3]))
+    second = asyncio.run(decoder.feed(samples[3:]))
+
+    np.testing.assert_allclose(np.concatenate([first, second]), [0.0, 0.5, -0.5, 32767 / 32768])
+
+
+def test_pcm_is_resampled_to_16k():
+    decoder = PcmDecoder("pcm_f32le", sample_rate=48000)
+
+    audio = asyncio.run(decoder.feed(np.ones(4800, dtype=np.float32).tobytes()))
+
+    assert len(audio) == 1600 and audio.dtype == np.float32
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        PcmDecoder("mp3")
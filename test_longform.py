@@ -0,0 +1,63 @@
+import numpy as np
+
+from longform import SAMPLE_RATE, split_on_silence, stitch_segments
+
+
+def noise(seconds, level=0.1):
+    rng = np.random.default_rng(0)
+    return (level * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_short_audio_is_one_chunk():
+    audio = noise(50)
+    assert split_on_silence(audio, chunk_seconds=45, search_seconds=10) == [(0, len(audio))]
+
+
+def test_chunks_cover_the_audio_and_cut_in_silence():
+    # ~238 s of "speech" with one-second gaps at 93 s and 187 s
+    audio = np.concatenate([noise(93), silence(1), noise(93), silence(1), noise(50)])
+
+    chunks = split_on_silence(audio, chunk_seconds=90, search_seconds=10)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    cuts = [end / SAMPLE_RATE for _, end in chunks[:-1]]
+    assert len(cuts) == 2
+    assert 93 <= cuts[0] <= 94 and 187 <= cuts[1] <= 188
+
+
+def test_stitch_offsets_timestamps_and_drops_repeated_words():
+    chunks = [
+        {"language": "en", "segments": [{"start": 0.0, "end": 4.0, "text": " we went to the market"}]},
+        {"language": "en", "segments": [{"start": 0.0, "end": 1.0, "text": " the market, and then home"},
+                                        {"start": 1.0, "end": 3.0, "text": " after dark"}]},
+    ]
+
+    result = stitch_segments(chunks, [0.0, 90.0])
+
+    assert result["language"] == "en"
+    assert [(s["start"], s["end"]) for s in result["segments"]] == [(0.0, 4.0), (90.0, 91.0), (91.0, 93.0)]
+    assert result["segments"][1]["text"] == " and then home"
+    assert result["text"] == " we went to the market and then home after dark"
+
+
+def test_stitch_drops_a_chunk_that_only_repeats():
+    chunks = [
+        {"language": "yo", "segments": [{"start": 0.0, "end": 2.0, "text": " e kaaro"}]},
+        {"language": "yo", "segments": [{"start": 0.0, "end": 0.5, "text": " kaaro"}]},
+    ]
+
+    result = stitch_segments(chunks, [0.0, 60.0])
+
+    assert len(result["segments"]) == 1
+
+
+def test_stitch_takes_language_from_first_chunk_with_speech():
+    chunks = [{"language": "en", "segments": []},
+              {"language": "fr", "segments": [{"start": 0.0, "end": 1.0, "text": " bonjour"}]}]
+
+    assert stitch_segments(chunks, [0.0, 90.0])["language"] == "fr"
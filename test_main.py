@@ -0,0 +1,215 @@
+import json
+import os
+import tomllib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from cache_utils import LRUCache
+from database import TranscriptionJob
+from inference import SAMPLE_RATE, InferenceQueueFull, InferenceUnavailable
+from media import MediaInfo
+from model_registry import ModelSpec
+
+
+def test_backpressure_maps_to_status_and_retry_after():
+    busy = main.inference_backpressure_error(InferenceQueueFull("full", retry_after=7), "req-1")
+    down = main.inference_backpressure_error(InferenceUnavailable("down", retry_after=30))
+
+    assert busy.status_code == 429 and busy.headers == {"Retry-After": "7"}
+    assert busy.detail == {"error": "inference_busy", "message": "full", "request_id": "req-1"}
+    assert down.status_code == 503 and down.headers == {"Retry-After": "30"}
+    assert down.detail["error"] == "inference_unavailable"
+
+
+def add_job(db, job_id, state, lang="en", model=None, completed_ago=None, media_key="youtube:abc123"):
+    now = datetime.utcnow()
+    db.add(TranscriptionJob(id=job_id, url="https://youtu.be/abc123", media_key=media_key, language=lang,
+                            whisper_model=model or ModelSpec.parse(None).key, state=state, status=state,
+                            created_at=now, completed_at=now - completed_ago if completed_ago else None))
+    db.commit()
+
+
+def test_in_flight_job_is_reused_for_the_same_language_and_model(db):
+    add_job(db, "job-1", "transcribing")
+
+    assert main.find_reusable_job(db, "youtube:abc123", "en", ModelSpec.parse(None).key).id == "job-1"
+    assert main.find_reusable_job(db, "youtube:abc123", "yoruba", ModelSpec.parse(None).key) is None
+    assert main.find_reusable_job(db, "youtube:abc123", "en", ModelSpec.parse("small:int8").key) is None
+    assert main.find_reusable_job(db, "youtube:other", "en", ModelSpec.parse(None).key) is None
+
+
+def test_completed_job_is_reused_inside_the_freshness_window(db, monkeypatch):
+    monkeypatch.setattr(main, "RESULT_REUSE_SECONDS", 3600)
+    add_job(db, "job-stale", "completed", completed_ago=timedelta(hours=2))
+    add_job(db, "job-fresh", "completed", completed_ago=timedelta(minutes=5))
+    add_job(db, "job-failed", "failed")
+
+    assert main.find_reusable_job(db, "youtube:abc123", "en", ModelSpec.parse(None).key).id == "job-fresh"
+
+    monkeypatch.setattr(main, "RESULT_REUSE_SECONDS", 0)
+    assert main.find_reusable_job(db, "youtube:abc123", "en", ModelSpec.parse(None).key) is None
+
+
+def test_submissions_of_one_video_share_a_job(db):
+    client = TestClient(main.app)
+
+    first = client.post("/submit", json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42"}).json()
+    second = client.post("/submit", json={"url": "https://youtu.be/dQw4w9WgXcQ"}).json()
+    other_lang = client.post("/submit", json={"url": "https://youtu.be/dQw4w9WgXcQ", "lang": "yoruba"}).json()
+
+    assert first["reused"] is False and first["state"] == "accepted"
+    assert second["reused"] is True and second["job_id"] == first["job_id"]
+    assert other_lang["reused"] is False and other_lang["job_id"] != first["job_id"]
+    assert db.query(TranscriptionJob).filter_by(id=first["job_id"]).one().media_key == "youtube:dQw4w9WgXcQ"
+
+
+def stream_events(client, body):
+    events = []
+    with client.stream("POST", "/transcribe/stream", json=body) as response:
+        for message in response.read().decode("utf-8").split("\n\n"):
+            if message:
+                event, data = message.split("\n", 1)
+                events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def fetched_media(monkeypatch):
+    audio = (0.1 * np.random.default_rng(0).standard_normal(40 * SAMPLE_RATE)).astype(np.float32)
+    media = MediaInfo(path=None, streams=[{"codec_name": "aac", "sample_rate": "16000"}], duration=40.0, pcm=audio)
+
+    async def fetch_request_media(request, db, request_id):
+        return media, None
+
+    monkeypatch.setattr(main, "fetch_request_media", fetch_request_media)
+    monkeypatch.setattr(main, "speech_only", lambda pcm: (pcm, [(0.0, 0.0, len(pcm) / SAMPLE_RATE)]))
+    return audio
+
+
+def test_stream_emits_each_chunk_in_order(db, fetched_media, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CHUNK_SECONDS", 10)
+
+    async def transcribe_async(audio, language=None, model=None):
+        return {"language": language, "segments": [
+            {"start": 0.0, "end": len(audio) / SAMPLE_RATE, "text": f" {len(audio) // SAMPLE_RATE}s"}]}
+
+    monkeypatch.setattr(main, "transcribe_async", transcribe_async)
+
+    events = stream_events(TestClient(main.app), {"file_path": "clip.wav", "lang": "en"})
+
+    assert [data["stage"] for _, data in events[:3]] == ["downloading", "probing", "transcribing"]
+    segments = [data for name, data in events[3:-1] if name == "segment"]
+    assert len(segments) == len(events) - 4 > 1
+    # One segment per chunk, back to back on the original timeline
+    assert segments[0]["start"] == 0.0 and segments[-1]["end"] == pytest.approx(40.0)
+    assert all(a["end"] == pytest.approx(b["start"]) for a, b in zip(segments, segments[1:]))
+    assert events[-1][0] == "done" and events[-1][1]["segment_count"] == len(segments)
+
+
+def test_stream_replays_a_cached_transcript(db, fetched_media, monkeypatch):
+    cached = {"text": " hello there", "language": "en",
+              "segments": [{"start": 0.0, "end": 2.0, "text": " hello"}, {"start": 2.0, "end": 4.0, "text": " there"}]}
+    main.store_cached_transcription(main.lookup_cached_transcription(fetched_media, "en")[0], cached, "en")
+
+    async def transcribe_async(*args, **kwargs):
+        raise AssertionError("a cached transcript must not reach the inference pool")
+
+    monkeypatch.setattr(main, "transcribe_async", transcribe_async)
+
+    events = stream_events(TestClient(main.app), {"file_path": "clip.wav", "lang": "en"})
+
+    assert [data for name, data in events if name == "segment"] == cached["segments"]
+    assert events[-1][0] == "done" and events[-1][1]["full_text"] == " hello there"
+
+
+class FakeYdl:
+    def __init__(self):
+        self.extractions = 0
+
+    def extract_info(self, url, download=False):
+        self.extractions += 1
+        return {"id": "dQw4w9WgXcQ", "extractor_key": "Youtube", "title": f"extraction {self.extractions}"}
+
+    def sanitize_info(self, info):
+        return info
+
+
+def ydl_opts(**opts):
+    return {"format": "bestaudio/best", "http_headers": {"User-Agent": "test"}, **opts}
+
+
+@pytest.fixture
+def info_cache(monkeypatch):
+    cache = LRUCache(1024 * 1024, sizeof=len, ttl_seconds=60)
+    monkeypatch.setattr(main, "ydl_info_cache", cache)
+    return cache
+
+
+def test_info_cache_hit_for_another_url_of_the_same_video(info_cache):
+    ydl = FakeYdl()
+
+    first = main.ydl_extract_info(ydl, "https://www.youtube.com/watch?v=dQw4w9WgXcQ", ydl_opts())
+    first["title"] = "mutated by the caller"
+    second = main.ydl_extract_info(ydl, "https://youtu.be/dQw4w9WgXcQ", ydl_opts())
+
+    assert ydl.extractions == 1 and second["title"] == "extraction 1"
+    assert info_cache.stats()["hits"] == 1
+
+
+def test_info_cache_misses_on_other_cookies_or_format(info_cache):
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    ydl = FakeYdl()
+    main.ydl_extract_info(ydl, url, ydl_opts())
+
+    for opts in (ydl_opts(http_headers={"Cookie": "sessionid=abc"}), ydl_opts(cookiefile="/tmp/cookies.txt"),
+                 ydl_opts(format="worstaudio")):
+        main.ydl_extract_info(ydl, url, opts)
+    main.ydl_extract_info(ydl, url, ydl_opts())
+
+    assert ydl.extractions == 4 and info_cache.stats()["hits"] == 1
+    assert "abc" not in repr(main.ydl_info_cache_key(url, ydl_opts(http_headers={"Cookie": "sessionid=abc"})))
+
+
+@pytest.fixture
+def cold(monkeypatch):
+    monkeypatch.setattr(main, "_readiness", {"ready": False, "state": "cold", "warm_seconds": None, "error": None})
+    return TestClient(main.app)
+
+
+def test_ready_waits_for_warm_start(cold, monkeypatch):
+    warmed = []
+    monkeypatch.setattr(main.inference_pool, "warm_up", warmed.append)
+
+    assert cold.get("/ready").status_code == 503
+    assert cold.get("/live").status_code == 200
+
+    main.warm_start()
+
+    response = cold.get("/ready")
+    assert response.status_code == 200 and response.json()["state"] == "warm"
+    assert warmed == [main.WARM_START_MODELS]
+
+
+def test_failed_warm_start_stays_unready(cold, monkeypatch):
+    def warm_up(models):
+        raise InferenceUnavailable("Transcription worker crashed during warm-up.")
+
+    monkeypatch.setattr(main.inference_pool, "warm_up", warm_up)
+
+    main.warm_start()
+
+    response = cold.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["state"] == "failed" and "InferenceUnavailable" in response.json()["error"]
+
+
+def test_fly_routes_on_readiness_with_warm_start():
+    with open(os.path.join(os.path.dirname(__file__), "fly.toml"), "rb") as f:
+        fly = tomllib.load(f)
+
+    assert fly["env"]["WARM_START"] == "1"
+    assert [check["path"] for check in fly["http_service"]["checks"]] == ["/ready"]
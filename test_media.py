@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+import inference
+import media
+
+REPORT = """Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':
+  Duration: {duration}, start: 0.000000, bitrate: 128 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High), yuv420p, 1280x720, 25 fps
+  Stream #0:1[0x2](eng): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, stereo, fltp, 128 kb/s
+Stream mapping:
+  Stream #0:1 -> #0:0 (aac (native) -> pcm_s16le (native))
+Output #0, s16le, to 'pipe:1':
+"""
+
+
+def fake_ffmpeg(monkeypatch, duration, samples, then_hang=False):
+    """Point decode_command at a script that prints ``REPORT`` and writes ``samples`` as s16le."""
+    script = (
+        "import sys, time\n"
+        f"sys.stderr.write({REPORT.format(duration=duration)!r}); sys.stderr.flush()\n"
+        f"sys.stdout.buffer.write(bytes({samples.astype('<i2').tobytes()!r})); sys.stdout.flush()\n"
+        f"{'time.sleep(30)' if then_hang else ''}\n"
+    )
+    monkeypatch.setattr(media, "decode_command", lambda source, sr=media.SAMPLE_RATE: [sys.executable, "-c", script])
+
+
+def test_parse_report_reads_duration_and_audio_streams():
+    report = media.parse_report(REPORT.format(duration="01:02:03.50"))
+
+    assert report["duration"] == 3723.5
+    assert report["streams"] == [{"index": 1, "codec_name": "aac", "sample_rate": 44100, "channel_layout": "stereo"}]
+
+
+def test_missing_audio_stream_is_reported():
+    info = media.build_media_info("clip.mp4", b"", "Stream map '0:a:0' matches no streams.", 1, {})
+
+    assert info.failure == "no_audio_stream" and not info.has_audio
+
+
+def test_pcm_is_scaled_like_whisper_load_audio():
+    samples = np.array([0, 16384, -32768, 32767], dtype=np.int16)
+
+    info = media.build_media_info(None, samples.tobytes(), "", 0, {})
+
+    assert info.pcm.dtype == np.float32
+    np.testing.assert_array_equal(info.pcm, samples.astype(np.float32) / 32768.0)
+    assert info.duration == 4 / media.SAMPLE_RATE
+
+
+def test_inspect_media_decodes_within_limit(monkeypatch):
+    fake_ffmpeg(monkeypatch, "00:00:02.00", np.arange(100, dtype=np.int16))
+
+    info = media.inspect_media("clip.mp4", max_duration=60)
+
+    assert info.ok and len(info.pcm) == 100
+    assert info.duration == 2.0 and info.codec == "aac"
+
+
+def test_inspect_media_rejects_long_media_before_decoding(monkeypatch):
+    fake_ffmpeg(monkeypatch, "04:00:00.00", np.arange(100, dtype=np.int16), then_hang=True)
+
+    started = time.time()
+    info = media.inspect_media("clip.mp4", max_duration=3 * 3600)
+
+    assert time.time() - started < 10  # ffmpeg was killed, not waited out
+    assert info.failure == "too_long" and info.pcm is None
+    assert info.duration == 4 * 3600 and info.has_audio
+
+
+def test_long_arrays_reach_process_workers_as_files(monkeypatch):
+    monkeypatch.setattr(inference.pool, "backend", "process")
+    audio = np.linspace(-1, 1, int(inference.INFERENCE_SPILL_SECONDS * inference.SAMPLE_RATE), dtype=np.float32)
+
+    shipped = inference._ship(audio)
+    try:
+        assert isinstance(shipped, inference.PcmFile)
+        np.testing.assert_array_equal(shipped.load(), audio)
+    finally:
+        inference._discard(shipped)
+    assert not os.path.exists(shipped.path)
+
+    short = audio[:100]
+    assert inference._ship(short) is short
+
+
+def test_thread_backend_shares_arrays(monkeypatch):
+    monkeypatch.setattr(inference.pool, "backend", "threads")
+    audio = np.zeros(int(inference.INFERENCE_SPILL_SECONDS * inference.SAMPLE_RATE), dtype=np.float32)
+
+    assert inference._ship(audio) is audio
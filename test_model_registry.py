@@ -0,0 +1,67 @@
+import builtins
+
+import pytest
+
+import model_registry
+from model_registry import ModelSpec
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    path = tmp_path / "config.yaml"
+    monkeypatch.setattr(model_registry, "_CONFIG_PATH", str(path))
+    monkeypatch.delenv("WHISPER_MODEL", raising=False)
+    return path
+
+
+def test_default_model_precedence(config, monkeypatch):
+    pytest.importorskip("yaml")
+    assert model_registry._configured_default_model() == "base"
+
+    config.write_text("whisper:\n  model: small\n")
+    assert model_registry._configured_default_model() == "small"
+
+    monkeypatch.setenv("WHISPER_MODEL", "medium")
+    assert model_registry._configured_default_model() == "medium"
+
+
+def test_config_without_pyyaml_warns(config, monkeypatch, caplog):
+    config.write_text("whisper:\n  model: small\n")
+    real_import = builtins.__import__
+
+    def no_yaml(name, *args, **kwargs):
+        if name == "yaml":
+            raise ImportError("No module named 'yaml'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_yaml)
+
+    assert model_registry._configured_default_model() == "base"
+    assert "PyYAML is not installed" in caplog.text
+
+
+@pytest.mark.parametrize("value, spec", [
+    ("small", ModelSpec(size="small")),
+    ("small:int8", ModelSpec(size="small", quantization="int8")),
+    ("whisper:small", ModelSpec(size="small")),
+    ("whisper:small:int8", ModelSpec(size="small", quantization="int8")),
+    ("other:large", ModelSpec(engine="other", size="large")),
+])
+def test_spec_parse(value, spec):
+    assert ModelSpec.parse(value) == spec
+
+
+def test_spec_parse_falls_back_to_the_default():
+    assert ModelSpec.parse(None) == ModelSpec.parse(model_registry.DEFAULT_MODEL)
+
+
+def test_is_allowed(monkeypatch):
+    monkeypatch.setattr(model_registry, "ALLOWED_MODELS", ("tiny", "small"))
+    monkeypatch.setattr(model_registry, "DEFAULT_MODEL", "base")
+
+    assert model_registry.is_allowed(None)
+    assert model_registry.is_allowed("small") and model_registry.is_allowed("whisper:tiny:int8")
+    assert model_registry.is_allowed("base")  # the default, though not listed
+    assert not model_registry.is_allowed("large")
+    assert not model_registry.is_allowed("small:fp4")
+    assert not model_registry.is_allowed("other:small")
@@ -0,0 +1,40 @@
+import json
+from types import SimpleNamespace
+
+import mt_enhance
+
+LANGUAGES = {"yoruba", "pidgin", "hausa"}
+
+
+def job(language="yoruba", detected_mt=None, segments=({"start": 0.0, "end": 1.0, "text": " e kaaro"},)):
+    return SimpleNamespace(language=language, detected_mt=detected_mt,
+                           segments=json.dumps(list(segments)) if segments is not None else None)
+
+
+def test_needs_mt_enhancement(monkeypatch):
+    monkeypatch.setattr(mt_enhance, "MT_ENHANCE_ENABLED", True)
+
+    assert mt_enhance.needs_mt_enhancement(job(), LANGUAGES)
+    assert not mt_enhance.needs_mt_enhancement(job(language="en"), LANGUAGES)
+    assert not mt_enhance.needs_mt_enhancement(job(segments=None), LANGUAGES)
+    # lang="auto": the detected app language decides
+    assert mt_enhance.needs_mt_enhancement(job(language="auto", detected_mt="pidgin"), LANGUAGES)
+    assert not mt_enhance.needs_mt_enhancement(job(language="auto", detected_mt="en"), LANGUAGES)
+
+
+def test_needs_mt_enhancement_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(mt_enhance, "MT_ENHANCE_ENABLED", False)
+
+    assert not mt_enhance.needs_mt_enhancement(job(), LANGUAGES)
+
+
+def test_batches_respect_the_padded_token_budget():
+    lengths = [5, 40, 6, 7, 38, 100, 5]
+
+    batches = mt_enhance.plan_batches(lengths, token_budget=80)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 80
+    # Short rows share a batch instead of being padded to the long ones
+    assert [0, 6, 2, 3] in batches and [5] in batches
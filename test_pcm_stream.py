@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from pcm_stream import DISKLESS_MAX_BYTES, ydl_source  # noqa: E402
+
+FORMAT_URL = "https://rr1.googlevideo.com/videoplayback?id=1"
+
+
+def info(**extra):
+    return {"_type": "video", "protocol": "https", "url": FORMAT_URL, "filesize": 1024,
+            "http_headers": {"User-Agent": "UA", "Accept": "*/*"}, **extra}
+
+
+class FakeJar:
+    def __init__(self, header):
+        self.header = header
+        self.urls = []
+
+    def get_cookie_header(self, url):
+        self.urls.append(url)
+        return self.header
+
+
+def test_plain_format_keeps_its_headers():
+    assert ydl_source(info()) == (FORMAT_URL, {"User-Agent": "UA", "Accept": "*/*"})
+
+
+def test_jar_cookies_for_the_format_url_are_forwarded():
+    jar = FakeJar("SID=abc; HSID=def")
+
+    url, headers = ydl_source(info(), jar)
+
+    assert jar.urls == [FORMAT_URL]
+    assert headers["Cookie"] == "SID=abc; HSID=def" and headers["User-Agent"] == "UA"
+
+
+def test_format_cookies_are_forwarded():
+    cookies = "VISITOR=v1; Domain=.youtube.com; Path=/; Secure; Expires=Fri, 17 Oct 2027 00:00:00 GMT; PREF=f6=40"
+
+    _, headers = ydl_source(info(cookies=cookies, http_headers={"Cookie": "sessionid=ig"}), FakeJar(""))
+
+    assert headers["Cookie"] == "sessionid=ig; VISITOR=v1; PREF=f6=40"
+
+
+def test_unparseable_cookies_fall_back_to_disk():
+    assert ydl_source(info(cookies="not a cookie")) is None
+
+
+def test_formats_that_cannot_stream_fall_back_to_disk():
+    assert ydl_source(info(protocol="m3u8_native")) is None
+    assert ydl_source(info(requested_formats=[{}, {}])) is None
+    assert ydl_source(info(filesize=DISKLESS_MAX_BYTES + 1)) is None
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import renditions
+from database import JobRendition, RenditionBlob
+
+TEXT_FORMATS = ("csv", "srt", "vtt", "json")
+
+
+def record(job_id="job-1", text=" Hello there", corrected=None):
+    return {"job_id": job_id, "segments": [{"start": 0.0, "end": 2.0, "text": text}],
+            "corrected_segments": corrected, "full_text": text}
+
+
+@pytest.fixture
+def cache(db):
+    return renditions.RenditionCache(memory_bytes=1024 * 1024)
+
+
+def test_render_all_renders_each_format():
+    rendered = renditions.render_all(record(), TEXT_FORMATS)
+
+    assert set(rendered) == set(TEXT_FORMATS)
+    assert json.loads(rendered["json"])["job_id"] == "job-1"
+    assert rendered["vtt"].startswith(b"WEBVTT")
+    assert b"Hello there" in rendered["srt"]
+
+
+def test_render_all_skips_a_failing_format(monkeypatch):
+    real_render = renditions.render
+
+    def render(fmt, rec):
+        if fmt == "xlsx":
+            raise ImportError("No module named 'openpyxl'")
+        return real_render(fmt, rec)
+
+    monkeypatch.setattr(renditions, "render", render)
+
+    assert set(renditions.render_all(record())) == {"csv", "srt", "vtt", "json"}
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        renditions.render("docx", record())
+
+
+def test_etag_is_the_content_sha(cache):
+    rendered = renditions.render_all(record(), TEXT_FORMATS)
+
+    shas = cache.store("job-1", rendered)
+
+    for fmt, content in rendered.items():
+        assert cache.etag("job-1", fmt) == shas[fmt] == renditions.content_sha(content)
+        assert cache.content(shas[fmt]) == content
+    assert cache.etag("job-1", "xlsx") is None
+    assert cache.etag("job-2", "csv") is None
+
+
+def test_correction_changes_etag_and_drops_old_blob(cache, db):
+    before = cache.store("job-1", renditions.render_all(record(), TEXT_FORMATS))
+
+    corrected = record(corrected=[{"start": 0.0, "end": 2.0, "text": " Hello, there!"}])
+    after = cache.store("job-1", renditions.render_all(corrected, TEXT_FORMATS))
+
+    assert after["srt"] != before["srt"] and cache.etag("job-1", "srt") == after["srt"]
+    assert db.get(RenditionBlob, before["srt"]) is None
+    assert cache.content(before["srt"]) is None
+    assert b"Hello, there!" in cache.content(after["srt"])
+
+
+def test_identical_files_share_one_blob(cache, db):
+    first = cache.store("job-1", renditions.render_all(record("job-1"), ("srt",)))
+    second = cache.store("job-2", renditions.render_all(record("job-2"), ("srt",)))
+
+    assert first["srt"] == second["srt"]
+    assert db.query(RenditionBlob).count() == 1
+
+    cache.invalidate("job-1")
+
+    assert cache.etag("job-1", "srt") is None
+    assert cache.etag("job-2", "srt") == second["srt"]
+    assert db.get(RenditionBlob, second["srt"]) is not None
+
+
+def test_invalidate_removes_unshared_blobs(cache, db):
+    cache.store("job-1", renditions.render_all(record(), TEXT_FORMATS))
+
+    cache.invalidate("job-1")
+
+    assert db.query(JobRendition).count() == 0 and db.query(RenditionBlob).count() == 0
+    assert cache.stats()["invalidated"] == 1 and cache.stats()["blobs_deleted"] == len(TEXT_FORMATS)
@@ -1,12 +1,70 @@
 #!/usr/bin/env python3
-"""Test if the app can start without errors"""
+"""Test if the app can start without errors, quickly and without heavy imports"""
 
+import json
+import os
+import subprocess
 import sys
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cold-start budgets (Fly.io scale-from-zero and health-check timeouts). Override via env.
+STARTUP_IMPORT_BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET_SECONDS", "3.0"))
+STARTUP_HEALTH_BUDGET_SECONDS = float(os.environ.get("STARTUP_HEALTH_BUDGET_SECONDS", "4.0"))
+STARTUP_RSS_BUDGET_MB = float(os.environ.get("STARTUP_RSS_BUDGET_MB", "250"))
+
+# Must only be imported by the code paths that need them, never by `import main`.
+HEAVY_MODULES = ("torch", "transformers", "pandas", "whisper", "pydub")
+
+# Runs in a fresh interpreter under `python -X importtime`.
+_PROBE = f"""
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter() - started
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/health").status_code
+healthy = time.perf_counter() - started
+print(json.dumps({{
+    "import_seconds": imported,
+    "health_seconds": healthy,
+    "health_status": status,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def slowest_imports(importtime_report: str, top: int = 8):
+    """(cumulative seconds, package) for the slowest top-level imports in a -X importtime report."""
+    rows = []
+    for line in importtime_report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit() or name[1:2] == " ":
+            continue  # header or nested import
+        rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def cold_start_benchmark() -> dict:
+    env = {**os.environ, "EMBEDDED_JOB_WORKERS": "0", "WARM_START": "0"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        capture_output=True, text=True, env=env, timeout=120,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"cold-start probe failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["slowest_imports"] = slowest_imports(completed.stderr)
+    return result
+
+
 try:
     logger.info("Testing import of main module...")
     import main
@@ -21,6 +79,26 @@ try:
     engine.connect()
     logger.info("✅ Database connection successful")
 
+    logger.info("Benchmarking cold start (python -X importtime)...")
+    bench = cold_start_benchmark()
+    for seconds, package in bench["slowest_imports"]:
+        logger.info(f"   {seconds * 1000:8.1f} ms  {package}")
+    logger.info(f"   import main: {bench['import_seconds']:.2f}s | first /health: {bench['health_seconds']:.2f}s "
+                f"| RSS: {bench['rss_mb']:.0f} MB")
+    problems = []
+    if bench["heavy_modules"]:
+        problems.append(f"heavy modules imported at startup: {', '.join(bench['heavy_modules'])}")
+    if bench["import_seconds"] > STARTUP_IMPORT_BUDGET_SECONDS:
+        problems.append(f"import main took {bench['import_seconds']:.2f}s (budget {STARTUP_IMPORT_BUDGET_SECONDS}s)")
+    if bench["health_status"] != 200 or bench["health_seconds"] > STARTUP_HEALTH_BUDGET_SECONDS:
+        problems.append(f"/health answered {bench['health_status']} after {bench['health_seconds']:.2f}s "
+                        f"(budget {STARTUP_HEALTH_BUDGET_SECONDS}s)")
+    if bench["rss_mb"] > STARTUP_RSS_BUDGET_MB:
+        problems.append(f"baseline RSS {bench['rss_mb']:.0f} MB (budget {STARTUP_RSS_BUDGET_MB:.0f} MB)")
+    if problems:
+        raise RuntimeError("cold-start regression: " + "; ".join(problems))
+    logger.info("✅ Cold start within budget")
+
     logger.info("\n🎉 All startup tests passed!")
     sys.exit(0)
 
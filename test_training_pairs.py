@@ -0,0 +1,93 @@
+import json
+from datetime import datetime, timedelta
+
+import training_pairs
+from database import TrainingPair, TranscriptionJob
+
+ORIGINAL = [{"start": 0.0, "end": 1.0, "text": " how far"}, {"start": 1.0, "end": 2.0, "text": " I dey"},
+            {"start": 2.0, "end": 3.0, "text": " fine"}]
+
+
+def corrected_job(job_id="job-1", corrected=None):
+    corrected = corrected or [{**ORIGINAL[0], "text": " How far?"}, ORIGINAL[1], {**ORIGINAL[2], "text": " fine o"}]
+    return TranscriptionJob(id=job_id, url="https://example.com/v", status="completed", detected_language="en",
+                            segments=json.dumps(ORIGINAL), corrected_segments=json.dumps(corrected),
+                            corrected_at=datetime.utcnow())
+
+
+def add_pairs(db, count, age_seconds=3600):
+    created = datetime.utcnow() - timedelta(seconds=age_seconds)
+    db.add_all([TrainingPair(job_id="job-1", segment_index=i, original="a", corrected="b", created_at=created)
+                for i in range(count)])
+    db.commit()
+    return [pair_id for (pair_id,) in db.query(TrainingPair.id).order_by(TrainingPair.id)]
+
+
+def test_diff_pairs_keeps_changed_segments_only():
+    pairs = training_pairs.diff_pairs(corrected_job())
+
+    assert [(p.segment_index, p.original, p.corrected) for p in pairs] == [
+        (0, " how far", " How far?"), (2, " fine", " fine o")]
+    assert pairs[0].timestamp_start == 0.0 and pairs[0].language == "en"
+
+
+def test_recorrection_replaces_pairs_with_new_ids(db):
+    job = corrected_job()
+    training_pairs.replace_for_job(db, job)
+    db.commit()
+    first_ids = {p.id for p in db.query(TrainingPair)}
+
+    job.corrected_segments = json.dumps([{**ORIGINAL[0], "text": " How far"}, ORIGINAL[1], ORIGINAL[2]])
+    assert training_pairs.replace_for_job(db, job) == 1
+    db.commit()
+
+    rows = db.query(TrainingPair).all()
+    assert len(rows) == 1 and rows[0].id > max(first_ids)
+
+
+def test_pages_walk_every_row_once(db):
+    ids = add_pairs(db, 5)
+
+    since, seen = 0, []
+    while True:
+        last_id, count = training_pairs.page_end(db, since, 2)
+        if last_id is None:
+            break
+        seen += [json.loads(line)["id"] for line in b"".join(training_pairs.iter_ndjson(since, last_id)).splitlines()]
+        since = last_id
+
+    assert seen == ids
+
+
+def test_page_stops_before_unsettled_rows(db):
+    old = add_pairs(db, 2)
+    db.add(TrainingPair(job_id="job-2", segment_index=0, original="c", corrected="d", created_at=datetime.utcnow()))
+    db.commit()
+
+    assert training_pairs.page_end(db, 0, 10, settle_seconds=60) == (old[-1], 2)
+    assert training_pairs.page_end(db, old[-1], 10, settle_seconds=60) == (None, 0)
+    # Once the window has passed the row is exported
+    assert training_pairs.page_end(db, old[-1], 10, settle_seconds=0)[1] == 1
+
+
+def test_settled_rows_behind_an_unsettled_one_wait(db):
+    # An in-flight transaction's row (young) sits between two settled ids
+    db.add(TrainingPair(job_id="job-1", segment_index=0, created_at=datetime.utcnow() - timedelta(hours=1)))
+    db.add(TrainingPair(job_id="job-1", segment_index=1, created_at=datetime.utcnow()))
+    db.add(TrainingPair(job_id="job-1", segment_index=2, created_at=datetime.utcnow() - timedelta(hours=1)))
+    db.commit()
+    first_id = db.query(TrainingPair.id).order_by(TrainingPair.id).first()[0]
+
+    assert training_pairs.page_end(db, 0, 10, settle_seconds=60) == (first_id, 1)
+
+
+def test_backfill_runs_once(db):
+    db.add(corrected_job("job-1"))
+    db.add(corrected_job("job-2"))
+    db.add(TranscriptionJob(id="job-3", url="https://example.com/v", status="completed",
+                            segments=json.dumps(ORIGINAL)))
+    db.commit()
+
+    assert training_pairs.backfill() == 4
+    assert training_pairs.backfill() == 0
+    assert db.query(TrainingPair).count() == 4
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import transcript_segments
+from database import TranscriptionJob
+
+SEGMENTS = [{"start": float(i * 2), "end": float(i * 2 + 2), "text": f" line {i}"} for i in range(10)]
+
+
+def make_job(job_id="job-1"):
+    corrected = [dict(s) for s in SEGMENTS]
+    corrected[3]["text"] = " line three"
+    segments = [dict(s) for s in SEGMENTS]
+    segments[5]["text_enhanced"] = "line five (mt)"
+    return TranscriptionJob(id=job_id, url="https://example.com/v", status="completed",
+                            segments=json.dumps(segments), corrected_segments=json.dumps(corrected))
+
+
+@pytest.fixture
+def job(db):
+    job = make_job()
+    db.add(job)
+    transcript_segments.replace_for_job(db, job)
+    db.commit()
+    return job
+
+
+def test_job_without_rows_pages_as_none(db):
+    assert transcript_segments.page(db, "missing") is None
+
+
+def test_offset_and_limit(db, job):
+    segments, total = transcript_segments.page(db, "job-1", offset=2, limit=3)
+
+    assert total == 10
+    assert [s["index"] for s in segments] == [2, 3, 4]
+    assert segments[1]["corrected_text"] == " line three" and segments[0]["corrected_text"] == " line 2"
+
+
+def test_time_window_selects_overlapping_segments(db, job):
+    segments, total = transcript_segments.page(db, "job-1", from_s=5.0, to_s=9.0)
+
+    # [4,6) [6,8) [8,10) overlap [5,9); [2,4) ends at 4 and [10,12) starts at 10
+    assert total == 3 and [s["index"] for s in segments] == [2, 3, 4]
+
+
+def test_window_then_paging(db, job):
+    segments, total = transcript_segments.page(db, "job-1", offset=1, limit=2, from_s=10.0)
+
+    assert total == 5 and [s["index"] for s in segments] == [6, 7]
+    assert segments[0]["start"] == 12.0
+
+
+def test_empty_window_on_a_job_with_rows(db, job):
+    assert transcript_segments.page(db, "job-1", from_s=100.0) == ([], 0)
+
+
+def test_blob_pages_match_row_pages(db, job):
+    for kwargs in ({}, {"offset": 7}, {"offset": 2, "limit": 3}, {"from_s": 5.0, "to_s": 9.0},
+                   {"offset": 1, "limit": 2, "from_s": 10.0}):
+        assert transcript_segments.page_from_blob(job, **kwargs) == transcript_segments.page(db, "job-1", **kwargs)
+    enhanced, _ = transcript_segments.page_from_blob(job, offset=5, limit=1)
+    assert enhanced[0]["text_enhanced"] == "line five (mt)"
+
+
+def test_rewrite_replaces_rows(db, job):
+    job.segments = json.dumps(SEGMENTS[:4])
+    job.corrected_segments = None
+
+    assert transcript_segments.replace_for_job(db, job) == 4
+    db.commit()
+
+    segments, total = transcript_segments.page(db, "job-1")
+    assert total == 4 and all(s["corrected_text"] is None for s in segments)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import translation_cache
+from database import TranslationCacheEntry
+
+VERSION = "mt5-small:p1:128"
+
+
+@pytest.fixture
+def cache(db):
+    return translation_cache.TranslationCache(memory_bytes=1024 * 1024, ttl_days=1)
+
+
+def key(text, version=VERSION):
+    return translation_cache.make_key(text, "yoruba", "en", version)
+
+
+def test_key_normalizes_text_but_not_languages_or_version():
+    assert key("  Ẹ kú   àárọ̀ ") == key("ẹ kú àárọ̀")
+    assert key("ẹ kú àárọ̀") != key("ẹ kú àárọ̀", version="mt5-base:p1:128")
+    assert key("ẹ kú àárọ̀") != translation_cache.make_key("ẹ kú àárọ̀", "yoruba", "fr", VERSION)
+
+
+def test_rows_are_shared_across_processes(cache, db):
+    cache.put_many({key("e kaaro"): "good morning"}, "yoruba", "en", VERSION)
+
+    other_process = translation_cache.TranslationCache(memory_bytes=1024 * 1024, ttl_days=1)
+    assert other_process.get_many([key("e kaaro"), key("o dabo")]) == {key("e kaaro"): "good morning"}
+    assert other_process.get_many([key("e kaaro")]) == {key("e kaaro"): "good morning"}
+
+    stats = other_process.stats()
+    assert (stats["db_hits"], stats["memory"]["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+    assert db.get(TranslationCacheEntry, key("e kaaro")).hit_count == 1
+
+
+def test_expired_rows_are_skipped_and_purged(cache, db, monkeypatch):
+    db.add(TranslationCacheEntry(key=key("o dabo"), source_lang="yoruba", target_lang="en", model_version=VERSION,
+                                 translation="goodbye", hit_count=0, created_at=datetime.utcnow() - timedelta(days=2)))
+    db.commit()
+
+    assert cache.get_many([key("o dabo")]) == {}
+
+    monkeypatch.setattr(translation_cache, "TRANSLATION_CACHE_PURGE_SECONDS", 0)
+    cache.put_many({key("e kaaro"): "good morning"}, "yoruba", "en", VERSION)
+
+    db.expire_all()
+    assert db.get(TranslationCacheEntry, key("o dabo")) is None
+    assert cache.stats()["db_expired"] == 1
@@ -0,0 +1,83 @@
+import numpy as np
+
+import vad
+from vad import SAMPLE_RATE
+
+
+def seconds(duration):
+    return np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+
+
+def silence(duration):
+    return np.zeros(int(duration * SAMPLE_RATE), dtype=np.float32)
+
+
+def tone(duration, freq=1000.0, level=0.1):
+    return (level * np.sin(2 * np.pi * freq * seconds(duration))).astype(np.float32)
+
+
+def speech(duration, level=0.1, pauses=True):
+    """Voiced harmonics with a wandering pitch, 4 Hz syllables and (optionally) phrase pauses."""
+    t = seconds(duration)
+    phase = 2 * np.pi * np.cumsum(140 + 30 * np.sin(2 * np.pi * 0.7 * t)) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 15)) * (1 + 0.8 * np.sin(2 * np.pi * 3 * t + 1))
+    envelope = np.sqrt(np.clip(np.sin(2 * np.pi * 4 * t), 0, None))
+    if pauses:
+        envelope = envelope * (np.sin(2 * np.pi * 0.25 * t) > -0.5)
+    return (level * voiced * envelope / 3).astype(np.float32)
+
+
+def music_bed(duration, level=0.3):
+    t = seconds(duration)
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (220, 277, 330, 440, 554)) / 5
+    return (level * chord).astype(np.float32)
+
+
+def speech_seconds(spans):
+    return sum(end - start for start, end in spans) / SAMPLE_RATE
+
+
+def test_silence_has_no_speech():
+    assert vad.detect_speech(silence(10)) == []
+    speech_audio, time_map = vad.speech_only(silence(10))
+    assert len(speech_audio) == 0 and time_map == []
+
+
+def test_quiet_steady_tone_is_rejected():
+    assert vad.detect_speech(tone(10, level=0.001)) == []
+
+
+def test_hum_bursts_are_not_speech():
+    hum = np.concatenate([tone(1, freq=60, level=0.2), silence(1)] * 5)
+    assert vad.detect_speech(hum) == []
+
+
+def test_loud_flat_clip_goes_to_whisper_whole():
+    audio = tone(10)
+    assert vad.detect_speech(audio) == [(0, len(audio))]
+
+
+def test_speech_with_pauses_is_trimmed():
+    audio = speech(30)
+    found = speech_seconds(vad.detect_speech(audio))
+    assert 15 < found < 30
+
+
+def test_short_speech_in_long_silence_is_found():
+    audio = np.concatenate([silence(28), speech(2, pauses=False)])
+    spans = vad.detect_speech(audio)
+    assert spans and spans[0][0] >= 27 * SAMPLE_RATE
+    assert 1.5 < speech_seconds(spans) < 3
+
+
+def test_speech_over_music_bed_is_kept():
+    audio = speech(30, pauses=False) + music_bed(30)
+    assert speech_seconds(vad.detect_speech(audio)) == 30
+
+
+def test_remap_result_restores_original_times():
+    audio = np.concatenate([silence(5), speech(3, pauses=False), silence(5), speech(3, pauses=False)])
+    speech_audio, time_map = vad.speech_only(audio)
+    second_start = time_map[1][0]
+    result = vad.remap_result({"segments": [{"start": second_start + 0.5, "end": second_start + 1.0}]}, time_map)
+    assert abs(result["segments"][0]["start"] - (time_map[1][1] + 0.5)) < 1e-3
@@ -0,0 +1,151 @@
+"""
+training_pairs.py — correction diffs for fine-tuning, computed once.
+
+Every segment whose corrected text differs from Whisper's is written to the
+``training_pairs`` table when /correct saves, replacing that job's earlier
+pairs. /export/training then streams rows as NDJSON in id order: ``since`` is
+the last id the caller has seen and each page ends at ``limit`` rows, so the
+fine-tuning pipeline only pulls what is new and nothing is held in memory.
+
+Ids are handed out when a row is inserted, not when its transaction commits,
+so on Postgres a slow /correct can commit id 41 after id 42 is already
+visible. A page therefore ends before the first row younger than
+TRAINING_EXPORT_SETTLE_SECONDS: every lower id has either committed by then
+or been rolled back, and ``since`` never moves past a row that can still
+appear. The newest pairs show up one settle window late.
+
+A re-correction gives the job's pairs new ids, so consumers should keep the
+latest row per (job_id, segment_index).
+
+Corrections saved before the table existed are copied in once by
+``backfill()`` (startup thread), which only runs while the table is empty.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from database import SessionLocal, TrainingPair, TranscriptionJob
+
+logger = logging.getLogger(__name__)
+
+TRAINING_EXPORT_PAGE_SIZE = int(os.environ.get("TRAINING_EXPORT_PAGE_SIZE", "1000"))
+TRAINING_EXPORT_MAX_PAGE_SIZE = int(os.environ.get("TRAINING_EXPORT_MAX_PAGE_SIZE", "10000"))
+# Longer than any /correct transaction (plus clock skew between API hosts).
+TRAINING_EXPORT_SETTLE_SECONDS = int(os.environ.get("TRAINING_EXPORT_SETTLE_SECONDS", "60"))
+TRAINING_BATCH_ROWS = 200
+
+
+def diff_pairs(job: TranscriptionJob) -> List[TrainingPair]:
+    """A row per segment whose corrected text differs from the original."""
+    if not job.corrected_segments:
+        return []
+    original_segments = json.loads(job.segments) if job.segments else []
+    corrected_segments = json.loads(job.corrected_segments)
+    return [
+        TrainingPair(
+            job_id=job.id,
+            segment_index=i,
+            original=orig.get("text"),
+            corrected=corr.get("text"),
+            language=job.detected_language,
+            timestamp_start=orig.get("start"),
+            timestamp_end=orig.get("end"),
+        )
+        for i, (orig, corr) in enumerate(zip(original_segments, corrected_segments))
+        if orig.get("text") != corr.get("text")
+    ]
+
+
+def replace_for_job(db, job: TranscriptionJob) -> int:
+    """Swap the job's pairs for freshly computed ones in ``db``'s transaction; returns the count."""
+    db.query(TrainingPair).filter(TrainingPair.job_id == job.id).delete(synchronize_session=False)
+    pairs = diff_pairs(job)
+    db.add_all(pairs)
+    return len(pairs)
+
+
+def backfill() -> int:
+    """Compute pairs for every already-corrected job, once (no-op when the table has rows)."""
+    db = SessionLocal()
+    written = 0
+    try:
+        if db.query(TrainingPair.id).first() is not None:
+            return 0
+        jobs = (
+            db.query(TranscriptionJob)
+            .filter(TranscriptionJob.corrected_segments.isnot(None))
+            .order_by(TranscriptionJob.corrected_at, TranscriptionJob.id)
+        )
+        pending = 0
+        for job in jobs.yield_per(TRAINING_BATCH_ROWS):
+            pairs = diff_pairs(job)
+            db.add_all(pairs)
+            written += len(pairs)
+            pending += 1
+            if pending >= TRAINING_BATCH_ROWS:
+                db.flush()
+                pending = 0
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Training-pair backfill failed: {e}")
+        return 0
+    finally:
+        db.close()
+    if written:
+        logger.info(f"Training-pair backfill: {written} pair(s) from existing corrections")
+    return written
+
+
+def page_end(db, since: int, limit: int,
+             settle_seconds: int = TRAINING_EXPORT_SETTLE_SECONDS) -> Tuple[Optional[int], int]:
+    """
+    (last id, row count) of the page after ``since``: a keyset scan over at
+    most ``limit`` ids that stops before the first row still inside the
+    settle window.
+    """
+    settled_before = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    rows = (
+        db.query(TrainingPair.id, TrainingPair.created_at)
+        .filter(TrainingPair.id > since)
+        .order_by(TrainingPair.id)
+        .limit(limit)
+    )
+    last_id, count = None, 0
+    for pair_id, created_at in rows:
+        if created_at is not None and created_at > settled_before:
+            break
+        last_id, count = pair_id, count + 1
+    return last_id, count
+
+
+def as_record(pair: TrainingPair) -> dict:
+    return {
+        "id": pair.id,
+        "job_id": pair.job_id,
+        "segment_index": pair.segment_index,
+        "original": pair.original,
+        "corrected": pair.corrected,
+        "language": pair.language,
+        "timestamp_start": pair.timestamp_start,
+        "timestamp_end": pair.timestamp_end,
+        "created_at": pair.created_at.isoformat() if pair.created_at else None,
+    }
+
+
+def iter_ndjson(since: int, until: int) -> Iterator[bytes]:
+    """Pairs with since < id <= until as NDJSON, on a session owned by the generator."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(TrainingPair)
+            .filter(TrainingPair.id > since, TrainingPair.id <= until)
+            .order_by(TrainingPair.id)
+        )
+        for pair in rows.yield_per(TRAINING_BATCH_ROWS):
+            yield (json.dumps(as_record(pair), ensure_ascii=False) + "\n").encode("utf-8")
+    finally:
+        db.close()
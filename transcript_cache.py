@@ -0,0 +1,159 @@
+"""
+transcript_cache.py — content-addressed cache of Whisper results.
+
+The key is a sha256 over the decoded 16 kHz mono float32 PCM plus the
+Whisper language, model name and decode options, so the same clip hits the
+cache whether it arrives as an upload, a URL or a re-encoded copy that
+decodes to identical samples.
+
+Two tiers:
+  * an in-process LRU (TRANSCRIPT_CACHE_MEMORY_BYTES), and
+  * the ``transcript_cache`` table, shared by every API and worker process,
+    trimmed to TRANSCRIPT_CACHE_DB_BYTES by evicting the least recently hit
+    rows.
+
+A cached payload is ``{"text", "language", "segments", "cleaned_transcript"}``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+
+from cache_utils import LRUCache
+from database import SessionLocal, TranscriptCacheEntry
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_ENABLED = os.environ.get("TRANSCRIPT_CACHE_ENABLED", "1") == "1"
+TRANSCRIPT_CACHE_MEMORY_BYTES = int(os.environ.get("TRANSCRIPT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+TRANSCRIPT_CACHE_DB_BYTES = int(os.environ.get("TRANSCRIPT_CACHE_DB_BYTES", str(512 * 1024 * 1024)))
+
+
+def make_key(audio, language: Optional[str], model_name: str,
+             options: Optional[Dict[str, Any]] = None) -> str:
+    """Hash decoded PCM together with everything that changes Whisper's output."""
+    digest = hashlib.sha256()
+    digest.update(memoryview(audio).cast("B"))
+    digest.update(json.dumps(
+        {"language": language, "model": model_name, "options": options or {}},
+        sort_keys=True,
+    ).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    def __init__(self, memory_bytes: int = TRANSCRIPT_CACHE_MEMORY_BYTES,
+                 db_bytes: int = TRANSCRIPT_CACHE_DB_BYTES):
+        self.db_bytes = db_bytes
+        self.memory = LRUCache(memory_bytes, sizeof=lambda raw: len(raw))
+        self._lock = threading.Lock()
+        self.db_hits = 0
+        self.misses = 0
+        self.db_evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not TRANSCRIPT_CACHE_ENABLED:
+            return None
+
+        raw = self.memory.get(key)
+        if raw is not None:
+            return json.loads(raw)
+
+        db = SessionLocal()
+        try:
+            entry = db.query(TranscriptCacheEntry).filter(TranscriptCacheEntry.key == key).first()
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_hit_at = datetime.utcnow()
+            raw = entry.payload
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Transcript cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+        with self._lock:
+            self.db_hits += 1
+        self.memory.put(key, raw)
+        return json.loads(raw)
+
+    def put(self, key: str, payload: Dict[str, Any], model_name: str, language: Optional[str]):
+        if not TRANSCRIPT_CACHE_ENABLED:
+            return
+
+        raw = json.dumps(payload)
+        self.memory.put(key, raw)
+
+        db = SessionLocal()
+        try:
+            if db.query(TranscriptCacheEntry.key).filter(TranscriptCacheEntry.key == key).first() is None:
+                db.add(TranscriptCacheEntry(
+                    key=key,
+                    model_name=model_name,
+                    language=language,
+                    payload=raw,
+                    size_bytes=len(raw),
+                    hit_count=0,
+                ))
+                db.commit()
+            self._evict(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Transcript cache store failed: {e}")
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        """Delete least recently hit rows until the table fits its byte budget."""
+        total = db.query(func.coalesce(func.sum(TranscriptCacheEntry.size_bytes), 0)).scalar()
+        if total <= self.db_bytes:
+            return
+        evicted = 0
+        while total > self.db_bytes:
+            victims = (
+                db.query(TranscriptCacheEntry.key, TranscriptCacheEntry.size_bytes)
+                .order_by(TranscriptCacheEntry.last_hit_at)
+                .limit(100)
+                .all()
+            )
+            if not victims:
+                break
+            for key, size in victims:
+                if total <= self.db_bytes:
+                    break
+                db.query(TranscriptCacheEntry).filter(TranscriptCacheEntry.key == key).delete()
+                self.memory.discard(key)
+                total -= size
+                evicted += 1
+            db.commit()
+        with self._lock:
+            self.db_evictions += evicted
+        logger.info(f"Transcript cache: evicted {evicted} entries to stay under {self.db_bytes} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        with self._lock:
+            db_hits, misses, db_evictions = self.db_hits, self.misses, self.db_evictions
+        lookups = memory["hits"] + db_hits + misses
+        return {
+            "enabled": TRANSCRIPT_CACHE_ENABLED,
+            "memory": memory,
+            "db_hits": db_hits,
+            "misses": misses,
+            "db_evictions": db_evictions,
+            "db_max_bytes": self.db_bytes,
+            "hit_rate": round((memory["hits"] + db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+cache = TranscriptCache()
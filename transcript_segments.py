@@ -0,0 +1,89 @@
+"""
+transcript_segments.py — segments as rows, for paged and time-window reads.
+
+``TranscriptionJob.segments`` stays the full JSON blob, but completed jobs
+also get one ``transcript_segments`` row per segment (written by
+``complete_job``, rewritten after /correct). /results?offset=&limit= and
+/results?from_s=&to_s= read just the page or window they need through the
+(job_id, start) index instead of parsing the whole array.
+
+Jobs completed before the table existed (and jobs still enhancing) have no
+rows: their pages are sliced from the blob, and a completed job's rows are
+written on that first paged read.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from database import TranscriptSegment, TranscriptionJob
+
+
+def rows_for(job: TranscriptionJob) -> List[Dict[str, Any]]:
+    """Row values for every segment of ``job``, corrections aligned by position."""
+    segments = json.loads(job.segments) if job.segments else []
+    corrected = json.loads(job.corrected_segments) if job.corrected_segments else []
+    return [
+        {
+            "job_id": job.id,
+            "idx": i,
+            "start": segment.get("start", 0),
+            "end": segment.get("end", 0),
+            "text": segment.get("text"),
+            "text_enhanced": segment.get("text_enhanced"),
+            "corrected_text": corrected[i].get("text") if i < len(corrected) and corrected[i] else None,
+        }
+        for i, segment in enumerate(segments)
+    ]
+
+
+def replace_for_job(db, job: TranscriptionJob) -> int:
+    """Rewrite the job's rows in ``db``'s transaction (one executemany); returns the count."""
+    db.query(TranscriptSegment).filter(TranscriptSegment.job_id == job.id).delete(synchronize_session=False)
+    rows = rows_for(job)
+    if rows:
+        db.execute(insert(TranscriptSegment), rows)
+    return len(rows)
+
+
+def as_segment(row) -> Dict[str, Any]:
+    """API shape of a row (a TranscriptSegment or a ``rows_for`` dict)."""
+    get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+    segment = {"index": get("idx"), "start": get("start"), "end": get("end"), "text": get("text")}
+    if get("text_enhanced"):
+        segment["text_enhanced"] = get("text_enhanced")
+    segment["corrected_text"] = get("corrected_text")
+    return segment
+
+
+def _in_window(start: float, end: float, from_s: Optional[float], to_s: Optional[float]) -> bool:
+    return (from_s is None or end > from_s) and (to_s is None or start < to_s)
+
+
+def page(db, job_id: str, offset: int = 0, limit: Optional[int] = None,
+         from_s: Optional[float] = None, to_s: Optional[float] = None) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+    """
+    (segments, total matching) for the segments overlapping [from_s, to_s),
+    ``offset``/``limit`` applied after the window. None when the job has no rows.
+    """
+    query = db.query(TranscriptSegment).filter(TranscriptSegment.job_id == job_id)
+    if to_s is not None:
+        query = query.filter(TranscriptSegment.start < to_s)
+    if from_s is not None:
+        query = query.filter(TranscriptSegment.end > from_s)
+    total = query.count()
+    if total == 0 and db.query(TranscriptSegment.idx).filter(TranscriptSegment.job_id == job_id).first() is None:
+        return None
+    rows = query.order_by(TranscriptSegment.idx).offset(offset)
+    if limit is not None:
+        rows = rows.limit(limit)
+    return [as_segment(row) for row in rows], total
+
+
+def page_from_blob(job: TranscriptionJob, offset: int = 0, limit: Optional[int] = None,
+                   from_s: Optional[float] = None, to_s: Optional[float] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """``page()`` computed from the JSON blob, for jobs without rows."""
+    matching = [row for row in rows_for(job) if _in_window(row["start"], row["end"], from_s, to_s)]
+    selected = matching[offset:offset + limit] if limit is not None else matching[offset:]
+    return [as_segment(row) for row in selected], len(matching)
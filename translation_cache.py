@@ -0,0 +1,175 @@
+"""
+translation_cache.py — memo of segment translations.
+
+Greetings, intros, outros and reposted clips produce the same segments over
+and over. Before any mT5 ``generate`` call, ``mt_enhance`` looks each segment
+up here by sha256 over its normalized text (Unicode NFC, case-folded,
+whitespace collapsed) plus source language, target language and model
+version, so a change of model or prompt never serves stale output.
+
+Two tiers, like ``transcript_cache``:
+  * an in-process LRU (TRANSLATION_CACHE_MEMORY_BYTES), and
+  * the ``translation_cache`` table, shared by every API and worker process.
+
+Entries expire TRANSLATION_CACHE_TTL_DAYS after they were written: expired
+rows are ignored on lookup and deleted in bulk at most once per
+TRANSLATION_CACHE_PURGE_SECONDS.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from cache_utils import LRUCache
+from database import SessionLocal, TranslationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_ENABLED = os.environ.get("TRANSLATION_CACHE_ENABLED", "1") == "1"
+TRANSLATION_CACHE_MEMORY_BYTES = int(os.environ.get("TRANSLATION_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+TRANSLATION_CACHE_TTL_DAYS = float(os.environ.get("TRANSLATION_CACHE_TTL_DAYS", "30"))
+TRANSLATION_CACHE_PURGE_SECONDS = int(os.environ.get("TRANSLATION_CACHE_PURGE_SECONDS", "3600"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text or "")).strip().casefold()
+
+
+def make_key(text: str, source_lang: str, target_lang: str, model_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_text(text), source_lang, target_lang, model_version):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, memory_bytes: int = TRANSLATION_CACHE_MEMORY_BYTES,
+                 ttl_days: float = TRANSLATION_CACHE_TTL_DAYS):
+        self.ttl = timedelta(days=ttl_days)
+        self.memory = LRUCache(memory_bytes, sizeof=lambda value: len(value.encode("utf-8")) + 64,
+                               ttl_seconds=self.ttl.total_seconds())
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self.db_hits = 0
+        self.misses = 0
+        self.db_expired = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Cached translations for whichever of ``keys`` are present and unexpired."""
+        if not TRANSLATION_CACHE_ENABLED or not keys:
+            return {}
+
+        found: Dict[str, str] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        if not missing:
+            return found
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            rows = (
+                db.query(TranslationCacheEntry)
+                .filter(TranslationCacheEntry.key.in_(missing))
+                .filter(TranslationCacheEntry.created_at >= now - self.ttl)
+                .all()
+            )
+            for row in rows:
+                row.hit_count = (row.hit_count or 0) + 1
+                row.last_hit_at = now
+                found[row.key] = row.translation
+                self.memory.put(row.key, row.translation)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Translation cache lookup failed: {e}")
+            rows = []
+        finally:
+            db.close()
+
+        with self._lock:
+            self.db_hits += len(rows)
+            self.misses += len(missing) - len(rows)
+        return found
+
+    def put_many(self, entries: Dict[str, str], source_lang: str, target_lang: str, model_version: str):
+        """Store ``{key: translation}`` in both tiers (existing rows are left alone)."""
+        if not TRANSLATION_CACHE_ENABLED or not entries:
+            return
+
+        for key, translation in entries.items():
+            self.memory.put(key, translation)
+
+        db = SessionLocal()
+        try:
+            existing = {
+                key for (key,) in
+                db.query(TranslationCacheEntry.key).filter(TranslationCacheEntry.key.in_(list(entries)))
+            }
+            db.add_all([
+                TranslationCacheEntry(
+                    key=key,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    model_version=model_version,
+                    translation=translation,
+                    hit_count=0,
+                )
+                for key, translation in entries.items() if key not in existing
+            ])
+            db.commit()
+            self._purge_expired(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Translation cache store failed: {e}")
+        finally:
+            db.close()
+
+    def _purge_expired(self, db):
+        """Bulk-delete rows past their TTL, at most once per TRANSLATION_CACHE_PURGE_SECONDS."""
+        with self._lock:
+            if time.time() - self._last_purge < TRANSLATION_CACHE_PURGE_SECONDS:
+                return
+            self._last_purge = time.time()
+        expired = (
+            db.query(TranslationCacheEntry)
+            .filter(TranslationCacheEntry.created_at < datetime.utcnow() - self.ttl)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        if expired:
+            with self._lock:
+                self.db_expired += expired
+            logger.info(f"Translation cache: purged {expired} expired entries")
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        with self._lock:
+            db_hits, misses, db_expired = self.db_hits, self.misses, self.db_expired
+        lookups = memory["hits"] + db_hits + misses
+        return {
+            "enabled": TRANSLATION_CACHE_ENABLED,
+            "memory": memory,
+            "db_hits": db_hits,
+            "misses": misses,
+            "db_expired": db_expired,
+            "ttl_days": self.ttl.total_seconds() / 86400,
+            "hit_rate": round((memory["hits"] + db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+cache = TranslationCache()
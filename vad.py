@@ -0,0 +1,157 @@
+"""
+vad.py — vectorised voice-activity pre-pass on 16 kHz PCM.
+
+Runs before Whisper so decode windows aren't spent on silence, room tone or
+steady hum, and so speech-free media fails with ``no_clear_speech`` in
+milliseconds instead of after a full transcription.
+
+A frame counts as speech when it is
+  * loud enough: energy above the clip's noise floor by VAD_ENERGY_MARGIN_DB
+    and above an absolute floor, and
+  * speech-like: either most of its energy sits in the 300-3400 Hz voice
+    band, or its smoothed spectral flux shows syllable-rate change (steady
+    tones and hum have almost none).
+Short bursts are dropped, short pauses are bridged, and spans are padded so
+word onsets survive.
+
+The noise floor is relative (the clip's quietest frames), which only works
+when the clip has quiet stretches. A clip whose energy barely varies
+(speech over a music bed, steady noise) has no floor to measure against: if
+it is loud (median above VAD_FLAT_LEVEL_DB) it goes to Whisper whole, and
+only a flat, quiet clip is rejected outright.
+
+``compact`` concatenates the speech spans and returns a ``TimeMap``;
+``remap_result`` shifts Whisper's segment times back onto the original
+timeline.
+"""
+
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME = 400                  # 25 ms, non-overlapping
+FRAME_SECONDS = FRAME / SAMPLE_RATE
+_BLOCK_FRAMES = 8192         # frames per FFT block; bounds memory on long media
+
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "1") == "1"
+VAD_ENERGY_MARGIN_DB = float(os.environ.get("VAD_ENERGY_MARGIN_DB", "6"))
+VAD_ABSOLUTE_FLOOR_DB = float(os.environ.get("VAD_ABSOLUTE_FLOOR_DB", "-55"))
+VAD_MIN_SPEECH_SECONDS = float(os.environ.get("VAD_MIN_SPEECH_SECONDS", "0.25"))
+VAD_MAX_GAP_SECONDS = float(os.environ.get("VAD_MAX_GAP_SECONDS", "0.6"))
+VAD_PAD_SECONDS = float(os.environ.get("VAD_PAD_SECONDS", "0.3"))
+# Energy spread (90th - 10th percentile) below which a clip counts as flat
+VAD_FLAT_SPREAD_DB = float(os.environ.get("VAD_FLAT_SPREAD_DB", "12"))
+VAD_FLAT_LEVEL_DB = float(os.environ.get("VAD_FLAT_LEVEL_DB", "-45"))
+
+_VOICE_BAND_RATIO = 0.45
+_FLUX_THRESHOLD = 0.08
+
+# (compact_start_s, original_start_s, duration_s) for each kept span
+TimeMap = List[Tuple[float, float, float]]
+
+
+def _frame_features(audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-frame energy (dB), voice-band energy ratio and normalised spectral flux."""
+    n_frames = len(audio) // FRAME
+    frames = audio[: n_frames * FRAME].reshape(n_frames, FRAME)
+    energy_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / FRAME + 1e-10)
+
+    freqs = np.fft.rfftfreq(FRAME, d=1.0 / SAMPLE_RATE)
+    voice = (freqs >= 300) & (freqs <= 3400)
+    window = np.hanning(FRAME).astype(np.float32)
+
+    band_ratio = np.empty(n_frames, dtype=np.float32)
+    flux = np.empty(n_frames, dtype=np.float32)
+    previous = None
+    for lo in range(0, n_frames, _BLOCK_FRAMES):
+        mag = np.abs(np.fft.rfft(frames[lo:lo + _BLOCK_FRAMES] * window, axis=1))
+        total = mag.sum(axis=1) + 1e-10
+        power = mag ** 2
+        band_ratio[lo:lo + len(mag)] = power[:, voice].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+        shifted = np.vstack([mag[:1] if previous is None else previous, mag[:-1]])
+        flux[lo:lo + len(mag)] = np.maximum(mag - shifted, 0.0).sum(axis=1) / total
+        previous = mag[-1:]
+    return energy_db, band_ratio, flux
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """Return an (n, 2) array of [start, end) frame indices for True runs."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def detect_speech(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """Return speech spans as ``[(start_sample, end_sample), ...]``."""
+    if len(audio) < FRAME:
+        return []
+    energy_db, band_ratio, flux = _frame_features(audio)
+
+    floor_db, level_db, peak_db = np.percentile(energy_db, [10, 50, 90])
+    if peak_db - floor_db < VAD_FLAT_SPREAD_DB and level_db > VAD_FLAT_LEVEL_DB:
+        # No quiet frames to calibrate against; don't guess, let Whisper decide
+        return [(0, len(audio))]
+    loud = energy_db > max(floor_db + VAD_ENERGY_MARGIN_DB, VAD_ABSOLUTE_FLOOR_DB)
+    smooth = max(1, int(0.2 / FRAME_SECONDS))
+    flux_smooth = np.convolve(flux, np.ones(smooth, dtype=np.float32) / smooth, mode="same")
+    speech = loud & ((band_ratio > _VOICE_BAND_RATIO) | (flux_smooth > _FLUX_THRESHOLD))
+
+    # Bridge short pauses, then drop bursts too short to be words
+    max_gap = int(VAD_MAX_GAP_SECONDS / FRAME_SECONDS)
+    for start, end in _runs(~speech):
+        if 0 < start and end < len(speech) and end - start <= max_gap:
+            speech[start:end] = True
+    min_speech = int(VAD_MIN_SPEECH_SECONDS / FRAME_SECONDS)
+    runs = [(s, e) for s, e in _runs(speech) if e - s >= min_speech]
+
+    pad = int(VAD_PAD_SECONDS * SAMPLE_RATE)
+    spans: List[Tuple[int, int]] = []
+    for s, e in runs:
+        start = max(0, int(s) * FRAME - pad)
+        end = min(len(audio), int(e) * FRAME + pad)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def compact(audio: np.ndarray, spans: List[Tuple[int, int]]) -> Tuple[np.ndarray, TimeMap]:
+    """Concatenate speech spans; return the compacted audio and its time map."""
+    time_map: TimeMap = []
+    cursor = 0
+    for start, end in spans:
+        time_map.append((cursor / SAMPLE_RATE, start / SAMPLE_RATE, (end - start) / SAMPLE_RATE))
+        cursor += end - start
+    if not spans:
+        return audio[:0], time_map
+    return np.concatenate([audio[start:end] for start, end in spans]), time_map
+
+
+def remap_result(result: Dict[str, Any], time_map: TimeMap) -> Dict[str, Any]:
+    """Return ``result`` with every segment's start/end on the original timeline."""
+    if not time_map:
+        return result
+    starts = np.array([entry[0] for entry in time_map], dtype=np.float64)
+
+    def to_original(t: float) -> float:
+        i = max(0, int(np.searchsorted(starts, t, side="right")) - 1)
+        compact_start, original_start, duration = time_map[i]
+        return float(original_start + min(max(t - compact_start, 0.0), duration))
+
+    segments = [
+        {**seg, "start": round(to_original(seg["start"]), 3), "end": round(to_original(seg["end"]), 3)}
+        for seg in result.get("segments", [])
+    ]
+    return {**result, "segments": segments}
+
+
+def speech_only(audio: np.ndarray) -> Tuple[np.ndarray, TimeMap]:
+    """
+    Return ``(speech_audio, time_map)``. ``speech_audio`` is empty when no
+    speech was found. With VAD disabled the audio passes through unchanged.
+    """
+    if not VAD_ENABLED:
+        return audio, [(0.0, 0.0, len(audio) / SAMPLE_RATE)]
+    return compact(audio, detect_speech(audio))
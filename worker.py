@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+worker.py — standalone job-queue worker.
+
+Usage:
+    python worker.py [--concurrency N]
+
+Drains the transcription_jobs queue (see job_queue.py) without serving HTTP.
+Run as many of these as you like, on one machine or several, against the
+same DATABASE_URL; leases guarantee each job is processed by one worker at a
+time. Set EMBEDDED_JOB_WORKERS=0 on the API process when workers run here.
+With MT_ENHANCE_ENABLED=1 it also runs --mt-workers workers for the separate
+MT enhance phase.
+"""
+
+import argparse
+import logging
+import signal
+import threading
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run DAWT-Transcribe job workers")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of jobs this process works on at once (default: 1)",
+    )
+    parser.add_argument(
+        "--mt-workers",
+        type=int,
+        default=None,
+        help="MT enhance workers when MT_ENHANCE_ENABLED=1 (default: MT_ENHANCE_WORKERS)",
+    )
+    args = parser.parse_args()
+
+    import job_queue
+    import mt_enhance
+    from inference import pool as inference_pool
+    from main import enhance_job_background, process_transcription_background
+
+    stop = threading.Event()
+
+    def _handle_signal(signum, _frame):
+        logger.info(f"Received signal {signum}, finishing current jobs...")
+        stop.set()
+        job_queue.notify()
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    threads = job_queue.start_workers(process_transcription_background, args.concurrency, stop)
+    mt_workers = mt_enhance.MT_ENHANCE_WORKERS if args.mt_workers is None else args.mt_workers
+    if mt_enhance.MT_ENHANCE_ENABLED and mt_workers > 0:
+        threads += job_queue.start_workers(enhance_job_background, mt_workers, stop, phase="enhance")
+        logger.info(f"Started {mt_workers} MT enhance worker(s)")
+    logger.info(f"Worker started with concurrency {args.concurrency}")
+    try:
+        while not stop.wait(1):
+            pass
+    finally:
+        for thread in threads:
+            thread.join()
+        inference_pool.shutdown()
+        logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()